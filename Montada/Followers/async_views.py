@@ -0,0 +1,97 @@
+"""
+Async versions of the read-heavy follower endpoints, routed by
+Montada/asgi_urls.py when the app is served through Montada/asgi.py. Each
+runs the queryset and payload of its DRF counterpart in views.py through the
+async ORM; querysets are fully loaded (select_related) before serializing,
+since lazy loads are not allowed on the event loop.
+"""
+from django.contrib.auth import get_user_model
+from django.http import Http404
+
+from Montada.async_views import AsyncAPIView
+from Montada.cache import cache_response
+from Montada.fieldsets import requested_fieldset
+from . import views
+from .models import Mute
+
+User = get_user_model()
+
+
+async def aget_user_or_404(user_id):
+    user = await User.objects.filter(id=views.parse_user_id(user_id)).afirst()
+    if user is None:
+        raise Http404("No User matches the given query.")
+    return user
+
+
+# ---------- Lists ----------
+
+
+class FollowListView(AsyncAPIView):
+    """Serves the list of ``sync_view``, a views.FollowListView"""
+    sync_view = None
+
+    async def get(self, request):
+        view = self.sync_view()
+        fieldset = requested_fieldset(request)
+        rows = [row async for row in view.get_list_queryset(request, fieldset)]
+        return view.get_payload(rows, fieldset)
+
+
+class FollowersListView(FollowListView):
+    """List users who follow you (accepted and active)."""
+    sync_view = views.FollowersListView
+
+
+class FollowingListView(FollowListView):
+    """List users you follow (accepted and active)."""
+    sync_view = views.FollowingListView
+
+
+class PendingReceivedListView(FollowListView):
+    """List pending follow requests you received."""
+    sync_view = views.PendingReceivedListView
+
+
+class PendingSentListView(FollowListView):
+    """List pending follow requests you sent."""
+    sync_view = views.PendingSentListView
+
+
+class MutedListView(FollowListView):
+    """List users you have muted."""
+    sync_view = views.MutedListView
+
+
+# ---------- Counts ----------
+
+
+class CountsView(AsyncAPIView):
+    """Get followers/following/pending/muted counts. Optional: ?user_id=<uuid> for another user's counts."""
+
+    @cache_response(timeout=60, tags=views._counts_cache_tags)
+    async def get(self, request):
+        user_id = request.GET.get("user_id")
+        target = await aget_user_or_404(user_id) if user_id else request.user
+
+        qs, counts = views.CountsView.get_counts_queryset(target)
+        counts = await qs.aaggregate(**counts)
+        counts["muted_count"] = await Mute.objects.filter(muter=target).acount() if target == request.user else 0
+        return counts
+
+
+# ---------- Status for a user ----------
+
+
+class FollowStatusView(AsyncAPIView):
+    """Get follow/mute status with respect to a user. Query: ?user_id=<uuid>"""
+
+    async def get(self, request):
+        user_id = request.GET.get("user_id")
+        if not user_id:
+            return {"error": "user_id is required."}, 400
+        target = await aget_user_or_404(user_id)
+
+        follows = [f async for f in views.FollowStatusView.get_follows_queryset(request.user, target)]
+        is_muted = await Mute.objects.filter(muter=request.user, muted=target).aexists()
+        return views.FollowStatusView.get_payload(request.user, target, follows, is_muted)
@@ -1,7 +1,8 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-import uuid
+
+from Montada.ids import uuid7
 
 class Follow(models.Model):
     class Status(models.TextChoices):
@@ -10,7 +11,7 @@ class Follow(models.Model):
         REJECTED = "REJECTED", "Rejected"
         BLOCKED = "BLOCKED", "Blocked"
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
 
     follower = models.ForeignKey(
@@ -34,6 +35,9 @@ class Follow(models.Model):
     accepted_at = models.DateTimeField(null=True, blank=True)
     rejected_at = models.DateTimeField(null=True, blank=True)
     unfollowed_at = models.DateTimeField(null=True, blank=True)
+    # Any change, including blocks (which have no timestamp of their own);
+    # delta sync reads it
+    updated_at = models.DateTimeField(auto_now=True)
 
     is_active = models.BooleanField(default=False)
 
@@ -43,6 +47,9 @@ class Follow(models.Model):
             models.Index(fields=["follower"]),
             models.Index(fields=["followed"]),
             models.Index(fields=["status"]),
+            # Delta sync of followers / following lists
+            models.Index(fields=["followed", "updated_at"], name="follow_followed_updated_idx"),
+            models.Index(fields=["follower", "updated_at"], name="follow_follower_updated_idx"),
         ]
 
     def accept(self):
@@ -53,25 +60,27 @@ class Follow(models.Model):
         self.unfollowed_at = None
         self.save(update_fields=[
             "status", "is_active", "accepted_at",
-            "rejected_at", "unfollowed_at"
+            "rejected_at", "unfollowed_at", "updated_at"
         ])
+        from Notifications.fanout import notify_follow_accepted
+        notify_follow_accepted(self)
 
     def reject(self):
         self.status = self.Status.REJECTED
         self.is_active = False
         self.rejected_at = timezone.now()
-        self.save(update_fields=["status", "is_active", "rejected_at"])
+        self.save(update_fields=["status", "is_active", "rejected_at", "updated_at"])
 
     def unfollow(self):
         self.status = self.Status.ACCEPTED
         self.is_active = False
         self.unfollowed_at = timezone.now()
-        self.save(update_fields=["is_active", "unfollowed_at"])
+        self.save(update_fields=["is_active", "unfollowed_at", "updated_at"])
 
     def block(self):
         self.status = self.Status.BLOCKED
         self.is_active = False
-        self.save(update_fields=["status", "is_active"])
+        self.save(update_fields=["status", "is_active", "updated_at"])
 
     def __str__(self):
         return f"{self.follower} → {self.followed} ({self.status})"
@@ -79,7 +88,7 @@ class Follow(models.Model):
 
 class Mute(models.Model):
     """User mutes another user (muter's feed won't show muted user's content)."""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     muter = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
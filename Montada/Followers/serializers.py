@@ -1,18 +1,22 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from Mainapp.serializers import ProfilePictureThumbnailsField
+from Montada.fieldsets import SparseFieldsetMixin
 from .models import Follow, Mute
 
 User = get_user_model()
 
 
-class UserMinimalSerializer(serializers.ModelSerializer):
+class UserMinimalSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Minimal user for followers/following lists to avoid circular import."""
+    profile_picture_thumbnails = ProfilePictureThumbnailsField()
+
     class Meta:
         model = User
-        fields = ("id", "username", "email", "name", "profile_picture", "user_type")
+        fields = ("id", "username", "email", "name", "profile_picture", "profile_picture_thumbnails", "user_type")
 
 
-class FollowSerializer(serializers.ModelSerializer):
+class FollowSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     follower_detail = UserMinimalSerializer(source="follower", read_only=True)
     followed_detail = UserMinimalSerializer(source="followed", read_only=True)
 
@@ -38,7 +42,7 @@ class FollowActionSerializer(serializers.Serializer):
     follow_id = serializers.UUIDField(required=True, help_text="ID of the Follow record")
 
 
-class MuteSerializer(serializers.ModelSerializer):
+class MuteSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     muter_detail = UserMinimalSerializer(source="muter", read_only=True)
     muted_detail = UserMinimalSerializer(source="muted", read_only=True)
 
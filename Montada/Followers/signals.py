@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Montada.cache import invalidate_tags_on_commit
+from .models import Follow, Mute
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_follow_responses(sender, instance, using, **kwargs):
+    """Counts and lists of both sides change, and so do analyst follower counts"""
+    invalidate_tags_on_commit(
+        f'follows:{instance.follower_id}', f'follows:{instance.followed_id}', 'analysts', using=using
+    )
+
+
+@receiver([post_save, post_delete], sender=Mute)
+def invalidate_mute_responses(sender, instance, using, **kwargs):
+    invalidate_tags_on_commit(f'mutes:{instance.muter_id}', using=using)
@@ -1,3 +1,75 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from Mainapp.models import User
+from .models import Follow
+
+
+class SparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trader = User.objects.create_user(
+            username="trader", email="trader@example.com", password="pass-1234", user_type="trader"
+        )
+        cls.analyst = User.objects.create_user(
+            username="analyst", email="analyst@example.com", password="pass-1234", user_type="analyst", name="An"
+        )
+        cls.fan = User.objects.create_user(
+            username="fan", email="fan@example.com", password="pass-1234", user_type="trader"
+        )
+        Follow.objects.create(follower=cls.trader, followed=cls.analyst, status=Follow.Status.ACCEPTED, is_active=True)
+        Follow.objects.create(follower=cls.fan, followed=cls.trader, status=Follow.Status.ACCEPTED, is_active=True)
+        Follow.objects.create(follower=cls.analyst, followed=cls.trader, status=Follow.Status.PENDING)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def get(self, name, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data, queries.captured_queries[-1]["sql"]
+
+    def test_followers_and_following_lists(self):
+        data, sql = self.get("Followers:followers_list", {"fields": "id,username"})
+        self.assertEqual(data["followers"], [{"id": str(self.fan.id), "username": "fan"}])
+        self.assertIn('"username"', sql)
+        self.assertNotIn('"email"', sql)
+
+        data, sql = self.get("Followers:following_list", {"omit": "email,profile_picture,profile_picture_thumbnails"})
+        self.assertEqual(
+            data["following"],
+            [{"id": str(self.analyst.id), "username": "analyst", "name": "An", "user_type": "analyst"}],
+        )
+        self.assertNotIn('"email"', sql)
+
+    def test_nested_serializer_fields(self):
+        data, sql = self.get(
+            "Followers:pending_received", {"fields": "id,status,follower_detail.username,follower_detail.email"}
+        )
+        follow = Follow.objects.get(status=Follow.Status.PENDING)
+        self.assertEqual(
+            data["pending_requests"],
+            [{
+                "id": str(follow.id), "status": "PENDING",
+                "follower_detail": {"username": "analyst", "email": "analyst@example.com"},
+            }],
+        )
+        # followed_detail is not rendered, so the followed user is not joined
+        self.assertEqual(sql.count("JOIN"), 1)
+        self.assertNotIn('"name"', sql)
+
+        data, _ = self.get("Followers:pending_received", {
+            "fields": "id,follower_detail", "omit": "follower_detail.email,follower_detail.profile_picture_thumbnails",
+        })
+        self.assertEqual(
+            data["pending_requests"][0]["follower_detail"],
+            {"id": str(self.analyst.id), "username": "analyst", "name": "An", "profile_picture": None,
+             "user_type": "analyst"},
+        )
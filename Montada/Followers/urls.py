@@ -18,6 +18,8 @@ urlpatterns = [
     path("analysts/", views.AnalystsListView.as_view(), name="analysts_list"),
     path("followers/", views.FollowersListView.as_view(), name="followers_list"),
     path("following/", views.FollowingListView.as_view(), name="following_list"),
+    path("followers/sync/", views.FollowersSyncView.as_view(), name="followers_sync"),
+    path("following/sync/", views.FollowingSyncView.as_view(), name="following_sync"),
     path("pending/received/", views.PendingReceivedListView.as_view(), name="pending_received"),
     path("pending/sent/", views.PendingSentListView.as_view(), name="pending_sent"),
     path("muted/", views.MutedListView.as_view(), name="muted_list"),
@@ -2,11 +2,18 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from django.db.models import Q, Count
+from django.db.models import Q, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+import uuid
 
+from Montada.cache import cache_response, SCOPE_PUBLIC, SCOPE_USER
+from Montada.fieldsets import requested_fieldset
+from Montada.sync import DeltaSyncView
+from Signals.models import ArchivedSignal, TradingSignal
 from .models import Follow, Mute
 from .serializers import (
     FollowSerializer,
@@ -20,6 +27,41 @@ from .serializers import (
 User = get_user_model()
 
 
+def parse_user_id(user_id):
+    """A user id from the query string as a UUID; Http404 when malformed"""
+    try:
+        return uuid.UUID(str(user_id))
+    except ValueError:
+        raise Http404("No User matches the given query.")
+
+
+def get_user_or_404(user_id):
+    return get_object_or_404(User, id=parse_user_id(user_id))
+
+
+def _counts_cache_tags(view, request):
+    # request.GET: the counts view is cached under both the DRF and async stacks
+    try:
+        target_id = uuid.UUID(request.GET.get("user_id") or str(request.user.pk))
+    except ValueError:
+        target_id = request.user.pk
+    return [f"follows:{target_id}", f"mutes:{target_id}"]
+
+
+def _include_status(request):
+    return request.query_params.get("include_status", "").lower() in ("1", "true", "yes")
+
+
+def _analysts_cache_scope(view, request):
+    return SCOPE_USER if _include_status(request) else SCOPE_PUBLIC
+
+
+def _analysts_cache_tags(view, request):
+    if _include_status(request):
+        return ["analysts", f"follows:{request.user.pk}"]
+    return ["analysts"]
+
+
 # ---------- Follow request / accept / reject / unfollow / block ----------
 
 
@@ -66,7 +108,7 @@ class FollowRequestView(APIView):
                 existing.accepted_at = None
                 existing.rejected_at = None
                 existing.unfollowed_at = None
-                existing.save(update_fields=["status", "is_active", "requested_at", "accepted_at", "rejected_at", "unfollowed_at"])
+                existing.save(update_fields=["status", "is_active", "requested_at", "accepted_at", "rejected_at", "unfollowed_at", "updated_at"])
                 return Response(
                     {"message": "Follow request sent.", "follow": FollowSerializer(existing).data},
                     status=status.HTTP_201_CREATED,
@@ -265,99 +307,175 @@ class UnmuteUserView(APIView):
 # ---------- Lists ----------
 
 
-class FollowersListView(APIView):
-    """List users who follow you (accepted and active)."""
+class FollowListView(APIView):
+    """
+    Base for the list endpoints: the rows of ``get_base_queryset`` rendered
+    under ``key`` with ``serializer_class``, or with ``relation`` set the
+    users on that side of each row. async_views.py lists the same querysets.
+    """
     permission_classes = [IsAuthenticated]
+    serializer_class = UserMinimalSerializer
+    key = None
+    relation = None
+
+    def get_base_queryset(self, request):
+        raise NotImplementedError
+
+    def get_list_queryset(self, request, fieldset):
+        """get_base_queryset limited to what the requested fieldset renders"""
+        serializer = self.serializer_class(**fieldset)
+        return serializer.optimize_queryset(self.get_base_queryset(request), relation=self.relation)
+
+    def get_payload(self, rows, fieldset):
+        items = [getattr(row, self.relation) for row in rows] if self.relation else rows
+        return {
+            "count": len(items),
+            self.key: self.serializer_class(items, many=True, **fieldset).data,
+        }
 
     def get(self, request):
-        qs = Follow.objects.filter(
+        fieldset = requested_fieldset(request)
+        return Response(self.get_payload(list(self.get_list_queryset(request, fieldset)), fieldset))
+
+
+class FollowersListView(FollowListView):
+    """List users who follow you (accepted and active)."""
+    key = "followers"
+    relation = "follower"
+
+    def get_base_queryset(self, request):
+        return Follow.objects.filter(
             followed=request.user,
             status=Follow.Status.ACCEPTED,
             is_active=True,
         ).select_related("follower").order_by("-accepted_at")
-        users = [f.follower for f in qs]
-        return Response({
-            "count": len(users),
-            "followers": UserMinimalSerializer(users, many=True).data,
-        })
 
 
-class FollowingListView(APIView):
+class FollowingListView(FollowListView):
     """List users you follow (accepted and active)."""
-    permission_classes = [IsAuthenticated]
+    key = "following"
+    relation = "followed"
 
-    def get(self, request):
-        qs = Follow.objects.filter(
+    def get_base_queryset(self, request):
+        return Follow.objects.filter(
             follower=request.user,
             status=Follow.Status.ACCEPTED,
             is_active=True,
         ).select_related("followed").order_by("-accepted_at")
-        users = [f.followed for f in qs]
-        return Response({
-            "count": len(users),
-            "following": UserMinimalSerializer(users, many=True).data,
-        })
 
 
-class PendingReceivedListView(APIView):
+class FollowListSyncView(DeltaSyncView):
+    """
+    Delta sync base for the followers / following lists (see Montada/sync.py).
+    Rows are users: those whose follow or profile changed since the token,
+    and the ids of those who left the list (unfollow, block).
+    """
+    own_side = None
+    other_side = None
+
+    def get_delta(self, request, since):
+        fieldset = requested_fieldset(request)
+        rows = Follow.objects.filter(**{self.own_side: request.user})
+        listed = Q(status=Follow.Status.ACCEPTED, is_active=True)
+        qs = rows.filter(listed)
+        removed = []
+        if since is not None:
+            qs = qs.filter(Q(updated_at__gt=since) | Q(**{f"{self.other_side}__updated_at__gt": since}))
+            removed = list(
+                rows.filter(updated_at__gt=since).exclude(listed).values_list(f"{self.other_side}_id", flat=True)
+            )
+        qs = qs.select_related(self.other_side).order_by("-accepted_at")
+        qs = UserMinimalSerializer(**fieldset).optimize_queryset(qs, relation=self.other_side)
+        users = [getattr(f, self.other_side) for f in qs]
+        return UserMinimalSerializer(users, many=True, **fieldset).data, removed
+
+
+class FollowersSyncView(FollowListSyncView):
+    """Delta sync for followers/."""
+    scope = "followers"
+    own_side = "followed"
+    other_side = "follower"
+
+
+class FollowingSyncView(FollowListSyncView):
+    """Delta sync for following/."""
+    scope = "following"
+    own_side = "follower"
+    other_side = "followed"
+
+
+class PendingReceivedListView(FollowListView):
     """List pending follow requests you received."""
-    permission_classes = [IsAuthenticated]
+    serializer_class = FollowSerializer
+    key = "pending_requests"
 
-    def get(self, request):
-        qs = Follow.objects.filter(
+    def get_base_queryset(self, request):
+        return Follow.objects.filter(
             followed=request.user,
             status=Follow.Status.PENDING,
-        ).select_related("follower").order_by("-requested_at")
-        return Response({
-            "count": qs.count(),
-            "pending_requests": FollowSerializer(qs, many=True).data,
-        })
+        ).select_related("follower", "followed").order_by("-requested_at")
 
 
-class PendingSentListView(APIView):
+class PendingSentListView(FollowListView):
     """List pending follow requests you sent."""
-    permission_classes = [IsAuthenticated]
+    serializer_class = FollowSerializer
+    key = "pending_sent"
 
-    def get(self, request):
-        qs = Follow.objects.filter(
+    def get_base_queryset(self, request):
+        return Follow.objects.filter(
             follower=request.user,
             status=Follow.Status.PENDING,
-        ).select_related("followed").order_by("-requested_at")
-        return Response({
-            "count": qs.count(),
-            "pending_sent": FollowSerializer(qs, many=True).data,
-        })
+        ).select_related("follower", "followed").order_by("-requested_at")
 
 
-class MutedListView(APIView):
+class MutedListView(FollowListView):
     """List users you have muted."""
-    permission_classes = [IsAuthenticated]
+    key = "muted"
+    relation = "muted"
 
-    def get(self, request):
-        qs = Mute.objects.filter(muter=request.user).select_related("muted").order_by("-muted_at")
-        users = [m.muted for m in qs]
-        return Response({
-            "count": len(users),
-            "muted": UserMinimalSerializer(users, many=True).data,
-        })
+    def get_base_queryset(self, request):
+        return Mute.objects.filter(muter=request.user).select_related("muted").order_by("-muted_at")
 
 
 class AnalystsListView(APIView):
     """List analysts for traders. Query params: search (optional), include_status (optional, 1 to add follow status per analyst). Includes followers_count and signals_count per analyst."""
     permission_classes = [IsAuthenticated]
 
+    @cache_response(timeout=60, scope=_analysts_cache_scope, tags=_analysts_cache_tags)
     def get(self, request):
+        # Correlated subqueries rather than two Count() joins: joining both
+        # relations multiplies followers by signals per analyst
+        followers_count = (
+            Follow.objects.filter(
+                followed=OuterRef("pk"),
+                status=Follow.Status.ACCEPTED,
+                is_active=True,
+            )
+            .order_by()
+            .values("followed")
+            .annotate(c=Count("*"))
+            .values("c")
+        )
+        signals_count = (
+            TradingSignal.objects.filter(analyst=OuterRef("pk"))
+            .order_by()
+            .values("analyst")
+            .annotate(c=Count("*"))
+            .values("c")
+        )
+        archived_signals_count = (
+            ArchivedSignal.objects.filter(analyst=OuterRef("pk"))
+            .order_by()
+            .values("analyst")
+            .annotate(c=Count("*"))
+            .values("c")
+        )
         qs = (
             User.objects.filter(user_type="analyst", is_active=True)
             .annotate(
-                followers_count=Count(
-                    "received_follow_requests",
-                    filter=Q(
-                        received_follow_requests__status=Follow.Status.ACCEPTED,
-                        received_follow_requests__is_active=True,
-                    ),
-                ),
-                signals_count=Count("posted_signals"),
+                followers_count=Coalesce(Subquery(followers_count), 0),
+                signals_count=Coalesce(Subquery(signals_count), 0)
+                + Coalesce(Subquery(archived_signals_count), 0),
             )
             .order_by("-date_joined")
         )
@@ -368,9 +486,11 @@ class AnalystsListView(APIView):
                 | Q(email__icontains=search)
                 | Q(username__icontains=search)
             )
+        fieldset = requested_fieldset(request)
+        qs = UserMinimalSerializer(**fieldset).optimize_queryset(qs)
         analysts = list(qs[:200])
-        include_status = request.query_params.get("include_status", "").lower() in ("1", "true", "yes")
-        data = UserMinimalSerializer(analysts, many=True).data
+        include_status = _include_status(request)
+        data = UserMinimalSerializer(analysts, many=True, **fieldset).data
         for i, user in enumerate(analysts):
             data[i]["followers_count"] = getattr(user, "followers_count", 0)
             data[i]["signals_count"] = getattr(user, "signals_count", 0)
@@ -410,41 +530,29 @@ class CountsView(APIView):
     """Get followers/following/pending/muted counts. Optional: ?user_id=<uuid> for another user's counts."""
     permission_classes = [IsAuthenticated]
 
+    @staticmethod
+    def get_counts_queryset(target):
+        """Follow counts of both directions in one aggregate, instead of four COUNT queries"""
+        return Follow.objects.filter(Q(followed=target) | Q(follower=target)), {
+            "followers_count": Count("id", filter=Q(
+                followed=target, status=Follow.Status.ACCEPTED, is_active=True,
+            )),
+            "following_count": Count("id", filter=Q(
+                follower=target, status=Follow.Status.ACCEPTED, is_active=True,
+            )),
+            "pending_received_count": Count("id", filter=Q(followed=target, status=Follow.Status.PENDING)),
+            "pending_sent_count": Count("id", filter=Q(follower=target, status=Follow.Status.PENDING)),
+        }
+
+    @cache_response(timeout=60, tags=_counts_cache_tags)
     def get(self, request):
         user_id = request.query_params.get("user_id")
-        if user_id:
-            user = get_object_or_404(User, id=user_id)
-            target = user
-        else:
-            target = request.user
+        target = get_user_or_404(user_id) if user_id else request.user
 
-        followers_count = Follow.objects.filter(
-            followed=target,
-            status=Follow.Status.ACCEPTED,
-            is_active=True,
-        ).count()
-        following_count = Follow.objects.filter(
-            follower=target,
-            status=Follow.Status.ACCEPTED,
-            is_active=True,
-        ).count()
-        pending_received_count = Follow.objects.filter(
-            followed=target,
-            status=Follow.Status.PENDING,
-        ).count()
-        pending_sent_count = Follow.objects.filter(
-            follower=target,
-            status=Follow.Status.PENDING,
-        ).count()
-        muted_count = Mute.objects.filter(muter=target).count() if target == request.user else 0
-
-        return Response({
-            "followers_count": followers_count,
-            "following_count": following_count,
-            "pending_received_count": pending_received_count,
-            "pending_sent_count": pending_sent_count,
-            "muted_count": muted_count,
-        })
+        qs, counts = self.get_counts_queryset(target)
+        counts = qs.aggregate(**counts)
+        counts["muted_count"] = Mute.objects.filter(muter=target).count() if target == request.user else 0
+        return Response(counts)
 
 
 # ---------- Status for a user ----------
@@ -454,30 +562,24 @@ class FollowStatusView(APIView):
     """Get follow/mute status with respect to a user. Query: ?user_id=<uuid>"""
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        user_id = request.query_params.get("user_id")
-        if not user_id:
-            return Response(
-                {"error": "user_id is required."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        target = get_object_or_404(User, id=user_id)
+    @staticmethod
+    def get_follows_queryset(user, target):
+        """The follows between two users, both directions in one query"""
+        return Follow.objects.filter(
+            Q(follower=user, followed=target) | Q(follower=target, followed=user)
+        )
 
-        follow_sent = Follow.objects.filter(
-            follower=request.user,
-            followed=target,
-        ).first()
-        follow_received = Follow.objects.filter(
-            follower=target,
-            followed=request.user,
-        ).first()
+    @staticmethod
+    def get_payload(user, target, follows, is_muted):
+        follows = {(f.follower_id, f.followed_id): f for f in follows}
+        follow_sent = follows.get((user.pk, target.pk))
+        follow_received = follows.get((target.pk, user.pk))
 
         is_following = False
         is_pending_sent = False
         is_pending_received = False
         is_blocked_by_me = False
         is_blocked_by_them = False
-        is_muted = False
 
         if follow_sent:
             if follow_sent.status == Follow.Status.ACCEPTED and follow_sent.is_active:
@@ -492,9 +594,7 @@ class FollowStatusView(APIView):
             elif follow_received.status == Follow.Status.BLOCKED:
                 is_blocked_by_me = True
 
-        is_muted = Mute.objects.filter(muter=request.user, muted=target).exists()
-
-        return Response({
+        return {
             "user_id": str(target.id),
             "is_following": is_following,
             "is_pending_sent": is_pending_sent,
@@ -502,4 +602,17 @@ class FollowStatusView(APIView):
             "is_blocked_by_me": is_blocked_by_me,
             "is_blocked_by_them": is_blocked_by_them,
             "is_muted": is_muted,
-        })
+        }
+
+    def get(self, request):
+        user_id = request.query_params.get("user_id")
+        if not user_id:
+            return Response(
+                {"error": "user_id is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        target = get_user_or_404(user_id)
+
+        follows = list(self.get_follows_queryset(request.user, target))
+        is_muted = Mute.objects.filter(muter=request.user, muted=target).exists()
+        return Response(self.get_payload(request.user, target, follows, is_muted))
@@ -0,0 +1,132 @@
+"""
+Async versions of the OTP sender endpoints, routed by Montada/asgi_urls.py
+when the app is served through Montada/asgi.py. They issue OTPs and build
+emails with the same model methods and helpers as the DRF views in
+views.py, and answer with the same bodies. The SMTP conversation runs
+on a dedicated pool of ASYNC_EMAIL_WORKERS threads, so a slow mail server
+holds neither the event loop nor the request's database thread.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import send_mail
+from rest_framework import serializers, status
+
+from Montada.async_views import AsyncAPIView
+from .models import PasswordResetOTP, EmailVerificationOTP
+from .serializers import ForgotPasswordSerializer
+from .otp_emails import (
+    password_reset_otp_email,
+    password_reset_otp_resend_email,
+    verification_otp_resend_email,
+)
+
+User = get_user_model()
+
+_email_executor = None
+
+
+def _get_email_executor():
+    global _email_executor
+    if _email_executor is None:
+        _email_executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'ASYNC_EMAIL_WORKERS', 32),
+            thread_name_prefix='otp-email',
+        )
+    return _email_executor
+
+
+async def asend_mail(**kwargs):
+    return await sync_to_async(send_mail, thread_sensitive=False, executor=_get_email_executor())(**kwargs)
+
+
+class ForgotPasswordView(AsyncAPIView):
+    """
+    API endpoint for forgot password - sends OTP to user's email
+    """
+    authentication_required = False
+
+    async def post(self, request):
+        try:
+            email = ForgotPasswordSerializer().fields['email'].run_validation(
+                request.data.get('email', serializers.empty)
+            )
+        except serializers.ValidationError as exc:
+            return {'email': exc.detail}, status.HTTP_400_BAD_REQUEST
+
+        # One lookup covers ForgotPasswordSerializer.validate_email and the
+        # existence check of the sync view
+        user = await User.objects.filter(email=email).afirst()
+        if user is None:
+            return {
+                'message': 'User email not exists. Please register with the email provided!'
+            }, status.HTTP_400_BAD_REQUEST
+        if not user.is_active:
+            return {'email': ['User account is disabled.']}, status.HTTP_400_BAD_REQUEST
+
+        otp = await PasswordResetOTP.aissue(email)
+
+        try:
+            await asend_mail(**password_reset_otp_email(email, otp), fail_silently=False)
+        except Exception:
+            return {
+                'error': 'Failed to send email. Please try again later.'
+            }, status.HTTP_500_INTERNAL_SERVER_ERROR
+        return {'message': 'OTP has been sent to your email address.'}
+
+
+class ResendVerificationOTPView(AsyncAPIView):
+    """
+    API endpoint for resending email verification OTP
+    """
+    authentication_required = False
+
+    async def post(self, request):
+        email = request.data.get('email')
+        if not email:
+            return {'error': 'Email is required.'}, status.HTTP_400_BAD_REQUEST
+
+        user = await User.objects.filter(email=email).afirst()
+        if user is None:
+            return {'error': 'User with this email does not exist.'}, status.HTTP_404_NOT_FOUND
+        if user.is_verified:
+            return {'message': 'Email is already verified.'}
+
+        otp = await EmailVerificationOTP.aissue(user.email)
+
+        try:
+            await asend_mail(**verification_otp_resend_email(user, otp), fail_silently=False)
+        except Exception:
+            return {
+                'error': 'Failed to send email. Please try again later.'
+            }, status.HTTP_500_INTERNAL_SERVER_ERROR
+        return {'message': 'Verification OTP has been sent to your email address.'}
+
+
+class ResendPasswordResetOTPView(AsyncAPIView):
+    """
+    API endpoint for resending password reset OTP
+    """
+    authentication_required = False
+
+    async def post(self, request):
+        email = request.data.get('email')
+        if not email:
+            return {'error': 'Email is required.'}, status.HTTP_400_BAD_REQUEST
+
+        user = await User.objects.filter(email=email).afirst()
+        if user is None:
+            # Same answer as for an existing account (security best practice)
+            return {'message': 'If an account exists with this email, an OTP has been sent.'}
+
+        otp = await PasswordResetOTP.aissue(email)
+
+        try:
+            await asend_mail(**password_reset_otp_resend_email(user, email, otp), fail_silently=False)
+        except Exception:
+            return {
+                'error': 'Failed to send email. Please try again later.'
+            }, status.HTTP_500_INTERNAL_SERVER_ERROR
+        return {'message': 'Password reset OTP has been sent to your email address.'}
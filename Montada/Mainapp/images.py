@@ -0,0 +1,157 @@
+"""
+Profile picture processing pipeline.
+
+Uploads are stored as-is by ``UserProfileView``; this module turns them into
+small, metadata-free square thumbnails that list endpoints can serve instead
+of the original photo. Decoding and resizing run in a background worker after
+the request's transaction commits, so the upload request never pays for it.
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+from Montada.cache import invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THUMBNAIL_SIZES = (64, 160, 480)
+THUMBNAIL_DIR = 'profile_pictures/thumbs/'
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 82, 'method': 4},
+    'JPEG': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+_executor = None
+
+
+def get_thumbnail_sizes():
+    return tuple(getattr(settings, 'PROFILE_PICTURE_THUMBNAIL_SIZES', DEFAULT_THUMBNAIL_SIZES))
+
+
+def get_thumbnail_format():
+    """WebP when Pillow was built with it, JPEG otherwise"""
+    if features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'PROFILE_PICTURE_WORKERS', 2),
+            thread_name_prefix='profile-picture',
+        )
+    return _executor
+
+
+def render_thumbnails(data, sizes=None):
+    """
+    Decode image bytes once and render one square thumbnail per size.
+    Returns a list of (size, encoded_bytes). EXIF/ICC/XMP metadata is not
+    carried over; EXIF orientation is applied before it is dropped.
+    """
+    sizes = sorted(sizes or get_thumbnail_sizes())
+    image_format, _ = get_thumbnail_format()
+
+    with Image.open(BytesIO(data)) as image:
+        # Let the JPEG decoder downscale by a power of two while decoding;
+        # a 12MP phone photo never needs to be fully materialised
+        image.draft('RGB', (sizes[-1] * 2, sizes[-1] * 2))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        rendered = []
+        # Largest first, each subsequent size is derived from the previous one
+        source = image
+        for size in reversed(sizes):
+            thumb = ImageOps.fit(source, (size, size), Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            thumb.save(buffer, format=image_format, **SAVE_OPTIONS[image_format])
+            rendered.append((size, buffer.getvalue()))
+            source = thumb
+    return sorted(rendered)
+
+
+def thumbnail_name(digest, size):
+    _, extension = get_thumbnail_format()
+    return f'{THUMBNAIL_DIR}{digest}_{size}.{extension}'
+
+
+def process_profile_picture(user_id):
+    """
+    Generate thumbnails for a user's current profile picture and record them.
+    Thumbnails are stored under content-hash names, so re-uploading the same
+    photo (or reprocessing) reuses the files already in storage.
+    """
+    from .models import User
+
+    user = User.objects.filter(pk=user_id).only('id', 'profile_picture').first()
+    if not user or not user.profile_picture:
+        return None
+
+    source_name = user.profile_picture.name
+    try:
+        with user.profile_picture.open('rb') as f:
+            data = f.read()
+    except OSError:
+        logger.warning('Profile picture %s for user %s is missing from storage', source_name, user_id)
+        return None
+
+    digest = hashlib.sha256(data).hexdigest()
+    sizes = get_thumbnail_sizes()
+    names = {str(size): thumbnail_name(digest, size) for size in sizes}
+
+    if not all(default_storage.exists(name) for name in names.values()):
+        try:
+            rendered = render_thumbnails(data, sizes)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning('Could not decode profile picture %s for user %s', source_name, user_id)
+            return None
+        for size, content in rendered:
+            name = names[str(size)]
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(content))
+
+    # Only record the thumbnails if the picture was not replaced meanwhile
+    updated = User.objects.filter(pk=user_id, profile_picture=source_name).update(
+        profile_picture_thumbnails=names
+    )
+    if updated:
+        # update() sends no post_save; drop cached profile/analyst responses
+        invalidate_tags(f'user:{user_id}', 'analysts')
+    return names
+
+
+def _run_in_worker(user_id):
+    close_old_connections()
+    try:
+        process_profile_picture(user_id)
+    except Exception:
+        logger.exception('Profile picture processing failed for user %s', user_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_profile_picture_processing(user):
+    """
+    Queue thumbnail generation for ``user`` once the current transaction
+    commits. Set PROFILE_PICTURE_PROCESS_ASYNC = False to run it inline.
+    """
+    user_id = user.pk
+
+    def submit():
+        if getattr(settings, 'PROFILE_PICTURE_PROCESS_ASYNC', True):
+            _get_executor().submit(_run_in_worker, user_id)
+        else:
+            process_profile_picture(user_id)
+
+    transaction.on_commit(submit)
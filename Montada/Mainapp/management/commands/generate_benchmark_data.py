@@ -0,0 +1,363 @@
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from Followers.models import Follow, Mute
+from Montada.ids import uuid7
+from Notifications.models import Notification, NotificationCounter
+from Signals.candles import Candles, CandleStore
+from Signals.models import (
+    AssetClass, Instrument, InstrumentActivityBucket, SignalConsensus, SignalEvent, Timeframe, TradingSignal,
+)
+from Subscriptions.models import Subscription
+
+User = get_user_model()
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+CATALOG = {
+    'Forex': [('EUR/USD', 1.08), ('GBP/USD', 1.27), ('USD/JPY', 151.2), ('AUD/USD', 0.66), ('USD/CHF', 0.88)],
+    'Commodities': [('XAU/USD', 2350.0), ('XAG/USD', 28.4), ('CL', 78.5)],
+    'Indices': [('NAS100', 18200.0), ('US30', 39100.0), ('SPX500', 5200.0)],
+    'Crypto': [('BTC/USD', 64000.0), ('ETH/USD', 3100.0), ('SOL/USD', 150.0)],
+}
+
+TIMEFRAMES = [
+    ('M1', '1 Minute'), ('M5', '5 Minutes'), ('M15', '15 Minutes'), ('M30', '30 Minutes'),
+    ('H1', '1 Hour'), ('H4', '4 Hours'), ('D1', '1 Day'),
+]
+
+
+@contextmanager
+def explicit_timestamps(model, *field_names):
+    """
+    Let bulk_create keep the timestamps we generate instead of auto_now(_add)
+    overwriting them, so the data spreads over a realistic time window.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic users, analysts, trading signals (with their event log), follow/mute graphs, '
+        'notification inboxes and candles for benchmarking. Never run against production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--traders', type=int, default=20000)
+        parser.add_argument('--analysts', type=int, default=500)
+        parser.add_argument('--signals', type=int, default=1000000)
+        parser.add_argument('--follows-per-trader', type=int, default=25)
+        parser.add_argument('--mutes-per-trader', type=int, default=2)
+        parser.add_argument('--notifications-per-trader', type=int, default=20)
+        parser.add_argument(
+            '--candle-days', type=int, default=None, help='Days of M1 candles per instrument (default: --days)'
+        )
+        parser.add_argument('--days', type=int, default=90, help='Spread signals over this many days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        instruments, timeframes = self.create_catalog()
+        password = make_password(BENCHMARK_PASSWORD)
+        analyst_ids = self.create_users('analyst', options['analysts'], password, options['days'])
+        trader_ids = self.create_users('trader', options['traders'], password, options['days'])
+        self.create_subscriptions(trader_ids)
+        self.create_follow_graph(trader_ids, analyst_ids, options['follows_per_trader'], options['mutes_per_trader'])
+        self.create_signals(analyst_ids, instruments, timeframes, options['signals'], options['days'])
+        self.create_candles(instruments, options['candle_days'] or options['days'])
+        self.create_signal_events()
+        self.create_activity_buckets()
+        self.log('Computing signal consensus...')
+        SignalConsensus.recompute(batch_size=self.batch_size)
+        self.create_notifications(trader_ids, analyst_ids, options['notifications_per_trader'])
+
+        self.stdout.write(self.style.SUCCESS('Benchmark data generated.'))
+
+    def log(self, message):
+        self.stdout.write(message)
+
+    def bulk_insert(self, model, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                with transaction.atomic():
+                    model.objects.bulk_create(batch, batch_size=self.batch_size)
+                batch = []
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+
+    def create_catalog(self):
+        instruments = []
+        for asset_name, symbols in CATALOG.items():
+            asset_class, _ = AssetClass.objects.get_or_create(name=asset_name)
+            for symbol, price in symbols:
+                instrument, _ = Instrument.objects.get_or_create(asset_class=asset_class, symbol=symbol)
+                instruments.append((asset_class.id, instrument.id, price))
+        timeframes = []
+        for code, name in TIMEFRAMES:
+            timeframe, _ = Timeframe.objects.get_or_create(code=code, defaults={'name': name})
+            timeframes.append(timeframe.id)
+        return instruments, timeframes
+
+    def create_users(self, user_type, count, password, days):
+        self.log(f'Creating {count} {user_type}s...')
+        run = uuid.uuid4().hex[:8]
+        ids = [uuid7() for _ in range(count)]
+
+        def rows():
+            for index, user_id in enumerate(ids):
+                joined = self.now - timedelta(seconds=self.rng.randint(0, days * 86400))
+                email = f'{user_type}{index}.{run}@bench.montada.local'
+                yield User(
+                    id=user_id,
+                    username=email,
+                    email=email,
+                    password=password,
+                    name=f'Bench {user_type.title()} {index}',
+                    user_type=user_type,
+                    is_verified=True,
+                    is_subscribed=user_type == 'trader',
+                    date_joined=joined,
+                    created_at=joined,
+                    updated_at=joined,
+                )
+
+        with explicit_timestamps(User, 'created_at', 'updated_at'):
+            self.bulk_insert(User, rows())
+        return ids
+
+    def create_subscriptions(self, trader_ids):
+        self.log(f'Creating {len(trader_ids)} subscriptions...')
+
+        def rows():
+            for trader_id in trader_ids:
+                yield Subscription(
+                    user_id=trader_id,
+                    plan_type='monthly',
+                    status='active',
+                    end_date=self.now + timedelta(days=self.rng.randint(1, 30)),
+                    is_trial=False,
+                )
+
+        self.bulk_insert(Subscription, rows())
+
+    def create_follow_graph(self, trader_ids, analyst_ids, follows_per_trader, mutes_per_trader):
+        follows_per_trader = min(follows_per_trader, len(analyst_ids))
+        self.log(f'Creating ~{len(trader_ids) * follows_per_trader} follows...')
+        # Skewed popularity: a few analysts collect most of the followers
+        cum_weights = list(accumulate(1.0 / (rank + 1) for rank in range(len(analyst_ids))))
+
+        def pick(count):
+            chosen = set()
+            while len(chosen) < count:
+                chosen.update(self.rng.choices(analyst_ids, cum_weights=cum_weights, k=count - len(chosen)))
+            return chosen
+
+        mutes = []
+
+        def follow_rows():
+            for trader_id in trader_ids:
+                followed = pick(follows_per_trader)
+                for analyst_id in followed:
+                    accepted_at = self.now - timedelta(seconds=self.rng.randint(0, 30 * 86400))
+                    pending = self.rng.random() < 0.05
+                    yield Follow(
+                        follower_id=trader_id,
+                        followed_id=analyst_id,
+                        status=Follow.Status.PENDING if pending else Follow.Status.ACCEPTED,
+                        is_active=not pending,
+                        requested_at=accepted_at,
+                        accepted_at=None if pending else accepted_at,
+                    )
+                for analyst_id in self.rng.sample(sorted(followed), min(mutes_per_trader, len(followed))):
+                    mutes.append(Mute(muter_id=trader_id, muted_id=analyst_id))
+
+        with explicit_timestamps(Follow, 'requested_at'):
+            self.bulk_insert(Follow, follow_rows())
+        self.log(f'Creating {len(mutes)} mutes...')
+        self.bulk_insert(Mute, mutes)
+
+    def create_signals(self, analyst_ids, instruments, timeframes, count, days):
+        self.log(f'Creating {count} trading signals...')
+        window = days * 86400
+        statuses = [TradingSignal.Status.OPEN] * 5 + [TradingSignal.Status.CLOSED] * 4 + [TradingSignal.Status.DRAFT]
+
+        def rows():
+            for index in range(count):
+                asset_class_id, instrument_id, price = self.rng.choice(instruments)
+                direction = self.rng.choice((TradingSignal.Direction.BUY, TradingSignal.Direction.SELL))
+                entry = price * (1 + self.rng.uniform(-0.02, 0.02))
+                risk = entry * self.rng.uniform(0.002, 0.02)
+                reward = risk * self.rng.uniform(1.0, 3.0)
+                sign = 1 if direction == TradingSignal.Direction.BUY else -1
+                created = self.now - timedelta(seconds=self.rng.randint(0, window))
+                yield TradingSignal(
+                    analyst_id=self.rng.choice(analyst_ids),
+                    asset_class_id=asset_class_id,
+                    instrument_id=instrument_id,
+                    timeframe_id=self.rng.choice(timeframes),
+                    direction=direction,
+                    entry_price=Decimal(f'{entry:.5f}'),
+                    stop_loss=Decimal(f'{entry - sign * risk:.5f}'),
+                    take_profit=Decimal(f'{entry + sign * reward:.5f}'),
+                    confidence_level=self.rng.randint(40, 95),
+                    analyst_note='Synthetic benchmark signal' if index % 3 == 0 else None,
+                    status=self.rng.choice(statuses),
+                    deleted_at=created + timedelta(hours=1) if self.rng.random() < 0.03 else None,
+                    created_at=created,
+                    updated_at=created,
+                )
+                if index and index % 100000 == 0:
+                    self.log(f'  {index} signals...')
+
+        with explicit_timestamps(TradingSignal, 'created_at', 'updated_at'):
+            self.bulk_insert(TradingSignal, rows())
+
+    def create_candles(self, instruments, days):
+        """
+        M1 candles up to now in CANDLE_STORE_ROOT: a random walk around each
+        instrument's price, pulled back to its trailing daily mean so it stays
+        within the range the signals' prices were drawn from
+        """
+        count = days * 1440
+        self.log(f'Creating {count} M1 candles for each of {len(instruments)} instruments...')
+        rng = np.random.default_rng(self.rng.getrandbits(32))
+        end = int(self.now.timestamp()) // 60 * 60
+        time = np.arange(end - count * 60, end, 60, dtype=np.int64)
+        store = CandleStore()
+        window = 1440
+        for _, instrument_id, price in instruments:
+            walk = np.cumsum(rng.normal(0, 0.0005, count))
+            sums = np.r_[0.0, np.cumsum(walk)]
+            index = np.arange(count)
+            lo = np.maximum(index + 1 - window, 0)
+            close = price * np.exp(walk - (sums[index + 1] - sums[lo]) / (index + 1 - lo))
+            open_ = np.r_[close[0], close[:-1]]
+            wick = np.abs(rng.normal(0, 0.0002, count)) * close
+            store.series(instrument_id, 'M1').append(Candles(
+                time, open_, np.maximum(open_, close) + wick, np.minimum(open_, close) - wick, close,
+                rng.integers(1, 100, count).astype(np.float64),
+            ))
+
+    def create_signal_events(self):
+        """The event log the signal views would have written: CREATED, then DELETED for soft-deleted signals"""
+        self.log('Creating signal events...')
+
+        def rows():
+            signals = TradingSignal.objects.order_by('created_at').iterator(chunk_size=self.batch_size)
+            for signal in signals:
+                deleted_at, signal.deleted_at = signal.deleted_at, None
+                yield SignalEvent(
+                    signal_id=signal.pk,
+                    analyst_id=signal.analyst_id,
+                    event_type=SignalEvent.EventType.CREATED,
+                    status=signal.status,
+                    changes=SignalEvent.state_of(signal),
+                    created_at=signal.created_at,
+                )
+                if deleted_at is not None:
+                    yield SignalEvent(
+                        signal_id=signal.pk,
+                        analyst_id=signal.analyst_id,
+                        event_type=SignalEvent.EventType.DELETED,
+                        status=signal.status,
+                        changes={'deleted_at': deleted_at},
+                        created_at=deleted_at,
+                    )
+
+        self.bulk_insert(SignalEvent, rows())
+
+    def create_activity_buckets(self):
+        """The trending buckets record_signal would have kept for the signals still in a window"""
+        self.log('Creating instrument activity buckets...')
+        # Followers reached per analyst: accepted, active followers minus mutes (mutes are of followed analysts)
+        accepted = Q(received_follow_requests__status=Follow.Status.ACCEPTED, received_follow_requests__is_active=True)
+        reached = dict(
+            User.objects.filter(user_type='analyst')
+            .annotate(reached=Count('received_follow_requests', filter=accepted))
+            .values_list('id', 'reached')
+        )
+        muted = dict(
+            Mute.objects.order_by().values('muted_id').annotate(count=Count('id')).values_list('muted_id', 'count')
+        )
+        kept = InstrumentActivityBucket.resolutions()
+        buckets = {}
+        signals = TradingSignal.active.filter(
+            created_at__gte=self.now - max(kept.values()),
+        ).exclude(status=TradingSignal.Status.DRAFT).values_list('instrument_id', 'analyst_id', 'created_at')
+        for instrument_id, analyst_id, created in signals.iterator(chunk_size=self.batch_size):
+            followers = max(reached.get(analyst_id, 0) - muted.get(analyst_id, 0), 0)
+            for resolution, length in kept.items():
+                if created < self.now - length:
+                    continue
+                key = (instrument_id, resolution, InstrumentActivityBucket.bucket_for(created, resolution))
+                counts = buckets.setdefault(key, [0, 0])
+                counts[0] += 1
+                counts[1] += followers
+        self.bulk_insert(InstrumentActivityBucket, (
+            InstrumentActivityBucket(
+                instrument_id=instrument_id, resolution=resolution, bucket_start=start,
+                signals=count, followers_reached=followers,
+            )
+            for (instrument_id, resolution, start), (count, followers) in buckets.items()
+        ))
+
+    def create_notifications(self, trader_ids, analyst_ids, per_trader):
+        """Inboxes of NEW_SIGNAL notifications from the last 30 days, about a third unread"""
+        self.log(f'Creating {len(trader_ids) * per_trader} notifications...')
+        symbols = [symbol for symbols in CATALOG.values() for symbol, _ in symbols]
+        unread = {}
+
+        def rows():
+            for trader_id in trader_ids:
+                # Ids are time-ordered, so generate each inbox oldest first
+                times = sorted(self.now - timedelta(seconds=self.rng.randint(0, 30 * 86400)) for _ in range(per_trader))
+                for created in times:
+                    is_read = self.rng.random() < 0.7
+                    if not is_read:
+                        unread[trader_id] = unread.get(trader_id, 0) + 1
+                    yield Notification(
+                        id=uuid7(),
+                        recipient_id=trader_id,
+                        kind=Notification.Kind.NEW_SIGNAL,
+                        actor_id=self.rng.choice(analyst_ids),
+                        data={
+                            'signal_id': str(uuid.uuid4()),
+                            'instrument': self.rng.choice(symbols),
+                            'direction': self.rng.choice((TradingSignal.Direction.BUY, TradingSignal.Direction.SELL)),
+                        },
+                        is_read=is_read,
+                        read_at=created + timedelta(hours=1) if is_read else None,
+                        created_at=created,
+                    )
+
+        self.bulk_insert(Notification, rows())
+        self.bulk_insert(NotificationCounter, (
+            NotificationCounter(user_id=user_id, unread=count) for user_id, count in unread.items()
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+
+from Mainapp.images import process_profile_picture
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails for profile pictures that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Reprocess every profile picture, not only the missing ones',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        if not options['all']:
+            users = users.filter(profile_picture_thumbnails={})
+
+        processed = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            if process_profile_picture(user_id):
+                processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} profile picture(s).'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mainapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_thumbnails',
+            field=models.JSONField(blank=True, default=dict, help_text='Storage names of the generated thumbnails, keyed by size in pixels'),
+        ),
+    ]
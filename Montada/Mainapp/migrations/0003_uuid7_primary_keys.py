@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-19 07:28
+
+import Montada.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mainapp', '0002_user_profile_picture_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailverificationotp',
+            name='id',
+            field=models.UUIDField(default=Montada.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='passwordresetotp',
+            name='id',
+            field=models.UUIDField(default=Montada.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=Montada.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
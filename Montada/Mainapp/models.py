@@ -4,14 +4,15 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from datetime import timedelta
 import random
-import uuid
+
+from Montada.ids import uuid7
 
 
 class User(AbstractUser):
     """
     Custom User model extending Django's AbstractUser
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     
     USER_TYPE_CHOICES = [
         ('trader', 'Trader'),
@@ -22,6 +23,11 @@ class User(AbstractUser):
     name = models.CharField(_('full name'), max_length=255, blank=True, null=True)
     phone_number = models.CharField(max_length=15, blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    profile_picture_thumbnails = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Storage names of the generated thumbnails, keyed by size in pixels'
+    )
     date_of_birth = models.DateField(blank=True, null=True)
     user_type = models.CharField(
         max_length=10,
@@ -53,7 +59,7 @@ class PasswordResetOTP(models.Model):
     """
     Model to store OTP codes for password reset
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField()
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -72,6 +78,22 @@ class PasswordResetOTP(models.Model):
         """Generate a 6-digit OTP"""
         return str(random.randint(100000, 999999))
     
+    @classmethod
+    def issue(cls, email):
+        """Invalidate the email's unused OTPs and create a new one; returns its code"""
+        otp = cls.generate_otp()
+        cls.objects.filter(email=email, is_used=False).update(is_used=True)
+        cls.objects.create(email=email, otp=otp)
+        return otp
+    
+    @classmethod
+    async def aissue(cls, email):
+        """``issue`` through the async ORM"""
+        otp = cls.generate_otp()
+        await cls.objects.filter(email=email, is_used=False).aupdate(is_used=True)
+        await cls.objects.acreate(email=email, otp=otp)
+        return otp
+    
     def is_expired(self, expiry_minutes=10):
         """Check if OTP has expired (default 10 minutes)"""
         expiry_time = self.created_at + timedelta(minutes=expiry_minutes)
@@ -86,7 +108,7 @@ class EmailVerificationOTP(models.Model):
     """
     Model to store OTP codes for email verification
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField()
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -105,6 +127,22 @@ class EmailVerificationOTP(models.Model):
         """Generate a 6-digit OTP"""
         return str(random.randint(100000, 999999))
     
+    @classmethod
+    def issue(cls, email):
+        """Invalidate the email's unused OTPs and create a new one; returns its code"""
+        otp = cls.generate_otp()
+        cls.objects.filter(email=email, is_used=False).update(is_used=True)
+        cls.objects.create(email=email, otp=otp)
+        return otp
+    
+    @classmethod
+    async def aissue(cls, email):
+        """``issue`` through the async ORM"""
+        otp = cls.generate_otp()
+        await cls.objects.filter(email=email, is_used=False).aupdate(is_used=True)
+        await cls.objects.acreate(email=email, otp=otp)
+        return otp
+    
     def is_expired(self, expiry_minutes=10):
         """Check if OTP has expired (default 10 minutes)"""
         expiry_time = self.created_at + timedelta(minutes=expiry_minutes)
@@ -0,0 +1,74 @@
+"""
+OTP emails sent by the sync views in views.py and their async versions in
+async_views.py, kept in one place so both send the same mail.
+"""
+from django.conf import settings
+
+
+def password_reset_otp_email(email, otp):
+    message = f'''
+Hello,
+
+You have requested to reset your password for your Montada account.
+
+Your OTP code is: {otp}
+
+This OTP will expire in 10 minutes.
+
+If you did not request this password reset, please ignore this email.
+
+Best regards,
+Montada Team
+        '''
+    return {
+        'subject': 'Password Reset OTP - Montada',
+        'message': message,
+        'from_email': settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@montada.com',
+        'recipient_list': [email],
+    }
+
+
+def verification_otp_resend_email(user, otp):
+    message = f'''
+Hello {user.name or user.username},
+
+You have requested a new verification code for your Montada account.
+
+Your verification OTP code is: {otp}
+
+This OTP will expire in 10 minutes.
+
+If you did not request this, please ignore this email.
+
+Best regards,
+Montada Team
+    '''
+    return {
+        'subject': 'Email Verification OTP - Montada',
+        'message': message,
+        'from_email': settings.EMAIL_HOST_USER if hasattr(settings, 'EMAIL_HOST_USER') else 'noreply@montada.com',
+        'recipient_list': [user.email],
+    }
+
+
+def password_reset_otp_resend_email(user, email, otp):
+    message = f'''
+Hello {user.name or user.username},
+
+You have requested a new password reset code for your Montada account.
+
+Your OTP code is: {otp}
+
+This OTP will expire in 10 minutes.
+
+If you did not request this password reset, please ignore this email.
+
+Best regards,
+Montada Team
+    '''
+    return {
+        'subject': 'Password Reset OTP - Montada',
+        'message': message,
+        'from_email': settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@montada.com',
+        'recipient_list': [email],
+    }
@@ -1,9 +1,26 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.core.files.storage import default_storage
+
+from Montada.fieldsets import SparseFieldsetMixin
 from .models import User
 
 
+class ProfilePictureThumbnailsField(serializers.ReadOnlyField):
+    """
+    Renders User.profile_picture_thumbnails as {size: url}
+    URLs are absolute when a request is available, like ImageField
+    """
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for size, name in (value or {}).items():
+            url = default_storage.url(name)
+            urls[size] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     
     password = serializers.CharField(
@@ -91,15 +108,17 @@ class UserLoginSerializer(serializers.Serializer):
             )
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for user profile
     """
+    profile_picture_thumbnails = ProfilePictureThumbnailsField()
+
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'name',
-                  'phone_number', 'profile_picture', 'date_of_birth',
-                  'user_type', 'is_subscribed', 'is_verified', 
+                  'phone_number', 'profile_picture', 'profile_picture_thumbnails',
+                  'date_of_birth', 'user_type', 'is_subscribed', 'is_verified', 
                   'created_at', 'updated_at')
         read_only_fields = ('id', 'email', 'is_verified', 'created_at', 'updated_at')
 
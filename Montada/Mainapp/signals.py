@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Montada.cache import invalidate_tags_on_commit
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_responses(sender, instance, using, **kwargs):
+    """Profile responses depend on the user row, the analyst list on analysts"""
+    tags = [f'user:{instance.pk}']
+    if instance.user_type == 'analyst':
+        tags.append('analysts')
+    invalidate_tags_on_commit(*tags, using=using)
@@ -1,3 +1,653 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Montada.asgi_urls import ASYNC_VIEWS
+from Montada.cache import get_cache, get_or_compute, get_tag_versions, invalidate_tags
+from Montada.db_router import (
+    ReplicaRoutingMiddleware,
+    RoutingState,
+    _routing_state,
+)
+from Montada.ids import uuid7
+from Montada.instrumentation import get_current_metrics, record_query
+from Montada.renderers import FastJSONParser, FastJSONRenderer
+from Followers.models import Follow, Mute
+from Mainapp.images import get_thumbnail_format, process_profile_picture
+from Mainapp.models import User
+from Mainapp.serializers import UserProfileSerializer
+from Signals.models import AssetClass
+
+REPLICA = 'replica'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], READ_REPLICA_URL_NAMES=['Signals:asset_classes'])
+class ReplicaRoutingTests(TestCase):
+    """
+    Runs against two SQLite databases: the test 'default' and a separate
+    in-memory 'replica' that only receives what a test writes to it, so a read
+    served by the wrong alias shows up as missing or unexpected rows.
+    """
+    def setUp(self):
+        # Registered per test because the test runner only sets up aliases
+        # from settings; closing the in-memory database discards it afterwards
+        type(self).databases = self.databases | {REPLICA}
+        connections.settings[REPLICA] = connections.configure_settings({
+            **connections.settings, REPLICA: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+        })[REPLICA]
+        with connections[REPLICA].schema_editor() as editor:
+            for model in (User, AssetClass):
+                editor.create_model(model)
+        self.addCleanup(self.drop_replica)
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='trader', email='trader@example.com', password='pass-1234', user_type='trader'
+        )
+        self.user.save(using=REPLICA)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        AssetClass.objects.create(name='Primary')
+        AssetClass(name='Replica').save(using=REPLICA)
+
+    def drop_replica(self):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        type(self).databases = self.databases - {REPLICA}
+
+    def get_asset_class_names(self):
+        response = self.client.get(reverse('Signals:asset_classes'))
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        return [row['name'] for row in rows]
+
+    def test_chosen_view_reads_from_replica(self):
+        self.assertEqual(self.get_asset_class_names(), ['Replica'])
+
+    def test_reads_outside_a_request_use_primary(self):
+        self.assertEqual(AssetClass.objects.all().db, 'default')
+        self.assertEqual(list(AssetClass.objects.values_list('name', flat=True)), ['Primary'])
+
+    def test_write_pins_rest_of_request_to_primary(self):
+        token = _routing_state.set(RoutingState())
+        try:
+            _routing_state.get().replica = REPLICA
+            self.assertEqual(AssetClass.objects.all().db, REPLICA)
+            AssetClass.objects.create(name='Written')
+            self.assertEqual(AssetClass.objects.all().db, 'default')
+        finally:
+            _routing_state.reset(token)
+        self.assertTrue(AssetClass.objects.filter(name='Written').exists())
+        self.assertFalse(AssetClass.objects.using(REPLICA).filter(name='Written').exists())
+
+    def test_client_reads_own_writes_after_writing(self):
+        def write_view(request):
+            AssetClass.objects.create(name='Written')
+            return None
+
+        request = RequestFactory().post('/', HTTP_AUTHORIZATION=self.client._credentials['HTTP_AUTHORIZATION'])
+        ReplicaRoutingMiddleware(write_view)(request)
+
+        self.assertEqual(self.get_asset_class_names(), ['Primary', 'Written'])
+
+        other = APIClient()
+        other.force_authenticate(self.user)
+        self.client = other
+        self.assertEqual(self.get_asset_class_names(), ['Replica'])
+
+    def test_view_attribute_overrides_settings(self):
+        middleware = ReplicaRoutingMiddleware(lambda request: None)
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+
+        class Opted:
+            read_replica = True
+
+        class OptedOut:
+            read_replica = False
+
+        def view():
+            pass
+
+        view.cls = OptedOut
+        self.assertFalse(middleware.view_uses_replica(request, view))
+        view.cls = Opted
+        self.assertTrue(middleware.view_uses_replica(request, view))
+        view.read_replica = False
+        self.assertFalse(middleware.view_uses_replica(request, view))
+
+    def test_unsafe_methods_use_primary(self):
+        middleware = ReplicaRoutingMiddleware(lambda request: None)
+        state = RoutingState()
+        token = _routing_state.set(state)
+        try:
+            view = type('View', (), {'read_replica': True})
+            middleware.process_view(RequestFactory().post('/'), view, (), {})
+            self.assertIsNone(state.replica)
+            middleware.process_view(RequestFactory().get('/'), view, (), {})
+            self.assertEqual(state.replica, REPLICA)
+        finally:
+            _routing_state.reset(token)
+
+
+class CompressionMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trader = User.objects.create_user(
+            username='trader', email='trader@example.com', password='pass-1234', user_type='trader'
+        )
+        for i in range(30):
+            User.objects.create_user(
+                username=f'analyst{i}', email=f'analyst{i}@example.com', password='pass-1234', user_type='analyst'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+        self.url = reverse('Followers:analysts_list')
+
+    def test_gzips_large_json_for_clients_that_accept_it(self):
+        plain = self.client.get(self.url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get(self.url, headers={'Accept-Encoding': 'br;q=0, gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(reverse('Followers:counts'), headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_cached_responses_reuse_compressed_bytes(self):
+        first = self.client.get(self.url, headers={'Accept-Encoding': 'gzip'})
+        with mock.patch('Montada.compression.compress') as compress:
+            second = self.client.get(self.url, headers={'Accept-Encoding': 'gzip'})
+        compress.assert_not_called()
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trader = User.objects.create_user(
+            username='trader', email='trader@example.com', password='pass-1234', user_type='trader'
+        )
+        cls.analyst = User.objects.create_user(
+            username='analyst', email='analyst@example.com', password='pass-1234', user_type='analyst'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+        self.url = reverse('Followers:counts')
+
+    def test_cache_response_hits_per_user_and_query(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+        self.assertEqual(self.client.get(self.url, {'user_id': self.analyst.pk})['X-Cache'], 'MISS')
+        other = APIClient()
+        other.force_authenticate(self.analyst)
+        self.assertEqual(other.get(self.url)['X-Cache'], 'MISS')
+        # Errors are not cached
+        missing = {'user_id': uuid.uuid4()}
+        self.assertEqual(self.client.get(self.url, missing).status_code, 404)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url, missing).status_code, 404)
+        self.assertEqual(len(queries), 1)
+
+    def test_tags_are_invalidated_when_the_write_commits(self):
+        self.assertEqual(self.client.get(self.url).data['following_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(
+                follower=self.trader, followed=self.analyst, status=Follow.Status.ACCEPTED, is_active=True
+            )
+            # Not committed yet: the cached response is still served
+            self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['following_count'], 1)
+
+    def test_invalidate_tags_bumps_versions(self):
+        before = get_tag_versions(['a', 'b'])
+        self.assertEqual(get_tag_versions(['a', 'b']), before)
+        invalidate_tags('a')
+        after = get_tag_versions(['a', 'b'])
+        self.assertNotEqual(after['a'], before['a'])
+        self.assertEqual(after['b'], before['b'])
+
+    def test_get_or_compute_runs_one_compute_per_key(self):
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 'value', True
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_compute('single-flight', compute, 60)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('value', False)] + [('value', True)] * 4)
+
+    def test_get_or_compute_skips_uncacheable_values(self):
+        self.assertEqual(get_or_compute('uncacheable', lambda: ('value', False), 60), ('value', False))
+        self.assertIsNone(get_cache().get('uncacheable'))
+        # The lock is released, the next caller computes straight away
+        self.assertEqual(get_or_compute('uncacheable', lambda: ('again', True), 60, wait=0), ('again', False))
+        self.assertEqual(get_or_compute('uncacheable', lambda: ('never', True), 60), ('again', True))
+
+
+class BatchViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trader = User.objects.create_user(
+            username='trader', email='trader@example.com', password='pass-1234', user_type='trader'
+        )
+
+    def test_sub_requests_share_one_authentication(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.trader)}')
+        paths = [
+            reverse('Mainapp:profile'),
+            reverse('Subscriptions:check_subscription'),
+            reverse('Followers:counts'),
+            reverse('Signals:timeframes') + '?fields=id',
+            '/api/nowhere/',
+            {'path': reverse('Followers:counts'), 'method': 'DELETE'},
+            reverse('batch'),
+        ]
+        authenticate = JWTAuthentication.authenticate
+        with mock.patch.object(JWTAuthentication, 'authenticate', autospec=True, side_effect=authenticate) as auth:
+            response = client.post(reverse('batch'), {'requests': paths}, format='json')
+        self.assertEqual(auth.call_count, 1)
+        self.assertEqual(response.status_code, 200)
+        results = response.data['responses']
+        self.assertEqual([r['status'] for r in results], [200, 200, 200, 200, 404, 405, 400])
+        self.assertEqual(results[0]['body']['email'], self.trader.email)
+        self.assertIn('followers_count', results[2]['body'])
+
+    @override_settings(BATCH_REQUESTS={'MAX_REQUESTS': 2})
+    def test_batch_size_is_capped(self):
+        client = APIClient()
+        client.force_authenticate(self.trader)
+        response = client.post(reverse('batch'), {'requests': [reverse('Mainapp:profile')] * 3}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class SlowResponseMiddleware:
+    """Spends 50 ms on the way out, like compressing a large response"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        time.sleep(0.05)
+        return response
+
+
+@override_settings(PERFORMANCE_INSTRUMENTATION={
+    'ENABLED': True,
+    'URL_THRESHOLDS': {'Followers:counts': {'queries': 0}},
+})
+class PerformanceInstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trader = User.objects.create_user(
+            username='trader', email='trader@example.com', password='pass-1234', user_type='trader'
+        )
+        User.objects.create_user(
+            username='analyst', email='analyst@example.com', password='pass-1234', user_type='analyst'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def get(self, url, level):
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertLogs('Montada.performance', level) as logs:
+                response = self.client.get(url)
+        self.assertEqual(len(logs.records), 1)
+        return response, json.loads(logs.records[0].getMessage()), len(queries)
+
+    def test_reports_queries_and_timings(self):
+        response, record, queries = self.get(reverse('Followers:analysts_list'), 'INFO')
+        self.assertEqual(record['url_name'], 'Followers:analysts_list')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], queries)
+        self.assertGreater(queries, 0)
+        self.assertNotIn('slow', record)
+        self.assertGreater(record['serialize_ms'], 0)
+        self.assertGreater(record['db_ms'], 0)
+        self.assertLessEqual(record['view_ms'], record['total_ms'])
+        self.assertIn(f'desc="{queries} queries"', response['Server-Timing'])
+        # The header rounds the raw duration to 0.1 ms, the record to 0.01 ms
+        header_total = float(response['Server-Timing'].rsplit('total;dur=', 1)[1])
+        self.assertAlmostEqual(header_total, record['total_ms'], delta=0.06)
+        # The hooks stay installed but charge nothing outside a request
+        self.assertIsNone(get_current_metrics())
+
+    def test_view_time_excludes_middleware_response_phase(self):
+        middleware = list(settings.MIDDLEWARE)
+        middleware.insert(1, 'Mainapp.tests.SlowResponseMiddleware')
+        with override_settings(MIDDLEWARE=middleware):
+            self.client = APIClient()
+            self.client.force_authenticate(self.trader)
+            _, record, _ = self.get(reverse('Followers:analysts_list'), 'INFO')
+        self.assertGreater(record['view_ms'], 0)
+        self.assertGreaterEqual(record['total_ms'] - record['view_ms'], 50)
+
+    def test_async_requests_count_queries_on_open_connections(self):
+        # As for a connection opened before the middleware was loaded
+        if record_query in connection.execute_wrappers:
+            connection.execute_wrappers.remove(record_query)
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.trader)}'}
+        with override_settings(ROOT_URLCONF='Montada.asgi_urls'), CaptureQueriesContext(connection) as queries:
+            with self.assertLogs('Montada.performance', 'INFO') as logs:
+                async_to_sync(AsyncClient().get)(reverse('Followers:following_list'), headers=headers)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreater(record['queries'], 0)
+        self.assertEqual(record['queries'], len(queries))
+
+    def test_requests_over_their_url_threshold_warn(self):
+        _, record, queries = self.get(reverse('Followers:counts'), 'WARNING')
+        self.assertEqual(record['queries'], queries)
+        self.assertEqual(record['exceeded'], ['queries'])
+        self.assertEqual(record['thresholds']['queries'], 0)
+
+
+class AsyncViewParityTests(TestCase):
+    """Every view swapped in by Montada.asgi_urls answers like its DRF version"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.trader = User.objects.create_user(
+            username='trader', email='trader@example.com', password='pass-1234', user_type='trader'
+        )
+        cls.analyst = User.objects.create_user(
+            username='analyst', email='analyst@example.com', password='pass-1234', user_type='analyst'
+        )
+        cls.other = User.objects.create_user(
+            username='other', email='other@example.com', password='pass-1234', user_type='trader'
+        )
+        Follow.objects.create(follower=cls.trader, followed=cls.analyst, status=Follow.Status.ACCEPTED, is_active=True)
+        Follow.objects.create(follower=cls.other, followed=cls.trader, status=Follow.Status.PENDING)
+        Follow.objects.create(follower=cls.trader, followed=cls.other, status=Follow.Status.PENDING)
+        Mute.objects.create(muter=cls.trader, muted=cls.other)
+
+    def setUp(self):
+        cache.clear()
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.trader)}'}
+
+    def sync_get(self, method, path, data, headers):
+        client = APIClient()
+        if method == 'post':
+            return client.post(path, data, format='json', headers=headers)
+        return client.get(path, data, headers=headers)
+
+    def async_get(self, method, path, data, headers):
+        client = AsyncClient()
+        with override_settings(ROOT_URLCONF='Montada.asgi_urls'):
+            if method == 'post':
+                response = async_to_sync(client.post)(path, data, content_type='application/json', headers=headers)
+            else:
+                response = async_to_sync(client.get)(path, data, headers=headers)
+            # resolver_match is resolved lazily, against the URL conf in effect
+            response.view = response.resolver_match.func
+        return response
+
+    def assert_parity(self, method, name, data=None, authenticated=True):
+        path = reverse(name)
+        headers = self.headers if authenticated else {}
+        expected = self.sync_get(method, path, data, headers)
+        response = self.async_get(method, path, data, headers)
+        label = f'{method.upper()} {path} {data}'
+        self.assertIs(response.view, ASYNC_VIEWS[name], label)
+        self.assertEqual(response.status_code, expected.status_code, label)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content), label)
+        return response
+
+    def test_every_async_view_matches_its_drf_view(self):
+        requests = [
+            ('get', 'Followers:followers_list', None),
+            ('get', 'Followers:following_list', None),
+            ('get', 'Followers:following_list', {'fields': 'id,username'}),
+            ('get', 'Followers:pending_received', None),
+            ('get', 'Followers:pending_sent', {'omit': 'follower_detail'}),
+            ('get', 'Followers:muted_list', None),
+            ('get', 'Followers:counts', None),
+            ('get', 'Followers:counts', {'user_id': self.analyst.pk}),
+            ('get', 'Followers:counts', {'user_id': uuid.uuid4()}),
+            ('get', 'Followers:counts', {'user_id': 'not-a-uuid'}),
+            ('get', 'Followers:follow_status', {'user_id': self.other.pk}),
+            ('get', 'Followers:follow_status', {'user_id': self.analyst.pk}),
+            ('get', 'Followers:follow_status', None),
+            ('get', 'Subscriptions:check_subscription', None),
+            ('get', 'Subscriptions:subscription_status', None),
+            ('get', 'Subscriptions:check_subscription', None),
+            ('get', 'Subscriptions:subscription_status', {'fields': 'plan_type,status'}),
+            ('post', 'Mainapp:forgot_password', {'email': self.trader.email}),
+            ('post', 'Mainapp:forgot_password', {'email': 'nobody@example.com'}),
+            ('post', 'Mainapp:forgot_password', {'email': 'not-an-email'}),
+            ('post', 'Mainapp:resend_verification_otp', {'email': self.trader.email}),
+            ('post', 'Mainapp:resend_verification_otp', {'email': 'nobody@example.com'}),
+            ('post', 'Mainapp:resend_verification_otp', {}),
+            ('post', 'Mainapp:resend_password_reset_otp', {'email': self.trader.email}),
+            ('post', 'Mainapp:resend_password_reset_otp', {'email': 'nobody@example.com'}),
+        ]
+        self.assertEqual({name for _, name, _ in requests}, set(ASYNC_VIEWS))
+        for method, name, data in requests:
+            self.assert_parity(method, name, data)
+        self.assert_parity('get', 'Followers:counts', authenticated=False)
+
+    def test_async_routes_keep_url_names_and_cache(self):
+        for name, view in ASYNC_VIEWS.items():
+            match = resolve(reverse(name), urlconf='Montada.asgi_urls')
+            self.assertEqual(match.view_name, name)
+            self.assertIs(match.func, view)
+
+        url = reverse('Followers:counts')
+        self.assertEqual(self.async_get('get', url, None, self.headers)['X-Cache'], 'MISS')
+        self.assertEqual(self.async_get('get', url, None, self.headers)['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(
+                follower=self.analyst, followed=self.trader, status=Follow.Status.ACCEPTED, is_active=True
+            )
+        response = self.async_get('get', url, None, self.headers)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(json.loads(response.content)['followers_count'], 1)
+
+
+class JSONBackendTests(SimpleTestCase):
+    data = {
+        'id': uuid.UUID('0190b4b2-7a3c-7def-8123-456789abcdef'),
+        'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'day': date(2024, 5, 1),
+        'price': Decimal('1.10001'),
+        'ints': [0, -1, 2 ** 63 - 1],
+        'text': 'café \u2028 \u2029 "quoted" </script>',
+        'nested': {'empty': [], 'none': None, 'flag': True},
+        1: 'non-string key',
+    }
+
+    def test_renderer_matches_drf_byte_for_byte(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+        self.assertEqual(FastJSONRenderer().render(None), JSONRenderer().render(None))
+
+    def test_renderer_falls_back_to_drf(self):
+        # Beyond 64 bits, and indented output
+        self.assertEqual(FastJSONRenderer().render([2 ** 64]), JSONRenderer().render([2 ** 64]))
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, 'application/json; indent=2'),
+            JSONRenderer().render(self.data, 'application/json; indent=2'),
+        )
+
+    def test_documented_differences(self):
+        floats = [1e-5, 1e20, 0.1]
+        self.assertEqual(FastJSONRenderer().render(floats), b'[0.00001,1e20,0.1]')
+        self.assertEqual(JSONRenderer().render(floats), b'[1e-05,1e+20,0.1]')
+        self.assertEqual(json.loads(FastJSONRenderer().render(floats)), floats)
+        self.assertEqual(FastJSONRenderer().render([float('nan')]), b'[null]')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render([float('nan')])
+
+    def test_parser_matches_drf(self):
+        body = JSONRenderer().render({'text': 'café', 'values': [1, 2.5, None], 'nested': {'a': True}})
+        for encoding in ('utf-8', 'UTF_8'):
+            self.assertEqual(
+                FastJSONParser().parse(BytesIO(body), parser_context={'encoding': encoding}),
+                JSONParser().parse(BytesIO(body), parser_context={'encoding': encoding}),
+            )
+        latin1 = '{"text": "café"}'.encode('latin-1')
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO(latin1), parser_context={'encoding': 'latin-1'}), {'text': 'café'}
+        )
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"unterminated": '))
+
+    @skipIf('MONTADA_JSON_BACKEND' in os.environ, 'JSON backend chosen by the environment')
+    def test_stdlib_is_the_default_backend(self):
+        from Montada import settings as project_settings
+
+        self.assertEqual(project_settings.JSON_RENDERER, 'rest_framework.renderers.JSONRenderer')
+        self.assertEqual(project_settings.JSON_PARSER, 'rest_framework.parsers.JSONParser')
+
+
+class UUID7Tests(SimpleTestCase):
+    def test_keys_are_version_7_and_strictly_increasing(self):
+        keys = [uuid7() for _ in range(5000)]
+        self.assertTrue(all(key.version == 7 and key.variant == uuid.RFC_4122 for key in keys))
+        # char(32) hex, as mssql-django stores UUIDField, sorts the same way
+        self.assertEqual(sorted(keys, key=lambda key: key.hex), keys)
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_models_default_to_uuid7(self):
+        user = User(username='u', email='u@example.com')
+        self.assertEqual(user.id.version, 7)
+
+
+def make_image(size=(900, 600), color='red', image_format='JPEG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@override_settings(PROFILE_PICTURE_PROCESS_ASYNC=False, PROFILE_PICTURE_THUMBNAIL_SIZES=(64, 160))
+class ProfilePictureTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='pic', email='pic@example.com', password='pass-1234', user_type='analyst'
+        )
+
+    def test_upload_generates_square_thumbnails_after_commit(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        upload = SimpleUploadedFile('me.jpg', make_image(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(reverse('Mainapp:profile'), {'profile_picture': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        self.user.refresh_from_db()
+        self.assertEqual(set(self.user.profile_picture_thumbnails), {'64', '160'})
+        _, extension = get_thumbnail_format()
+        for size, name in self.user.profile_picture_thumbnails.items():
+            self.assertTrue(name.endswith(f'_{size}.{extension}'))
+            with default_storage.open(name) as file, Image.open(file) as thumb:
+                self.assertEqual(thumb.size, (int(size), int(size)))
+
+        # The profile shows the new thumbnails, not a cached response from before
+        body = client.get(reverse('Mainapp:profile')).data
+        self.assertEqual(set(body['profile_picture_thumbnails']), {'64', '160'})
+        self.assertTrue(body['profile_picture_thumbnails']['64'].startswith('http://testserver/'))
+
+    def test_serializer_renders_urls_relative_without_a_request(self):
+        self.user.profile_picture_thumbnails = {'64': 'profile_pictures/thumbs/abc_64.webp'}
+        data = UserProfileSerializer(self.user).data
+        self.assertEqual(
+            data['profile_picture_thumbnails'], {'64': default_storage.url('profile_pictures/thumbs/abc_64.webp')}
+        )
+        self.user.profile_picture_thumbnails = {}
+        self.assertEqual(UserProfileSerializer(self.user).data['profile_picture_thumbnails'], {})
+
+    def test_backfill_command_processes_only_missing_thumbnails(self):
+        self.user.profile_picture.save('old.png', SimpleUploadedFile('old.png', make_image(image_format='PNG')))
+        broken = User.objects.create_user(
+            username='broken', email='broken@example.com', password='pass-1234', user_type='trader'
+        )
+        broken.profile_picture.save('broken.jpg', SimpleUploadedFile('broken.jpg', b'not an image'))
+
+        out = StringIO()
+        with self.assertLogs('Mainapp.images', 'WARNING'):
+            call_command('process_profile_pictures', stdout=out)
+        self.assertIn('Processed 1 profile picture(s).', out.getvalue())
+        self.user.refresh_from_db()
+        names = self.user.profile_picture_thumbnails
+        self.assertEqual(set(names), {'64', '160'})
+        broken.refresh_from_db()
+        self.assertEqual(broken.profile_picture_thumbnails, {})
+
+        # Nothing is missing any more, except the picture that cannot be decoded
+        with self.assertLogs('Mainapp.images', 'WARNING'):
+            call_command('process_profile_pictures', stdout=out)
+        self.assertIn('Processed 0 profile picture(s).', out.getvalue())
+        # --all reprocesses, reusing the content-addressed files
+        with self.assertLogs('Mainapp.images', 'WARNING'):
+            call_command('process_profile_pictures', '--all', stdout=out)
+        self.assertIn('Processed 1 profile picture(s).', out.getvalue())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_picture_thumbnails, names)
+        self.assertEqual(process_profile_picture(uuid7()), None)
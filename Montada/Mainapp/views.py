@@ -16,6 +16,13 @@ from .serializers import (
     EmailVerificationSerializer
 )
 from .models import PasswordResetOTP, EmailVerificationOTP
+from .images import schedule_profile_picture_processing
+from .otp_emails import (
+    password_reset_otp_email,
+    password_reset_otp_resend_email,
+    verification_otp_resend_email,
+)
+from Montada.cache import cache_response
 
 User = get_user_model()
 
@@ -198,6 +205,20 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
+    @cache_response(timeout=300, tags=lambda view, request: [f'user:{request.user.pk}'])
+    def get(self, request, *args, **kwargs):
+        return self.retrieve(request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        if 'profile_picture' not in serializer.validated_data:
+            serializer.save()
+            return
+        # Thumbnails of the previous picture no longer apply; new ones are
+        # generated off-request once this update commits
+        user = serializer.save(profile_picture_thumbnails={})
+        if user.profile_picture:
+            schedule_profile_picture_processing(user)
+
 
 class ChangePasswordView(generics.UpdateAPIView):
     """
@@ -260,40 +281,14 @@ def forgot_password_view(request):
                 'message': 'User email not exists. Please register with the email provided!'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Generate OTP
-        otp = PasswordResetOTP.generate_otp()
-        
-        # Invalidate previous OTPs for this email
-        PasswordResetOTP.objects.filter(email=email, is_used=False).update(is_used=True)
-        
-        # Create new OTP record
-        otp_obj = PasswordResetOTP.objects.create(email=email, otp=otp)
+        # Invalidate previous OTPs for this email and create a new one
+        otp = PasswordResetOTP.issue(email)
         
         # Send email with OTP
-        subject = 'Password Reset OTP - Montada'
-        message = f'''
-Hello,
-
-You have requested to reset your password for your Montada account.
-
-Your OTP code is: {otp}
-
-This OTP will expire in 10 minutes.
-
-If you did not request this password reset, please ignore this email.
-
-Best regards,
-Montada Team
-        '''
+        email_message = password_reset_otp_email(email, otp)
         
         try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@montada.com',
-                [email],
-                fail_silently=False,
-            )
+            send_mail(**email_message, fail_silently=False)
             
             return Response({
                 'message': 'OTP has been sent to your email address.'
@@ -428,40 +423,14 @@ def resend_verification_otp_view(request):
             'message': 'Email is already verified.'
         }, status=status.HTTP_200_OK)
     
-    # Generate new OTP
-    otp = EmailVerificationOTP.generate_otp()
-    
-    # Invalidate previous OTPs for this email
-    EmailVerificationOTP.objects.filter(email=user.email, is_used=False).update(is_used=True)
-    
-    # Create new OTP record
-    otp_obj = EmailVerificationOTP.objects.create(email=user.email, otp=otp)
+    # Invalidate previous OTPs for this email and create a new one
+    otp = EmailVerificationOTP.issue(user.email)
     
     # Send email with OTP
-    subject = 'Email Verification OTP - Montada'
-    message = f'''
-Hello {user.name or user.username},
-
-You have requested a new verification code for your Montada account.
-
-Your verification OTP code is: {otp}
-
-This OTP will expire in 10 minutes.
-
-If you did not request this, please ignore this email.
-
-Best regards,
-Montada Team
-    '''
+    email_message = verification_otp_resend_email(user, otp)
     
     try:
-        send_mail(
-            subject,
-            message,
-            settings.EMAIL_HOST_USER if hasattr(settings, 'EMAIL_HOST_USER') else 'noreply@montada.com',
-            [user.email],
-            fail_silently=False,
-        )
+        send_mail(**email_message, fail_silently=False)
         
         return Response({
             'message': 'Verification OTP has been sent to your email address.'
@@ -494,40 +463,14 @@ def resend_password_reset_otp_view(request):
             'message': 'If an account exists with this email, an OTP has been sent.'
         }, status=status.HTTP_200_OK)
     
-    # Generate new OTP
-    otp = PasswordResetOTP.generate_otp()
-    
-    # Invalidate previous OTPs for this email
-    PasswordResetOTP.objects.filter(email=email, is_used=False).update(is_used=True)
-    
-    # Create new OTP record
-    otp_obj = PasswordResetOTP.objects.create(email=email, otp=otp)
+    # Invalidate previous OTPs for this email and create a new one
+    otp = PasswordResetOTP.issue(email)
     
     # Send email with OTP
-    subject = 'Password Reset OTP - Montada'
-    message = f'''
-Hello {user.name or user.username},
-
-You have requested a new password reset code for your Montada account.
-
-Your OTP code is: {otp}
-
-This OTP will expire in 10 minutes.
-
-If you did not request this password reset, please ignore this email.
-
-Best regards,
-Montada Team
-    '''
+    email_message = password_reset_otp_resend_email(user, email, otp)
     
     try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@montada.com',
-            [email],
-            fail_silently=False,
-        )
+        send_mail(**email_message, fail_silently=False)
         
         return Response({
             'message': 'Password reset OTP has been sent to your email address.'
@@ -3,6 +3,12 @@ ASGI config for Montada project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Served this way, the follow lists, counts, follow status, subscription
+status and OTP sender endpoints use the async views routed in
+Montada/asgi_urls.py; every other endpoint runs the same DRF views as WSGI.
+
+    uvicorn Montada.asgi:application --workers 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +18,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Montada.settings')
+os.environ.setdefault('MONTADA_ROOT_URLCONF', 'Montada.asgi_urls')
 
 application = get_asgi_application()
@@ -0,0 +1,62 @@
+"""
+URL configuration used when serving through Montada/asgi.py.
+
+The I/O-bound endpoints in ASYNC_VIEWS are served by async views. They take
+the place of their DRF versions inside Montada.urls, so paths, URL names and
+namespaces are unchanged: reverse() works as under WSGI, and the settings
+keyed by URL name (READ_REPLICA_URL_NAMES, the per-URL thresholds of
+PERFORMANCE_INSTRUMENTATION) apply to the async views too.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import URLPattern, URLResolver
+
+from Followers import async_views as followers_views
+from Mainapp import async_views as mainapp_views
+from Subscriptions import async_views as subscriptions_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+# Namespaced URL name -> async view
+ASYNC_VIEWS = {
+    'Mainapp:forgot_password': mainapp_views.ForgotPasswordView.as_view(),
+    'Mainapp:resend_verification_otp': mainapp_views.ResendVerificationOTPView.as_view(),
+    'Mainapp:resend_password_reset_otp': mainapp_views.ResendPasswordResetOTPView.as_view(),
+    'Subscriptions:subscription_status': subscriptions_views.SubscriptionStatusView.as_view(),
+    'Subscriptions:check_subscription': subscriptions_views.CheckSubscriptionStatusView.as_view(),
+    'Followers:followers_list': followers_views.FollowersListView.as_view(),
+    'Followers:following_list': followers_views.FollowingListView.as_view(),
+    'Followers:pending_received': followers_views.PendingReceivedListView.as_view(),
+    'Followers:pending_sent': followers_views.PendingSentListView.as_view(),
+    'Followers:muted_list': followers_views.MutedListView.as_view(),
+    'Followers:counts': followers_views.CountsView.as_view(),
+    'Followers:follow_status': followers_views.FollowStatusView.as_view(),
+}
+
+
+def swap_views(patterns, views, namespace=None, found=None):
+    """
+    Copy of a urlpatterns tree with the views named in ``views`` replaced;
+    the names replaced are added to ``found``
+    """
+    swapped = []
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            inner = ':'.join(filter(None, (namespace, entry.namespace))) or None
+            swapped.append(URLResolver(
+                entry.pattern, swap_views(entry.url_patterns, views, inner, found),
+                entry.default_kwargs, entry.app_name, entry.namespace,
+            ))
+            continue
+        name = ':'.join(filter(None, (namespace, entry.name))) if entry.name else None
+        if name in views:
+            entry = URLPattern(entry.pattern, views[name], entry.default_args, entry.name)
+            if found is not None:
+                found.add(name)
+        swapped.append(entry)
+    return swapped
+
+
+_found = set()
+urlpatterns = swap_views(sync_urlpatterns, ASYNC_VIEWS, found=_found)
+if ASYNC_VIEWS.keys() - _found:
+    raise ImproperlyConfigured(f'No URL named {sorted(ASYNC_VIEWS.keys() - _found)} in Montada.urls.')
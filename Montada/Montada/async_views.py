@@ -0,0 +1,132 @@
+"""
+Async API views for I/O-bound endpoints served through Montada/asgi.py.
+
+DRF's APIView is synchronous, so under ASGI every DRF request holds a worker
+thread for its whole duration, including database and SMTP waits.
+``AsyncAPIView`` is a plain Django async class-based view that keeps the
+API contract of the DRF views it stands in for: JWT authentication through
+simplejwt (the user row is loaded with the async ORM), error bodies from
+DRF's exception handler, and output rendered by the first configured DRF
+renderer.
+
+Handlers return ``(data, status)``, ``data`` or a ready response (as
+Montada.cache.cache_response does) and may raise DRF exceptions or Http404:
+
+    class CountsView(AsyncAPIView):
+        async def get(self, request):
+            return {"followers_count": await ...}
+"""
+import io
+
+from django.http import Http404, HttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with the user lookup done through the async ORM"""
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken('Token contained no recognizable user identification') from e
+
+        user = await self.user_model.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return user
+
+
+class AsyncAPIView(View):
+    """
+    Base class for async endpoints. Set ``authentication_required = False``
+    for AllowAny endpoints. ``request.data`` holds the parsed JSON or form
+    body for unsafe methods.
+    """
+    authentication_required = True
+    authenticator = AsyncJWTAuthentication()
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Token authenticated like the DRF views, so no CSRF cookie check
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        try:
+            if request.method.lower() not in self.http_method_names or handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            if self.authentication_required:
+                await self.authenticate(request)
+            if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+                request.data = self.parse_body(request)
+            result = await handler(request, *args, **kwargs)
+        except (exceptions.APIException, Http404) as exc:
+            return self.handle_exception(request, exc)
+
+        if isinstance(result, HttpResponseBase):
+            return result
+        data, status_code = result if isinstance(result, tuple) else (result, status.HTTP_200_OK)
+        return self.render(data, status_code)
+
+    async def authenticate(self, request):
+        if getattr(request, '_force_auth_user', None) is not None:
+            # A sub-request of Montada.batch, authenticated once for the batch
+            request.user, request.auth = request._force_auth_user, request._force_auth_token
+            return
+        result = await self.authenticator.aauthenticate(request)
+        if result is None:
+            raise exceptions.NotAuthenticated()
+        request.user, request.auth = result
+
+    @staticmethod
+    def parse_body(request):
+        if request.content_type == 'application/json':
+            if not request.body:
+                return {}
+            parser = drf_settings.DEFAULT_PARSER_CLASSES[0]()
+            return parser.parse(io.BytesIO(request.body), parser_context={'encoding': request.encoding or 'utf-8'})
+        return request.POST
+
+    def handle_exception(self, request, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            exc.auth_header = self.authenticator.authenticate_header(request)
+        response = exception_handler(exc, {'view': self, 'request': request})
+        rendered = self.render(response.data, response.status_code)
+        for header, value in response.items():
+            if header.lower() != 'content-type':
+                rendered[header] = value
+        return rendered
+
+    @staticmethod
+    def render(data, status_code):
+        renderer = drf_settings.DEFAULT_RENDERER_CLASSES[0]()
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        return HttpResponse(renderer.render(data), status=status_code, content_type=content_type)
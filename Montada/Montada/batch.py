@@ -0,0 +1,155 @@
+"""
+Composite batch requests.
+
+``BatchView`` runs several GET requests in one round trip. Each sub-request
+is resolved against the URL configuration and its view called in-process
+with the batch request's already authenticated user, so JWT validation and
+the user lookup happen once per batch instead of once per endpoint:
+
+    POST /api/batch/
+    {"requests": ["/api/auth/profile/", {"path": "/api/signals/timeframes/?fields=id,code"}]}
+    -> {"responses": [
+           {"path": "/api/auth/profile/", "status": 200, "body": {...}},
+           {"path": "/api/signals/timeframes/?fields=id,code", "status": 200, "body": [...]}
+       ]}
+
+Every sub-request gets its own status; one failing does not fail the batch.
+Sub-requests run in order, see each other's effects (there are none, being
+GETs) and read from a replica exactly when the standalone request would.
+
+Settings (all optional)::
+
+    BATCH_REQUESTS = {
+        'MAX_REQUESTS': 10,
+    }
+"""
+import json
+import logging
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from Montada.db_router import get_replicas, get_routing_state, pick_replica, view_uses_replica
+
+logger = logging.getLogger('Montada.batch')
+
+DEFAULTS = {
+    'MAX_REQUESTS': 10,
+}
+
+# Request headers that describe the batch request's own body
+_BODY_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_CONTENT_ENCODING', 'wsgi.input')
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'BATCH_REQUESTS', {}))
+    return config
+
+
+def build_subrequest(request, path, query_string):
+    """A GET HttpRequest for path, authenticated as the DRF ``request``"""
+    outer = request._request
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.META = {key: value for key, value in outer.META.items() if key not in _BODY_META}
+    sub.META.update({'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query_string})
+    sub.GET = QueryDict(query_string)
+    sub.COOKIES = outer.COOKIES
+    if hasattr(outer, 'urlconf'):
+        sub.urlconf = outer.urlconf
+    # Read by DRF's Request (and AsyncAPIView) in place of authenticating again
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    sub.user = request.user
+    if hasattr(outer, 'entitlement'):
+        sub.entitlement = outer.entitlement
+    return sub
+
+
+def response_body(response):
+    if isinstance(response, Response):
+        return response.data
+    if response.streaming:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content or b'null')
+    return response.content.decode(response.charset, errors='replace')
+
+
+class BatchView(APIView):
+    """
+    Run a list of GET sub-requests in-process and return their responses
+    together (see module docstring). Body: { "requests": ["/api/...", ...] }
+    """
+
+    def post(self, request):
+        items = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'requests must be a non-empty list of paths.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_requests = get_config()['MAX_REQUESTS']
+        if len(items) > max_requests:
+            return Response(
+                {'error': f'A batch can hold at most {max_requests} requests.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Like a single request, the whole batch reads one replica's snapshot
+        replica = pick_replica() if get_replicas() else None
+        return Response({'responses': [self.run(request, item, replica) for item in items]})
+
+    def run(self, request, item, replica):
+        if isinstance(item, dict):
+            path, method = item.get('path'), str(item.get('method', 'GET')).upper()
+        else:
+            path, method = item, 'GET'
+        if not isinstance(path, str) or not path.startswith('/'):
+            return {'path': path, 'status': status.HTTP_400_BAD_REQUEST, 'body': {'detail': 'Invalid path.'}}
+        if method != 'GET':
+            return {
+                'path': path,
+                'status': status.HTTP_405_METHOD_NOT_ALLOWED,
+                'body': {'detail': 'Only GET sub-requests can be batched.'},
+            }
+
+        parts = urlsplit(path)
+        sub = build_subrequest(request, parts.path, parts.query)
+        try:
+            match = resolve(parts.path, urlconf=getattr(sub, 'urlconf', None))
+        except Resolver404:
+            return {'path': path, 'status': status.HTTP_404_NOT_FOUND, 'body': {'detail': 'Not found.'}}
+        if getattr(match.func, 'view_class', None) is BatchView or getattr(match.func, 'cls', None) is BatchView:
+            return {'path': path, 'status': status.HTTP_400_BAD_REQUEST, 'body': {'detail': 'Batches cannot be nested.'}}
+        sub.resolver_match = match
+
+        state = get_routing_state()
+        if state is not None:
+            state.replica = replica if replica and view_uses_replica(sub, match.func) else None
+        try:
+            if iscoroutinefunction(match.func):
+                response = async_to_sync(match.func)(sub, *match.args, **match.kwargs)
+            else:
+                response = match.func(sub, *match.args, **match.kwargs)
+        except Http404:
+            return {'path': path, 'status': status.HTTP_404_NOT_FOUND, 'body': {'detail': 'Not found.'}}
+        except Exception:
+            logger.exception('Batch sub-request failed: %s', path)
+            return {
+                'path': path,
+                'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                'body': {'detail': 'Server error.'},
+            }
+        finally:
+            if state is not None:
+                state.replica = None
+        return {'path': path, 'status': response.status_code, 'body': response_body(response)}
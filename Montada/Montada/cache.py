@@ -0,0 +1,221 @@
+"""
+Response caching for DRF views with tag-based invalidation.
+
+Decorate a view handler with ``cache_response``; its response data is cached
+under a key built from the view, the request (path, query string, host), the
+scope (per user or public) and the current version of every dependency tag
+the view declares. Model signal receivers call ``invalidate_tags_on_commit``
+to bump a tag's version once their transaction commits, which orphans every
+cached response that depended on it. Bumping inside the transaction would
+let a concurrent request re-cache the old rows under the new version before
+the write became visible.
+
+A miss is computed by a single caller at a time per key (single-flight):
+concurrent callers wait briefly for that result instead of all hitting the
+database at once.
+
+``cache_response`` also wraps the coroutine handlers of
+Montada.async_views.AsyncAPIView; they share the key scheme and tags.
+
+    class CountsView(APIView):
+        @cache_response(timeout=60, tags=lambda view, request: [f'follows:{request.user.pk}'])
+        def get(self, request):
+            ...
+"""
+import asyncio
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+KEY_PREFIX = 'response:'
+TAG_PREFIX = 'tag:'
+
+SCOPE_USER = 'user'
+SCOPE_PUBLIC = 'public'
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _tag_key(tag):
+    return f'{TAG_PREFIX}{tag}'
+
+
+def get_tag_versions(tags):
+    """Current version of each tag, creating missing ones"""
+    if not tags:
+        return {}
+    cache = get_cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = cache.get_many(keys.keys())
+    for key in keys.keys() - versions.keys():
+        # add() so two processes initialising the same tag agree on it
+        cache.add(key, time.time_ns(), None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_tags(*tags):
+    """Bump the version of every given tag"""
+    if not tags:
+        return
+    version = time.time_ns()
+    get_cache().set_many({_tag_key(tag): version for tag in tags}, None)
+
+
+def invalidate_tags_on_commit(*tags, using=None):
+    """``invalidate_tags`` once the current transaction on ``using`` commits"""
+    if tags:
+        transaction.on_commit(lambda: invalidate_tags(*tags), using=using)
+
+
+def get_or_compute(key, compute, timeout, lock_timeout=10, wait=5.0):
+    """
+    Return (value, hit). On a miss only the caller that wins the lock runs
+    ``compute``; others poll for its result for up to ``wait`` seconds before
+    computing it themselves. ``compute`` returns (value, cacheable).
+    """
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value, True
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, lock_timeout):
+        deadline = time.monotonic() + wait
+        delay = 0.005
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            value = cache.get(key)
+            if value is not None:
+                return value, True
+            delay = min(delay * 2, 0.1)
+        value, _ = compute()
+        return value, False
+
+    try:
+        value, cacheable = compute()
+        if cacheable:
+            cache.set(key, value, timeout)
+        return value, False
+    finally:
+        cache.delete(lock_key)
+
+
+async def aget_or_compute(key, compute, timeout, lock_timeout=10, wait=5.0):
+    """``get_or_compute`` for a coroutine function ``compute``"""
+    cache = get_cache()
+    value = await cache.aget(key)
+    if value is not None:
+        return value, True
+
+    lock_key = f'{key}:lock'
+    if not await cache.aadd(lock_key, 1, lock_timeout):
+        deadline = time.monotonic() + wait
+        delay = 0.005
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            value = await cache.aget(key)
+            if value is not None:
+                return value, True
+            delay = min(delay * 2, 0.1)
+        value, _ = await compute()
+        return value, False
+
+    try:
+        value, cacheable = await compute()
+        if cacheable:
+            await cache.aset(key, value, timeout)
+        return value, False
+    finally:
+        await cache.adelete(lock_key)
+
+
+def build_cache_key(view, request, scope, tags):
+    versions = get_tag_versions(tags)
+    parts = [
+        f'{view.__class__.__module__}.{view.__class__.__name__}',
+        request.method,
+        request.get_host(),
+        request.path,
+        # GET is the query string of both DRF and plain Django requests
+        '&'.join(sorted(f'{k}={v}' for k, values in request.GET.lists() for v in values)),
+        scope if scope == SCOPE_PUBLIC else f'user={request.user.pk}',
+        ','.join(f'{tag}@{versions[tag]}' for tag in sorted(versions)),
+    ]
+    digest = hashlib.sha256('|'.join(parts).encode()).hexdigest()
+    return f'{KEY_PREFIX}{digest}'
+
+
+def cache_response(timeout=60, scope=SCOPE_USER, tags=None):
+    """
+    Cache successful (200) GET/HEAD responses of a DRF view handler.
+
+    ``scope`` is 'user' (one entry per authenticated user) or 'public' (shared),
+    or a callable ``(view, request) -> scope``. ``tags`` is an iterable of tag
+    names or a callable ``(view, request) -> iterable``.
+    """
+    def decorator(handler):
+        if iscoroutinefunction(handler):
+            return _cache_async_response(handler, timeout, scope, tags)
+
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+                return handler(view, request, *args, **kwargs)
+
+            resolved_scope = scope(view, request) if callable(scope) else scope
+            resolved_tags = list(tags(view, request) if callable(tags) else (tags or ()))
+            key = build_cache_key(view, request, resolved_scope, resolved_tags)
+            computed = {}
+
+            def compute():
+                response = handler(view, request, *args, **kwargs)
+                computed['response'] = response
+                cacheable = response.status_code == 200 and isinstance(response, Response)
+                payload = (response.status_code, response.data) if cacheable else None
+                return payload, cacheable
+
+            payload, hit = get_or_compute(key, compute, timeout)
+            if 'response' in computed:
+                response = computed['response']
+            else:
+                status_code, data = payload
+                response = Response(data, status=status_code)
+            response['X-Cache'] = 'HIT' if hit else 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def _cache_async_response(handler, timeout, scope, tags):
+    """
+    ``cache_response`` for an AsyncAPIView handler, which returns ``data`` or
+    ``(data, status)``; the wrapper returns the rendered response
+    """
+    @wraps(handler)
+    async def wrapper(view, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+            return await handler(view, request, *args, **kwargs)
+
+        resolved_scope = scope(view, request) if callable(scope) else scope
+        resolved_tags = list(tags(view, request) if callable(tags) else (tags or ()))
+        key = await sync_to_async(build_cache_key)(view, request, resolved_scope, resolved_tags)
+
+        async def compute():
+            result = await handler(view, request, *args, **kwargs)
+            data, status_code = result if isinstance(result, tuple) else (result, 200)
+            return (status_code, data), status_code == 200
+
+        (status_code, data), hit = await aget_or_compute(key, compute, timeout)
+        response = view.render(data, status_code)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+    return wrapper
@@ -0,0 +1,185 @@
+"""
+Response compression.
+
+``CompressionMiddleware`` compresses response bodies with brotli, when the
+``brotli`` package is installed and the client accepts ``br``, or else with
+gzip. Only responses at least MIN_SIZE bytes long and of an allowed content
+type are compressed; streaming responses and responses that already carry a
+Content-Encoding (or ``Cache-Control: no-transform``) pass through untouched.
+
+Bodies that repeat across requests, those of responses with an ETag or
+served through Montada.cache (X-Cache), are compressed once: the compressed
+bytes are cached under a digest of the uncompressed body, so a cache hit
+costs a hash rather than another compression pass.
+
+The default allowlist is JSON only. HTML pages (the browsable API) embed the
+CSRF token and are left uncompressed, which keeps them out of reach of
+BREACH-style attacks.
+
+Settings (all optional)::
+
+    RESPONSE_COMPRESSION = {
+        'ENABLED': True,
+        'MIN_SIZE': 1024,
+        'CONTENT_TYPES': ('application/json',),
+        'GZIP_LEVEL': 6,
+        'BROTLI_QUALITY': 5,
+        'CACHE_TIMEOUT': 300,
+    }
+"""
+import gzip
+import hashlib
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from Montada.cache import get_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,
+    'CONTENT_TYPES': ('application/json',),
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'CACHE_TIMEOUT': 300,
+}
+
+KEY_PREFIX = 'compressed:'
+
+_no_transform_re = re.compile(r'\bno-transform\b')
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'RESPONSE_COMPRESSION', {}))
+    return config
+
+
+def parse_accept_encoding(header):
+    """'gzip, br;q=0.8, *;q=0' -> {'gzip': 1.0, 'br': 0.8, '*': 0.0}"""
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header):
+    """The content coding to answer an Accept-Encoding header with, or None"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    if brotli is not None and accepted.get('br', wildcard) > 0:
+        return 'br'
+    if accepted.get('gzip', wildcard) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(content, quality=config['BROTLI_QUALITY'])
+    # mtime=0 keeps the output a pure function of the input
+    return gzip.compress(content, compresslevel=config['GZIP_LEVEL'], mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compress eligible responses with the best coding the client accepts
+    (see module docstring). Place it near the top of MIDDLEWARE so it sees
+    the final body.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        plan = self.plan(request, response)
+        if plan is None:
+            return response
+        encoding, key, config = plan
+        body = get_cache().get(key) if key else None
+        if body is None:
+            body = compress(response.content, encoding, config)
+            if key:
+                get_cache().set(key, body, config['CACHE_TIMEOUT'])
+        return self.apply(response, encoding, body)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        plan = self.plan(request, response)
+        if plan is None:
+            return response
+        encoding, key, config = plan
+        body = await get_cache().aget(key) if key else None
+        if body is None:
+            body = compress(response.content, encoding, config)
+            if key:
+                await get_cache().aset(key, body, config['CACHE_TIMEOUT'])
+        return self.apply(response, encoding, body)
+
+    @staticmethod
+    def plan(request, response):
+        """(encoding, compressed-bytes cache key or None, config), or None to pass the response through"""
+        config = get_config()
+        if not config['ENABLED'] or response.streaming or response.has_header('Content-Encoding'):
+            return None
+        if len(response.content) < config['MIN_SIZE']:
+            return None
+        content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if content_type not in config['CONTENT_TYPES']:
+            return None
+        if _no_transform_re.search(response.get('Cache-Control', '')):
+            return None
+
+        # The body depends on Accept-Encoding from here on, whether or not
+        # this client gets a compressed one
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return None
+
+        key = None
+        if response.has_header('ETag') or response.has_header('X-Cache'):
+            level = config['BROTLI_QUALITY'] if encoding == 'br' else config['GZIP_LEVEL']
+            digest = hashlib.sha256(response.content).hexdigest()
+            key = f'{KEY_PREFIX}{encoding}{level}:{digest}'
+        return encoding, key, config
+
+    @staticmethod
+    def apply(response, encoding, body):
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        # The compressed body is a different representation: only a weak
+        # validator still holds (as in Django's GZipMiddleware)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,146 @@
+"""
+Read-replica routing.
+
+``ReplicaRoutingMiddleware`` decides per request whether reads may go to a
+replica: only safe-method requests to chosen views do (URL names listed in
+READ_REPLICA_URL_NAMES, overridden per view by a ``read_replica`` attribute
+on the view class or function). One replica is picked per request so all of
+its reads see the same snapshot.
+
+``ReplicaRouter`` sends those reads to the chosen replica and every write to
+``default``. After the first write a request is pinned to ``default`` for
+the rest of its reads, and the client (identified by its Authorization
+header) stays pinned for READ_REPLICA_PIN_SECONDS so it reads its own
+writes while replicas catch up.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_PREFIX = 'db:pin-primary:'
+
+_routing_state = ContextVar('db_routing_state', default=None)
+
+
+class RoutingState:
+    __slots__ = ('replica', 'pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.replica = None
+        self.pinned = pinned
+        self.wrote = False
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def get_routing_state():
+    return _routing_state.get()
+
+
+def pick_replica():
+    return random.choice(get_replicas())
+
+
+def view_uses_replica(request, view_func):
+    """Whether safe-method reads of this view may go to a replica"""
+    for candidate in (view_func, getattr(view_func, 'cls', None), getattr(view_func, 'view_class', None)):
+        enabled = getattr(candidate, 'read_replica', None)
+        if enabled is not None:
+            return enabled
+    match = getattr(request, 'resolver_match', None)
+    return bool(match) and match.view_name in getattr(settings, 'READ_REPLICA_URL_NAMES', ())
+
+
+def read_replica(enabled=True):
+    """Per-view override for function views: @read_replica() / @read_replica(False)"""
+    def decorator(view):
+        view.read_replica = enabled
+        return view
+    return decorator
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or state.pinned or state.replica is None:
+            return 'default'
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.pinned = True
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in get_replicas()
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        pin_key = self.get_pin_key(request)
+        state = RoutingState(pinned=bool(pin_key and cache.get(pin_key)))
+        token = _routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+        if state.wrote and pin_key:
+            cache.set(pin_key, 1, getattr(settings, 'READ_REPLICA_PIN_SECONDS', 5))
+        return response
+
+    async def __acall__(self, request):
+        pin_key = self.get_pin_key(request)
+        state = RoutingState(pinned=bool(pin_key and await cache.aget(pin_key)))
+        token = _routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+        if state.wrote and pin_key:
+            await cache.aset(pin_key, 1, getattr(settings, 'READ_REPLICA_PIN_SECONDS', 5))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _routing_state.get()
+        replicas = get_replicas()
+        if state is None or not replicas or request.method not in SAFE_METHODS:
+            return None
+        if view_uses_replica(request, view_func):
+            state.replica = pick_replica()
+        return None
+
+    def view_uses_replica(self, request, view_func):
+        return view_uses_replica(request, view_func)
+
+    @staticmethod
+    def get_pin_key(request):
+        if not get_replicas():
+            # Nothing to pin against, so skip the cache round trips
+            return None
+        credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not credential:
+            return None
+        return PIN_PREFIX + hashlib.sha256(credential.encode()).hexdigest()
@@ -0,0 +1,194 @@
+"""
+Sparse fieldsets for API responses: ``?fields=`` keeps only the listed
+fields, ``?omit=`` drops them. Nested serializers take dotted names:
+
+    GET /api/followers/pending/received/?fields=id,status,follower_detail.name
+    GET /api/signals/my-signals/?omit=analyst_email,analyst_note
+
+Serializers opt in with SparseFieldsetMixin. One with a request in its
+context reads the query parameters itself (safe methods only, so writes
+always validate every field); views that build serializers without a
+context pass ``**requested_fieldset(request)``.
+
+``optimize_queryset`` trims select_related() and only() to the columns the
+remaining fields read, so a smaller payload also means fewer joins and less
+data fetched. Fields whose source is not a model column (method fields,
+properties) declare the columns they read in ``Meta.sparse_field_sources``;
+without that the queryset is left as is.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def parse_fieldset(value):
+    """'id, name,,follower_detail.name' -> ['id', 'name', 'follower_detail.name']; None when empty"""
+    if not value:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()] or None
+
+
+def requested_fieldset(request):
+    """The fields=/omit= serializer kwargs requested by a DRF or plain Django request"""
+    if request is None or request.method not in SAFE_METHODS:
+        return {'fields': None, 'omit': None}
+    params = getattr(request, 'query_params', request.GET)
+    return {
+        'fields': parse_fieldset(params.get(FIELDS_PARAM)),
+        'omit': parse_fieldset(params.get(OMIT_PARAM)),
+    }
+
+
+def _split(names):
+    """Dotted names -> {top-level name: [names below it]}"""
+    tree = {}
+    for name in names:
+        head, _, rest = name.partition('.')
+        children = tree.setdefault(head, [])
+        if rest:
+            children.append(rest)
+    return tree
+
+
+def _nested(field):
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    return field if isinstance(field, SparseFieldsetMixin) else None
+
+
+def _resolve(model, path, relation=False):
+    """
+    Relations traversed by a '__' column path on model (including the last
+    one when ``relation``), or None when the path does not end in a
+    concrete column reachable through forward foreign keys
+    """
+    parts = path.split('__')
+    relations = []
+    for depth, part in enumerate(parts, start=1):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        if depth < len(parts) or relation:
+            if not field.is_relation:
+                return None
+            relations.append('__'.join(parts[:depth]))
+            model = field.related_model
+    return relations
+
+
+class SparseFieldsetMixin:
+    """
+    ModelSerializer mixin for ?fields= / ?omit= (see module docstring).
+    Takes ``fields`` and ``omit`` lists of (dotted) field names as keyword
+    arguments; without them the root serializer reads the request's query
+    parameters.
+    """
+    def __init__(self, *args, fields=None, omit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sparse_fieldset = (fields, omit) if fields is not None or omit is not None else None
+
+    def get_sparse_fieldset(self):
+        if self.sparse_fieldset is not None:
+            return self.sparse_fieldset
+        # Only the top-level serializer (or the child of a top-level
+        # many=True list) answers to the query string
+        parent = self.parent
+        if parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None):
+            fieldset = requested_fieldset(self.context.get('request'))
+            return fieldset['fields'], fieldset['omit']
+        return None, None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only, omit = self.get_sparse_fieldset()
+        if only is not None:
+            tree = _split(only)
+            fields = {name: field for name, field in fields.items() if name in tree}
+            for name, children in tree.items():
+                nested = _nested(fields[name]) if name in fields else None
+                if children and nested is not None:
+                    nested.sparse_fieldset = (children, None)
+        if omit:
+            for name, children in _split(omit).items():
+                if name not in fields:
+                    continue
+                nested = _nested(fields[name])
+                if not children:
+                    del fields[name]
+                elif nested is not None:
+                    nested_only = nested.sparse_fieldset[0] if nested.sparse_fieldset else None
+                    nested.sparse_fieldset = (nested_only, children)
+        return fields
+
+    def get_query_paths(self):
+        """
+        (select_related paths, only() paths) covering the fields this
+        serializer renders, or None when some field's columns are unknown
+        """
+        model = self.Meta.model
+        declared_sources = getattr(self.Meta, 'sparse_field_sources', {})
+        related, columns = set(), {model._meta.pk.name}
+        for name, field in self.fields.items():
+            if isinstance(field, serializers.BaseSerializer):
+                nested = _nested(field)
+                relation = field.source.replace('.', '__')
+                relations = _resolve(model, relation, relation=True) if nested is field else None
+                paths = nested.get_query_paths() if relations is not None else None
+                if paths is None:
+                    return None
+                related.update(relations)
+                columns.update(relations)
+                related.update(f'{relation}__{path}' for path in paths[0])
+                columns.update(f'{relation}__{path}' for path in paths[1])
+                continue
+            if name in declared_sources:
+                sources = declared_sources[name]
+            elif field.source != '*':
+                sources = (field.source,)
+            else:
+                return None
+            for source in sources:
+                path = source.replace('.', '__')
+                relations = _resolve(model, path)
+                if relations is None:
+                    return None
+                related.update(relations)
+                columns.update(relations)
+                columns.add(path)
+        return related, columns
+
+    def optimize_queryset(self, queryset, relation=None):
+        """
+        Limit queryset's joins and columns to what this serializer renders.
+        ``relation`` is the path from queryset's model to the serialized one,
+        e.g. 'follower' for users serialized from a Follow queryset.
+        """
+        paths = self.get_query_paths()
+        if paths is None:
+            return queryset
+        related, columns = paths
+        if relation:
+            related = {relation, *(f'{relation}__{path}' for path in related)}
+            columns = {relation, *(f'{relation}__{path}' for path in columns)}
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        return queryset.only(*sorted(columns))
+
+
+class SparseQuerysetMixin:
+    """
+    Generic list view mixin: runs the list queryset through the serializer's
+    optimize_queryset
+    """
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        return self.get_serializer().optimize_queryset(queryset)
@@ -0,0 +1,55 @@
+"""
+Time-ordered UUIDs for primary keys.
+
+``uuid7()`` returns RFC 9562 version 7 UUIDs: a 48-bit Unix timestamp in
+milliseconds, then a 12-bit counter, then 62 random bits. Keys generated
+later sort after earlier ones, so inserts land at the end of the primary key
+index instead of at random pages. On SQL Server, where the primary key is
+the clustered index, random uuid4 keys split pages on nearly every insert.
+
+The counter keeps keys strictly increasing within a process, even for many
+keys in the same millisecond or if the clock steps back. Across processes
+keys are ordered to the millisecond.
+
+mssql-django stores UUIDField as char(32) hex, which compares in the same
+order as the integer value, so the ordering holds there. A uniqueidentifier
+column would not keep it, because SQL Server compares those bytes in a
+different order (that case needs NEWSEQUENTIALID instead).
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+"""
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_counter = 0
+
+_MAX_COUNTER = 0xFFF
+
+
+def uuid7():
+    """A version 7 UUID, greater than any previously returned by this process"""
+    global _last_ms, _last_counter
+    rand = int.from_bytes(os.urandom(10), 'big')
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            # Start the counter in its lower half, leaving room to count up
+            _last_ms, _last_counter = ms, (rand >> 69) & 0x7FF
+        elif _last_counter < _MAX_COUNTER:
+            _last_counter += 1
+        else:
+            # Counter exhausted within this millisecond: borrow the next one
+            _last_ms, _last_counter = _last_ms + 1, 0
+        ms, counter = _last_ms, _last_counter
+    value = (
+        (ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | counter << 64
+        | 0b10 << 62
+        | rand & 0x3FFF_FFFF_FFFF_FFFF
+    )
+    return uuid.UUID(int=value)
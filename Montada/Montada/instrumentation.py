@@ -0,0 +1,279 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceInstrumentationMiddleware`` measures, for every request, the
+number of DB queries and the time spent executing them (through an
+execute wrapper installed on every database connection), the time spent
+building serializer output, the time spent in the view and the total time
+spent in Django. The view is timed by ``ViewTimingMiddleware``, the last
+middleware, from just before it is called until its response is rendered,
+so the response phase of the other middleware (compression, for one) is not
+counted as view time. The numbers are sent back as a ``Server-Timing``
+header and logged as one JSON line on the ``Montada.performance`` logger;
+requests over their query-count or latency threshold are logged as warnings.
+
+Both hooks are process-wide: once the middleware is loaded, ``record_query``
+stays installed on every database connection and ``Serializer.data`` /
+``ListSerializer.data`` stay replaced by timed versions, for management
+commands and background threads too. Outside an instrumented request (no
+metrics in the current context) each hook is a pass-through costing one
+ContextVar lookup.
+
+Settings (all optional)::
+
+    PERFORMANCE_INSTRUMENTATION = {
+        'ENABLED': True,
+        'SERVER_TIMING_HEADER': True,
+        'DEFAULT_THRESHOLDS': {'queries': 20, 'duration_ms': 500},
+        # Keyed by namespaced URL name, e.g. 'Signals:analyst_signals_list'
+        'URL_THRESHOLDS': {},
+    }
+"""
+import json
+import logging
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+logger = logging.getLogger('Montada.performance')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING_HEADER': True,
+    'DEFAULT_THRESHOLDS': {'queries': 20, 'duration_ms': 500},
+    'URL_THRESHOLDS': {},
+}
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'PERFORMANCE_INSTRUMENTATION', {}))
+    return config
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'serialize_time', 'serializer_depth', 'view_start', 'view_end')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serializer_depth = 0
+        self.view_start = None
+        self.view_end = None
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper left installed on every connection. It charges queries to
+    the request in the current context, which also covers async views whose
+    ORM calls run on a worker thread with that thread's own connection.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += perf_counter() - start
+        metrics.queries += 1
+
+
+def install_query_hook(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_hooks():
+    """
+    Install the hook on this thread's open connections: those opened before
+    the middleware was loaded missed connection_created
+    """
+    for connection in connections.all(initialized_only=True):
+        install_query_hook(connection)
+
+
+def get_current_metrics():
+    """Metrics of the request being handled in this context, or None"""
+    return _current_metrics.get()
+
+
+def _timed_data(fget):
+    def data(self):
+        metrics = _current_metrics.get()
+        # Only the outermost .data is timed; serializers that build nested
+        # output through another serializer's .data are already inside it
+        if metrics is None or metrics.serializer_depth:
+            return fget(self)
+        metrics.serializer_depth += 1
+        start = perf_counter()
+        try:
+            return fget(self)
+        finally:
+            metrics.serialize_time += perf_counter() - start
+            metrics.serializer_depth -= 1
+    data._instrumented = True
+    return property(data)
+
+
+def install_serializer_timing():
+    """Replace ``.data`` on every serializer class, for the whole process"""
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        fget = serializer_class.data.fget
+        if not getattr(fget, '_instrumented', False):
+            serializer_class.data = _timed_data(fget)
+
+
+def get_thresholds(url_name, config):
+    thresholds = dict(config['DEFAULT_THRESHOLDS'])
+    if url_name:
+        thresholds.update(config['URL_THRESHOLDS'].get(url_name, {}))
+    return thresholds
+
+
+class PerformanceInstrumentationMiddleware:
+    """
+    Should be the first entry of MIDDLEWARE so the total covers the whole
+    middleware stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.config = get_config()
+        if self.config['ENABLED']:
+            install_serializer_timing()
+            connection_created.connect(install_query_hook, dispatch_uid='montada_performance_query_hook')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.config['ENABLED']:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = perf_counter()
+        try:
+            install_query_hooks()
+            response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        self.finish(request, response, metrics, start)
+        return response
+
+    async def __acall__(self, request):
+        if not self.config['ENABLED']:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = perf_counter()
+        try:
+            # Connections belong to threads: the ORM calls of async views run
+            # on the request's thread-sensitive worker, so install there
+            await sync_to_async(install_query_hooks)()
+            response = await self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        self.finish(request, response, metrics, start)
+        return response
+
+    def finish(self, request, response, metrics, start):
+        end = perf_counter()
+        view = 0.0
+        if metrics.view_start is not None:
+            view = (metrics.view_end or end) - metrics.view_start
+        self.report(request, response, metrics, view, end - start)
+
+    def report(self, request, response, metrics, view, total):
+        total_ms = total * 1000
+        view_ms = view * 1000
+        db_ms = metrics.db_time * 1000
+        serialize_ms = metrics.serialize_time * 1000
+
+        if self.config['SERVER_TIMING_HEADER']:
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.1f};desc="{metrics.queries} queries", '
+                f'serialize;dur={serialize_ms:.1f}, '
+                f'view;dur={view_ms:.1f}, '
+                f'total;dur={total_ms:.1f}'
+            )
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else None
+        thresholds = get_thresholds(url_name, self.config)
+        exceeded = []
+        if thresholds.get('queries') is not None and metrics.queries > thresholds['queries']:
+            exceeded.append('queries')
+        if thresholds.get('duration_ms') is not None and total_ms > thresholds['duration_ms']:
+            exceeded.append('duration_ms')
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(db_ms, 2),
+            'serialize_ms': round(serialize_ms, 2),
+            'view_ms': round(view_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+        if exceeded:
+            record['slow'] = True
+            record['exceeded'] = exceeded
+            record['thresholds'] = thresholds
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
+
+class ViewTimingMiddleware:
+    """
+    Should be the last entry of MIDDLEWARE: its process_view runs after every
+    other one, right before the view, and its get_response returns as soon
+    as the view's response is rendered, before any other middleware
+    processes it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.stop()
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.stop()
+        return response
+
+    @staticmethod
+    def stop():
+        metrics = _current_metrics.get()
+        if metrics is not None and metrics.view_start is not None:
+            metrics.view_end = perf_counter()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.view_start = perf_counter()
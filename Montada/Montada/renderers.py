@@ -0,0 +1,71 @@
+"""
+JSON renderer and parser backed by orjson, for REST_FRAMEWORK's
+DEFAULT_RENDERER_CLASSES / DEFAULT_PARSER_CLASSES. Opt-in: settings use
+DRF's classes unless MONTADA_JSON_BACKEND=orjson (see JSON_BACKENDS).
+
+orjson encodes UUIDs, datetimes and dates natively, in the same format as
+DRF's encoder (UTC as 'Z'); Decimal and the other types orjson does not know
+go through DRF's encoder, so Decimal still renders as a number. Output is
+compact UTF-8 like DRF's JSONRenderer with its default COMPACT_JSON and
+UNICODE_JSON. Two differences remain:
+
+  * floats are spelled differently, though they parse to the same value:
+    orjson writes small ones without an exponent and large ones without a
+    '+' (0.00001 and 1e20 where DRF writes 1e-05 and 1e+20);
+  * NaN and Infinity render as null instead of raising.
+
+Without orjson installed both classes behave exactly like DRF's.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    DUMPS_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson. Indented output (the browsable
+    API, `Accept: application/json; indent=4`) and anything orjson rejects,
+    such as integers beyond 64 bits, go through DRF's renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not (self.compact and not self.ensure_ascii):
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=DUMPS_OPTIONS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same strict-javascript-subset escaping as JSONRenderer
+        if b'\xe2\x80' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser that decodes with orjson. Bodies in a charset other than
+    UTF-8 go through DRF's parser.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,9 +48,13 @@ INSTALLED_APPS = [
     'Subscriptions',
     'Signals',
     'Followers',
+    'Notifications',
 ]
 
 MIDDLEWARE = [
+    'Montada.instrumentation.PerformanceInstrumentationMiddleware',
+    'Montada.compression.CompressionMiddleware',
+    'Montada.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -58,12 +63,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Subscriptions.middleware.SubscriptionEntitlementMiddleware',
+    'Montada.instrumentation.ViewTimingMiddleware',
 ]
 
 # CORS: allow all origins to access the API
 CORS_ALLOW_ALL_ORIGINS = True
 
-ROOT_URLCONF = 'Montada.urls'
+# Montada/asgi.py switches to Montada.asgi_urls, which swaps in the async views
+ROOT_URLCONF = os.environ.get('MONTADA_ROOT_URLCONF', 'Montada.urls')
 
 TEMPLATES = [
     {
@@ -95,6 +103,14 @@ DATABASES = {
         'HOST': '3.76.105.23',
         'PORT': '1433',
 
+        # Keep each worker thread's connection open between requests instead
+        # of paying the ODBC login handshake on every request; 0 restores the
+        # old connect-per-request behaviour, None keeps connections forever
+        'CONN_MAX_AGE': int(os.environ.get('MONTADA_DB_CONN_MAX_AGE', 600)),
+        # Ping a reused connection (SELECT 1) before the first query of each
+        # request so a connection dropped by the server is replaced, not failed
+        'CONN_HEALTH_CHECKS': True,
+
         'OPTIONS': {
             'driver': 'ODBC Driver 18 for SQL Server',
             'extra_params': 'Encrypt=no;TrustServerCertificate=yes;',
@@ -103,6 +119,95 @@ DATABASES = {
     },
 }
 
+# ODBC driver-manager connection pooling (pyodbc.pooling), read by mssql-django
+# before the first connection. Only takes effect when unixODBC pooling is
+# enabled in odbcinst.ini:
+#   [ODBC]
+#   Pooling = Yes
+#   [ODBC Driver 18 for SQL Server]
+#   CPTimeout = 120
+DATABASE_CONNECTION_POOLING = os.environ.get('MONTADA_DB_ODBC_POOLING', '1') == '1'
+
+# Read replicas: one alias per host in MONTADA_DB_REPLICA_HOSTS (comma
+# separated), same credentials as the primary. Safe-method requests to the
+# views named in READ_REPLICA_URL_NAMES read from a replica; a view class or
+# function can override that with a `read_replica = True/False` attribute.
+# Writes always go to 'default', and a client that wrote reads from the
+# primary for READ_REPLICA_PIN_SECONDS afterwards.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.environ.get('MONTADA_DB_REPLICA_HOSTS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['Montada.db_router.ReplicaRouter']
+
+READ_REPLICA_PIN_SECONDS = int(os.environ.get('MONTADA_DB_REPLICA_PIN_SECONDS', 5))
+
+READ_REPLICA_URL_NAMES = [
+    'Signals:asset_classes',
+    'Signals:instruments',
+    'Signals:timeframes',
+    'Signals:assets_instruments',
+    'Signals:analyst_signals_list',
+    'Signals:signal_feed',
+    'Signals:analyst_signal_history',
+    'Signals:trending_instruments',
+    'Signals:instrument_consensus',
+    'Followers:analysts_list',
+    'Followers:followers_list',
+    'Followers:following_list',
+    'Followers:pending_received',
+    'Followers:pending_sent',
+    'Followers:muted_list',
+    'Followers:counts',
+]
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Pick the backend with MONTADA_CACHE_BACKEND: 'locmem' (per process, the
+# default), 'file' (shared by processes on one host) or 'redis' (shared by
+# every host; needs the `redis` package and MONTADA_CACHE_LOCATION).
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'montada',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('MONTADA_CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('MONTADA_CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[os.environ.get('MONTADA_CACHE_BACKEND', 'locmem')],
+        'KEY_PREFIX': 'montada',
+        'TIMEOUT': 300,
+    },
+}
+
+# Per-endpoint response caching (see Montada/cache.py)
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_ALIAS = 'default'
+
+# gzip/brotli response compression (see Montada/compression.py); brotli is
+# used when the `brotli` package is installed
+RESPONSE_COMPRESSION = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,
+    'CONTENT_TYPES': ('application/json',),
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'CACHE_TIMEOUT': 300,
+}
+
 CSRF_TRUSTED_ORIGINS = [
     "https://uat.themontada.com",
     "https://www.uat.themontada.com",
@@ -158,7 +263,26 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'Mainapp.User'
 
 # REST Framework Configuration
+# JSON encoding of API responses and request bodies: 'stdlib' (the default;
+# DRF's own JSONRenderer/JSONParser) or 'orjson' (opt-in; Montada/renderers.py,
+# faster but floats are spelled differently, see its docstring; falls back to
+# the stdlib when orjson is missing). Set MONTADA_JSON_BACKEND.
+JSON_BACKENDS = {
+    'orjson': ('Montada.renderers.FastJSONRenderer', 'Montada.renderers.FastJSONParser'),
+    'stdlib': ('rest_framework.renderers.JSONRenderer', 'rest_framework.parsers.JSONParser'),
+}
+JSON_RENDERER, JSON_PARSER = JSON_BACKENDS[os.environ.get('MONTADA_JSON_BACKEND', 'stdlib')]
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        JSON_RENDERER,
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        JSON_PARSER,
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
@@ -192,6 +316,15 @@ SIMPLE_JWT = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Profile picture thumbnails (see Mainapp/images.py)
+PROFILE_PICTURE_THUMBNAIL_SIZES = (64, 160, 480)
+PROFILE_PICTURE_PROCESS_ASYNC = True  # False runs processing inline after commit
+PROFILE_PICTURE_WORKERS = 2
+
+# Threads sending OTP mail for the async views of Montada/asgi.py; bounds how
+# many SMTP conversations one ASGI worker holds open at a time
+ASYNC_EMAIL_WORKERS = 32
+
 # Email configuration
 # Configure these settings with your email provider credentials
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -204,3 +337,86 @@ EMAIL_HOST_PASSWORD = 'dklhezbtaohzylnm'  # Your email password or app-specific
 
 # For Gmail, you may need to use an App Password instead of your regular password
 # For other providers, adjust EMAIL_HOST, EMAIL_PORT, EMAIL_USE_TLS/EMAIL_USE_SSL accordingly
+
+# Subscriptions
+# Seconds a cached entitlement snapshot (status/end_date) is kept; status
+# changes invalidate it immediately. Run `manage.py expire_subscriptions`
+# on a schedule to persist expiries.
+SUBSCRIPTION_ENTITLEMENT_CACHE_TIMEOUT = 300
+
+# Signals
+# `manage.py archive_signals` moves soft-deleted signals, and CLOSED signals
+# not updated for this many days, out of the main table
+SIGNAL_ARCHIVE_CLOSED_AFTER_DAYS = 90
+# `manage.py compact_signal_events` snapshots signals with this many new
+# events, and prunes snapshotted events older than the retention (0 keeps
+# them all)
+SIGNAL_EVENT_SNAPSHOT_EVERY = 50
+SIGNAL_EVENT_RETENTION_DAYS = 0
+# The event feed only hands out events at least this old, so a transaction
+# that commits late cannot slip in behind a consumer's cursor
+SIGNAL_EVENT_FEED_SETTLE_SECONDS = 2
+# Historical candles (see Signals/candles.py): memory-mapped column files on
+# local disk, written by `manage.py import_candles` / `downsample_candles`
+CANDLE_STORE_ROOT = os.environ.get('MONTADA_CANDLE_ROOT', str(BASE_DIR / 'candles'))
+# Signal backtests (see Signals/backtest.py). The API computes scopes of up to
+# INLINE_MAX_SIGNALS signals in the request and larger ones in the background
+BACKTEST = {
+    'TIMEFRAME': 'M1',
+    'WORKERS': None,
+    'INLINE_MAX_SIGNALS': 20_000,
+    'INLINE_WORKERS': 1,
+}
+
+# Notifications
+# New-signal fan-out runs after commit in a background worker, writing this
+# many notifications per bulk insert
+NOTIFICATION_FANOUT_ASYNC = True
+NOTIFICATION_FANOUT_WORKERS = 2
+NOTIFICATION_FANOUT_BATCH_SIZE = 1000
+
+# Composite batch requests (see Montada/batch.py)
+BATCH_REQUESTS = {
+    'MAX_REQUESTS': 10,
+}
+
+# Delta sync tokens (see Montada/sync.py)
+DELTA_SYNC = {
+    'MAX_AGE': 30 * 24 * 3600,
+    'OVERLAP_SECONDS': 2,
+}
+
+# Performance instrumentation (see Montada/instrumentation.py)
+# URL_THRESHOLDS is keyed by namespaced URL name and overrides the defaults
+PERFORMANCE_INSTRUMENTATION = {
+    'ENABLED': True,
+    'SERVER_TIMING_HEADER': True,
+    'DEFAULT_THRESHOLDS': {'queries': 20, 'duration_ms': 500},
+    'URL_THRESHOLDS': {
+        'Mainapp:profile': {'queries': 3, 'duration_ms': 150},
+        'Subscriptions:check_subscription': {'queries': 3, 'duration_ms': 150},
+        'Signals:assets_instruments': {'queries': 3, 'duration_ms': 300},
+        'Signals:analyst_signals_list': {'queries': 5, 'duration_ms': 300},
+        'Signals:signal_feed': {'queries': 5, 'duration_ms': 300},
+        'Followers:counts': {'queries': 8, 'duration_ms': 200},
+        'Followers:analysts_list': {'queries': 5, 'duration_ms': 500},
+    },
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # INFO logs every request's timings, WARNING only those over threshold
+        'Montada.performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('MONTADA_PERFORMANCE_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
@@ -19,12 +19,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .batch import BatchView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('Mainapp.urls')),
     path('api/subscriptions/', include('Subscriptions.urls')),
     path('api/signals/', include('Signals.urls')),
     path('api/followers/', include('Followers.urls')),
+    path('api/notifications/', include('Notifications.urls')),
+    path('api/batch/', BatchView.as_view(), name='batch'),
 ]
 
 # Serve media files in development
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import Notification, NotificationCounter
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'recipient', 'kind', 'actor', 'is_read', 'created_at')
+    list_filter = ('kind', 'is_read', 'created_at')
+    search_fields = ('recipient__email', 'actor__email')
+    readonly_fields = ('created_at', 'read_at')
+    ordering = ('-created_at',)
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'unread')
+    search_fields = ('user__email',)
@@ -0,0 +1,192 @@
+"""
+Daily signal digest emails.
+
+``send_daily_digests`` emails every subscribed trader one message listing
+the last day's signals from the analysts they follow and have not muted.
+The work is set-based and bounded:
+
+  * one query loads the period's signals, grouped by analyst, and each
+    analyst's block is rendered once (text and HTML) and shared by every
+    recipient who follows them;
+  * recipients are read in keyset-paginated batches of ``batch_size``, two
+    queries per batch (the users, then their follow pairs);
+  * every message goes out through one SMTP connection, opened once for the
+    whole run; if the server drops it, ``send_batch`` reconnects and resends
+    only what it had not sent.
+
+Memory is one batch of messages plus the rendered blocks, however many
+recipients there are.
+"""
+import logging
+import smtplib
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Exists, OuterRef
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from Followers.models import Follow, Mute
+from Signals.models import TradingSignal
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+BLOCK_TEMPLATES = ('notifications/digest/analyst_block.txt', 'notifications/digest/analyst_block.html')
+EMAIL_TEMPLATES = ('notifications/digest/email.txt', 'notifications/digest/email.html')
+
+
+def get_from_email():
+    return getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', 'noreply@montada.com')
+
+
+def published_signals(since, until):
+    """Live, non-draft signals created in [since, until)"""
+    return TradingSignal.active.filter(
+        created_at__gte=since, created_at__lt=until
+    ).exclude(
+        status=TradingSignal.Status.DRAFT
+    )
+
+
+def collect_signals(since, until):
+    """{analyst_id: (analyst, [signals newest first])}"""
+    signals = published_signals(since, until).select_related(
+        'analyst', 'instrument', 'timeframe'
+    ).order_by('analyst_id', '-created_at')
+    grouped = {}
+    for signal in signals:
+        grouped.setdefault(signal.analyst_id, (signal.analyst, []))[1].append(signal)
+    return grouped
+
+
+def render_blocks(grouped):
+    """{analyst_id: (text block, html block, signal count)}, each rendered once"""
+    text_template, html_template = (get_template(name) for name in BLOCK_TEMPLATES)
+    blocks = {}
+    for analyst_id, (analyst, signals) in grouped.items():
+        context = {'analyst': analyst, 'signals': signals}
+        blocks[analyst_id] = (text_template.render(context), html_template.render(context), len(signals))
+    return blocks
+
+
+def recipient_batches(analyst_ids, batch_size):
+    """
+    Yield lists of (user, [followed analyst ids]) for subscribed traders who
+    follow, and have not muted, at least one of analyst_ids (a list or a
+    values() subquery)
+    """
+    follows = Follow.objects.filter(
+        followed_id__in=analyst_ids,
+        status=Follow.Status.ACCEPTED,
+        is_active=True,
+    ).exclude(
+        Exists(Mute.objects.filter(muter_id=OuterRef('follower_id'), muted_id=OuterRef('followed_id')))
+    )
+    users = User.objects.filter(
+        user_type='trader',
+        is_active=True,
+        is_subscribed=True,
+    ).exclude(email='').filter(
+        Exists(follows.filter(follower_id=OuterRef('pk')))
+    ).only('id', 'email', 'name', 'username').order_by('id')
+
+    after = None
+    while True:
+        page = users if after is None else users.filter(id__gt=after)
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        followed = defaultdict(list)
+        pairs = follows.filter(follower_id__in=[user.id for user in batch]).order_by('followed_id')
+        for follower_id, followed_id in pairs.values_list('follower_id', 'followed_id'):
+            followed[follower_id].append(followed_id)
+        yield [(user, followed[user.id]) for user in batch]
+        after = batch[-1].id
+
+
+def build_messages(batch, blocks, templates, date, connection):
+    text_template, html_template = templates
+    from_email = get_from_email()
+    messages = []
+    for user, analyst_ids in batch:
+        # An analyst whose signals were deleted since the blocks were rendered
+        analyst_ids = [analyst_id for analyst_id in analyst_ids if analyst_id in blocks]
+        if not analyst_ids:
+            continue
+        count = sum(blocks[analyst_id][2] for analyst_id in analyst_ids)
+        context = {
+            'name': user.name or user.username,
+            'date': date,
+            'count': count,
+            'text_blocks': mark_safe('\n'.join(blocks[analyst_id][0] for analyst_id in analyst_ids)),
+            'html_blocks': mark_safe(''.join(blocks[analyst_id][1] for analyst_id in analyst_ids)),
+        }
+        message = EmailMultiAlternatives(
+            subject=f'Your Montada digest: {count} new signal{"" if count == 1 else "s"}',
+            body=text_template.render(context),
+            from_email=from_email,
+            to=[user.email],
+            connection=connection,
+        )
+        message.attach_alternative(html_template.render(context), 'text/html')
+        messages.append(message)
+    return messages
+
+
+def send_batch(connection, messages):
+    """
+    Send messages one at a time, reconnecting once if the server drops the
+    connection and resending only the messages not sent yet
+    """
+    sent = index = 0
+    reconnected = False
+    while index < len(messages):
+        try:
+            sent += connection.send_messages(messages[index:index + 1]) or 0
+        except smtplib.SMTPServerDisconnected:
+            if reconnected:
+                raise
+            logger.warning('SMTP connection dropped after %d of %d messages; reconnecting', index, len(messages))
+            connection.close()
+            connection.open()
+            reconnected = True
+            continue
+        index += 1
+    return sent
+
+
+def send_daily_digests(now=None, hours=24, batch_size=500, dry_run=False):
+    """
+    Email the digest of the ``hours`` before ``now`` to every recipient.
+    Returns (recipients, messages sent).
+    """
+    now = now or timezone.now()
+    since = now - timedelta(hours=hours)
+    grouped = collect_signals(since, now)
+    if not grouped:
+        return 0, 0
+    blocks = render_blocks(grouped)
+    templates = [get_template(name) for name in EMAIL_TEMPLATES]
+    date = timezone.localdate(now)
+
+    recipients = sent = 0
+    connection = None if dry_run else get_connection(fail_silently=False)
+    if connection is not None:
+        connection.open()
+    try:
+        analyst_ids = published_signals(since, now).values('analyst_id')
+        for batch in recipient_batches(analyst_ids, batch_size):
+            messages = build_messages(batch, blocks, templates, date, connection)
+            recipients += len(messages)
+            if connection is not None:
+                sent += send_batch(connection, messages)
+    finally:
+        if connection is not None:
+            connection.close()
+    return recipients, sent
@@ -0,0 +1,114 @@
+"""
+Notification fan-out.
+
+Views and model methods call the ``notify_*`` functions below. Each queues
+its work for when the current transaction commits, and runs it in a
+background worker, so posting a signal to an analyst with 50k followers
+costs the request nothing beyond queueing. The worker walks the recipients
+in keyset-paginated batches and writes each batch with
+``Notification.create_for`` (one bulk INSERT plus the unread counter
+updates).
+
+Set NOTIFICATION_FANOUT_ASYNC = False to run the fan-out inline, after
+commit, instead.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_batch_size():
+    return getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 1000)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'NOTIFICATION_FANOUT_WORKERS', 2),
+            thread_name_prefix='notification-fanout',
+        )
+    return _executor
+
+
+def _run_in_worker(func, *args):
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Notification fan-out %s failed', func.__name__)
+    finally:
+        close_old_connections()
+
+
+def schedule(func, *args):
+    """Run func(*args) once the current transaction commits"""
+    def submit():
+        if getattr(settings, 'NOTIFICATION_FANOUT_ASYNC', True):
+            _get_executor().submit(_run_in_worker, func, *args)
+        else:
+            func(*args)
+
+    transaction.on_commit(submit)
+
+
+def signal_follower_ids(analyst_id, after=None, limit=1000):
+    """
+    One keyset page of the users to notify about analyst_id's signals:
+    accepted, active followers who have not muted the analyst
+    """
+    from Followers.models import Follow, Mute
+
+    followers = Follow.objects.filter(
+        followed_id=analyst_id,
+        status=Follow.Status.ACCEPTED,
+        is_active=True,
+    ).exclude(
+        follower_id__in=Mute.objects.filter(muted_id=analyst_id).values('muter_id')
+    )
+    if after is not None:
+        followers = followers.filter(follower_id__gt=after)
+    return list(followers.order_by('follower_id').values_list('follower_id', flat=True)[:limit])
+
+
+def fan_out_signal(signal_id, analyst_id, data):
+    """Notify every follower of analyst_id of a new signal; returns the number notified"""
+    batch_size = get_batch_size()
+    notified, after = 0, None
+    while True:
+        recipient_ids = signal_follower_ids(analyst_id, after=after, limit=batch_size)
+        if not recipient_ids:
+            return notified
+        notified += Notification.create_for(
+            recipient_ids, Notification.Kind.NEW_SIGNAL, actor_id=analyst_id, data=data
+        )
+        after = recipient_ids[-1]
+
+
+def notify_new_signal(signal):
+    """Queue NEW_SIGNAL notifications for the followers of signal's analyst"""
+    data = {
+        'signal_id': str(signal.pk),
+        'instrument': signal.instrument.symbol,
+        'direction': signal.direction,
+    }
+    schedule(fan_out_signal, signal.pk, signal.analyst_id, data)
+
+
+def notify_follow_accepted(follow):
+    """Queue a FOLLOW_ACCEPTED notification for the user whose request was accepted"""
+    schedule(
+        Notification.create_for,
+        [follow.follower_id],
+        Notification.Kind.FOLLOW_ACCEPTED,
+        follow.followed_id,
+        {'follow_id': str(follow.pk)},
+    )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from Notifications.digest import send_daily_digests
+
+
+class Command(BaseCommand):
+    help = (
+        "Email each subscribed trader a digest of the last day's signals from the "
+        'analysts they follow (run once a day)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Include signals created in this many hours before now',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of recipients loaded, and emails sent, per batch',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Build the digests without sending them',
+        )
+
+    def handle(self, *args, **options):
+        recipients, sent = send_daily_digests(
+            hours=options['hours'], batch_size=options['batch_size'], dry_run=options['dry_run']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Built {recipients} digest(s), sent {sent}.'))
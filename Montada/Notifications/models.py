@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from Montada.ids import uuid7
+
+
+class Notification(models.Model):
+    """
+    One entry in a user's notification inbox. Written in bulk by
+    Notifications.fanout; ids are time-ordered (uuid7), so the inbox reads
+    newest first by id and pages with an id cursor.
+    """
+    class Kind(models.TextChoices):
+        NEW_SIGNAL = 'NEW_SIGNAL', 'New signal'
+        FOLLOW_ACCEPTED = 'FOLLOW_ACCEPTED', 'Follow request accepted'
+        SUBSCRIPTION_EXPIRED = 'SUBSCRIPTION_EXPIRED', 'Subscription expired'
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    kind = models.CharField(max_length=24, choices=Kind.choices)
+    # The user the notification is about (the analyst, the accepting user)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    # Small payload for the client, e.g. the signal id and instrument
+    data = models.JSONField(default=dict, blank=True)
+    is_read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Inbox pages, newest first
+            models.Index(fields=['recipient', 'id'], name='notification_inbox_idx'),
+            # Mark all read / unread-only pages
+            models.Index(
+                fields=['recipient', 'id'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient} | {self.kind} | {'read' if self.is_read else 'unread'}"
+
+    @staticmethod
+    def create_for(recipient_ids, kind, actor_id=None, data=None, now=None):
+        """
+        Insert one notification per recipient and bump their unread counters,
+        in one transaction. Returns the number of notifications created.
+        """
+        recipient_ids = list(recipient_ids)
+        if not recipient_ids:
+            return 0
+        now = now or timezone.now()
+        with transaction.atomic():
+            Notification.objects.bulk_create([
+                Notification(recipient_id=recipient_id, kind=kind, actor_id=actor_id, data=data or {}, created_at=now)
+                for recipient_id in recipient_ids
+            ])
+            NotificationCounter.increment(recipient_ids)
+        return len(recipient_ids)
+
+    @staticmethod
+    def mark_all_read(user, now=None):
+        """Mark every unread notification of user read with one UPDATE; returns how many"""
+        now = now or timezone.now()
+        with transaction.atomic():
+            updated = Notification.objects.filter(recipient=user, is_read=False).update(is_read=True, read_at=now)
+            NotificationCounter.objects.filter(user=user).update(unread=0)
+        return updated
+
+    def mark_read(self, now=None):
+        """Mark this notification read; returns False if it already was"""
+        now = now or timezone.now()
+        with transaction.atomic():
+            updated = Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True, read_at=now)
+            if updated:
+                NotificationCounter.objects.filter(user_id=self.recipient_id).update(
+                    unread=Greatest(models.F('unread') - 1, 0)
+                )
+        self.is_read, self.read_at = True, self.read_at or now
+        return bool(updated)
+
+
+class NotificationCounter(models.Model):
+    """
+    Denormalized unread count per user, kept in step with Notification
+    writes so reading it never counts rows.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter'
+    )
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} | {self.unread} unread"
+
+    @staticmethod
+    def increment(user_ids, by=1):
+        """Add ``by`` to the unread count of every user in user_ids (two statements)"""
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=models.F('unread') + by)
+
+    @staticmethod
+    def unread_for(user):
+        return NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first() or 0
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+
+from Montada.fieldsets import SparseFieldsetMixin
+from .models import Notification
+
+
+class NotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializer for inbox entries
+    """
+    actor_name = serializers.CharField(source='actor.name', read_only=True, default=None)
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'kind', 'actor', 'actor_name', 'data', 'is_read', 'read_at', 'created_at']
+        read_only_fields = fields
@@ -0,0 +1,174 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Followers.models import Follow, Mute
+from Mainapp.models import User
+from Signals.models import AssetClass, Instrument, Timeframe
+from Subscriptions.models import Subscription
+from .models import Notification, NotificationCounter
+
+
+@override_settings(NOTIFICATION_FANOUT_ASYNC=False, NOTIFICATION_FANOUT_BATCH_SIZE=2)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.analyst = User.objects.create_user(
+            username='analyst', email='analyst@example.com', password='pass-1234', user_type='analyst'
+        )
+        cls.traders = [
+            User.objects.create_user(
+                username=f'trader{i}', email=f'trader{i}@example.com', password='pass-1234', user_type='trader'
+            )
+            for i in range(5)
+        ]
+        for trader in cls.traders:
+            Follow.objects.create(
+                follower=trader, followed=cls.analyst, status=Follow.Status.ACCEPTED, is_active=True
+            )
+        Mute.objects.create(muter=cls.traders[0], muted=cls.analyst)
+        forex = AssetClass.objects.create(name='Forex')
+        cls.payload = {
+            'asset_class': forex.id,
+            'instrument': Instrument.objects.create(asset_class=forex, symbol='EURUSD').id,
+            'timeframe': Timeframe.objects.create(code='H1', name='1 Hour').id,
+            'direction': 'BUY', 'entry_price': '1.1', 'stop_loss': '1.0', 'take_profit': '1.2',
+            'confidence_level': 70,
+        }
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_new_signal_fans_out_to_unmuted_followers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.analyst).post(reverse('Signals:create_signal'), self.payload)
+        self.assertEqual(response.status_code, 201, response.data)
+        recipients = set(Notification.objects.values_list('recipient_id', flat=True))
+        self.assertEqual(recipients, {trader.id for trader in self.traders[1:]})
+
+        trader = self.traders[1]
+        client = self.client_for(trader)
+        self.assertEqual(client.get(reverse('Notifications:unread_count')).data['unread_count'], 1)
+        Notification.create_for([trader.id], Notification.Kind.FOLLOW_ACCEPTED, actor_id=self.analyst.id)
+
+        page = client.get(reverse('Notifications:notification_list'), {'page_size': 1}).data
+        self.assertEqual([n['kind'] for n in page['results']], ['FOLLOW_ACCEPTED'])
+        older = client.get(page['next']).data
+        self.assertEqual(older['results'][0]['data']['instrument'], 'EURUSD')
+
+        client.post(reverse('Notifications:mark_read', args=[older['results'][0]['id']]))
+        self.assertEqual(NotificationCounter.unread_for(trader), 1)
+        with self.assertNumQueries(4):  # savepoint, UPDATE notifications, UPDATE counter, release
+            response = client.post(reverse('Notifications:mark_all_read'))
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(client.get(reverse('Notifications:unread_count')).data['unread_count'], 0)
+        self.assertEqual(client.get(reverse('Notifications:notification_list'), {'unread': 1}).data['results'], [])
+
+    def test_publishing_a_draft_fans_out_once(self):
+        client = self.client_for(self.analyst)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('Signals:create_signal'), {**self.payload, 'status': 'DRAFT'})
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertFalse(Notification.objects.exists())
+
+        url = reverse('Signals:analyst_signal_update', args=[response.data['signal']['id']])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.patch(url, {'status': 'OPEN'}).status_code, 200)
+        recipients = sorted(Notification.objects.values_list('recipient_id', flat=True))
+        self.assertEqual(recipients, sorted(trader.id for trader in self.traders[1:]))
+
+        # Later changes to the published signal notify nobody again
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.patch(url, {'status': 'CLOSED'}).status_code, 200)
+        self.assertEqual(Notification.objects.count(), len(recipients))
+
+    def test_follow_accept_and_subscription_expiry_notify(self):
+        trader = User.objects.create_user(
+            username='new', email='new@example.com', password='pass-1234', user_type='trader'
+        )
+        follow = Follow.objects.create(follower=trader, followed=self.analyst)
+        with self.captureOnCommitCallbacks(execute=True):
+            follow.accept()
+        Subscription.objects.create(
+            user=trader, plan_type='monthly', status='active', end_date=timezone.now() - timedelta(days=1)
+        )
+        Subscription.expire_due_subscriptions()
+        self.assertEqual(
+            list(trader.notifications.order_by('id').values_list('kind', flat=True)),
+            [Notification.Kind.FOLLOW_ACCEPTED, Notification.Kind.SUBSCRIPTION_EXPIRED],
+        )
+        self.assertEqual(NotificationCounter.unread_for(trader), 2)
+
+    def test_daily_digest(self):
+        from django.core import mail
+
+        from Signals.models import TradingSignal
+        from .digest import send_daily_digests
+
+        User.objects.filter(pk__in=[trader.pk for trader in self.traders]).update(is_subscribed=True)
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='pass-1234', user_type='analyst', name='Other'
+        )
+        Follow.objects.create(follower=self.traders[1], followed=other, status=Follow.Status.ACCEPTED, is_active=True)
+        signal_fields = {
+            'asset_class_id': self.payload['asset_class'], 'instrument_id': self.payload['instrument'],
+            'timeframe_id': self.payload['timeframe'], 'direction': 'SELL', 'entry_price': '1.1',
+            'stop_loss': '1.2', 'take_profit': '1.0', 'confidence_level': 60,
+        }
+        TradingSignal.objects.create(analyst=self.analyst, **signal_fields)
+        TradingSignal.objects.create(analyst=other, **signal_fields)
+        TradingSignal.objects.create(analyst=other, status=TradingSignal.Status.DRAFT, **signal_fields)
+
+        with self.assertNumQueries(1 + 2 * 2 + 1):  # signals; users and follows per batch; last, empty page
+            recipients, sent = send_daily_digests(batch_size=2)
+        self.assertEqual((recipients, sent), (4, 4))
+        by_recipient = {message.to[0]: message for message in mail.outbox}
+        self.assertNotIn(self.traders[0].email, by_recipient)  # muted the analyst
+        both = by_recipient[self.traders[1].email]
+        self.assertEqual(both.subject, 'Your Montada digest: 2 new signals')
+        self.assertIn('EURUSD SELL', both.body)
+        self.assertIn('Other', both.alternatives[0][0])
+
+    def test_digest_batch_resends_only_unsent_after_disconnect(self):
+        import smtplib
+
+        from django.core.mail import EmailMessage
+
+        from .digest import send_batch
+
+        class DroppingConnection:
+            """Drops the connection on the third message, once"""
+            def __init__(self):
+                self.delivered, self.opened, self.dropped = [], 0, False
+
+            def open(self):
+                self.opened += 1
+
+            def close(self):
+                pass
+
+            def send_messages(self, messages):
+                if len(self.delivered) == 2 and not self.dropped:
+                    self.dropped = True
+                    raise smtplib.SMTPServerDisconnected()
+                self.delivered.extend(message.to[0] for message in messages)
+                return len(messages)
+
+        messages = [EmailMessage(to=[trader.email]) for trader in self.traders]
+        connection = DroppingConnection()
+        self.assertEqual(send_batch(connection, messages), 5)
+        self.assertEqual(connection.delivered, [trader.email for trader in self.traders])
+        self.assertEqual(connection.opened, 1)
+
+        # A second drop within the batch is not retried
+        connection = DroppingConnection()
+        connection.send_messages = mock.Mock(side_effect=smtplib.SMTPServerDisconnected())
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            send_batch(connection, messages)
+        self.assertEqual(connection.send_messages.call_count, 2)
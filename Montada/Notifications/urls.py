@@ -0,0 +1,16 @@
+from django.urls import path
+from .views import (
+    NotificationListView,
+    UnreadCountView,
+    MarkAllReadView,
+    MarkReadView
+)
+
+app_name = 'Notifications'
+
+urlpatterns = [
+    path('', NotificationListView.as_view(), name='notification_list'),
+    path('unread-count/', UnreadCountView.as_view(), name='unread_count'),
+    path('mark-all-read/', MarkAllReadView.as_view(), name='mark_all_read'),
+    path('<uuid:pk>/read/', MarkReadView.as_view(), name='mark_read'),
+]
@@ -0,0 +1,79 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from Montada.fieldsets import SparseQuerysetMixin
+from .models import Notification, NotificationCounter
+from .serializers import NotificationSerializer
+
+
+class NotificationCursorPagination(CursorPagination):
+    """
+    Inbox pages, newest first, with an opaque cursor: stable while new
+    notifications arrive, and no COUNT query
+    """
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class NotificationListView(SparseQuerysetMixin, generics.ListAPIView):
+    """
+    API endpoint for the user's notification inbox, newest first
+    Optional ?unread=1 for unread notifications only
+    Cursor-paginated (follow the next/previous links)
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(recipient=self.request.user).select_related('actor')
+        if self.request.query_params.get('unread', '').lower() in ('1', 'true', 'yes'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+
+class UnreadCountView(APIView):
+    """
+    API endpoint for the user's unread notification count, read from the
+    denormalized counter
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': NotificationCounter.unread_for(request.user)}, status=status.HTTP_200_OK)
+
+
+class MarkAllReadView(APIView):
+    """
+    API endpoint to mark every notification of the user read
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        updated = Notification.mark_all_read(request.user)
+        return Response({
+            'message': 'All notifications marked as read.',
+            'updated': updated,
+            'unread_count': 0,
+        }, status=status.HTTP_200_OK)
+
+
+class MarkReadView(APIView):
+    """
+    API endpoint to mark one notification of the user read
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        notification = get_object_or_404(Notification, pk=pk, recipient=request.user)
+        notification.mark_read()
+        return Response({
+            'message': 'Notification marked as read.',
+            'notification': NotificationSerializer(notification).data,
+            'unread_count': NotificationCounter.unread_for(request.user),
+        }, status=status.HTTP_200_OK)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TradingSignal, AssetClass, Instrument, Timeframe
+from .models import TradingSignal, ArchivedSignal, SignalEvent, AssetClass, Instrument, Timeframe
 
 
 @admin.register(AssetClass)
@@ -61,3 +61,41 @@ class TradingSignalAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(ArchivedSignal)
+class ArchivedSignalAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'analyst', 'instrument', 'direction', 'timeframe',
+        'status', 'deleted_at', 'created_at', 'archived_at'
+    )
+    list_filter = ('asset_class', 'status', 'archived_at')
+    search_fields = ('instrument__symbol', 'analyst__email', 'analyst__name')
+    ordering = ('-archived_at',)
+    actions = ['restore_signals']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description='Restore selected signals')
+    def restore_signals(self, request, queryset):
+        for archived in queryset:
+            archived.restore()
+        self.message_user(request, f'Restored {len(queryset)} signal(s).')
+
+
+@admin.register(SignalEvent)
+class SignalEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'signal_id', 'analyst', 'event_type', 'status', 'created_at')
+    list_filter = ('event_type', 'status', 'created_at')
+    search_fields = ('signal_id', 'analyst__email')
+    ordering = ('-created_at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
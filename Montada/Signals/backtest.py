@@ -0,0 +1,274 @@
+"""
+Backtesting of analyst signals against stored candles.
+
+``run_backtest`` replays every published signal of an analyst, or of an
+asset class, live or archived (drafts and soft-deleted signals excluded),
+against the candle store (Signals/candles.py) and reports, per signal,
+whether its take profit or its stop loss was hit first and when:
+
+  * a signal is filled at its entry price when it is created, and is
+    watched from the first candle opening at or after that moment;
+  * BUY signals hit the stop loss when a candle's low reaches it and the
+    take profit when its high does (the reverse for SELL);
+  * when one candle reaches both, the stop loss is assumed to come first;
+  * results are in R, multiples of the risk |entry - stop loss|: -1 for a
+    stop loss, |take profit - entry| / risk for a take profit.
+
+The equity curve adds up R in exit order; drawdown is measured from its
+running peak.
+
+Signals are grouped by instrument and split into chunks, and the chunks run
+in a process pool from the CLI and the background worker. Backtests small
+enough to run inside a request use INLINE_WORKERS processes, none beyond
+the request's own by default: starting processes would cost more than the
+work. Within a chunk the search is vectorized: every unresolved signal
+looks at its next ``window`` candles at once, and the window doubles on each
+pass, so the work follows how long signals take to resolve, not how much
+history is stored.
+
+Summaries are cached under a fingerprint of the signals and candles they
+were computed from, so any change to either computes a new one.
+
+Settings (all optional)::
+
+    BACKTEST = {
+        'TIMEFRAME': 'M1',
+        'WORKERS': None,            # processes; None uses every CPU
+        'CHUNK_SIGNALS': 50_000,
+        'CACHE_TIMEOUT': 24 * 3600,
+        'INLINE_MAX_SIGNALS': 20_000,
+        'INLINE_WORKERS': 1,        # processes for backtests run inside a request
+        'EQUITY_POINTS': 500,
+    }
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from Montada.cache import get_cache, get_or_compute
+from .backtest_engine import NO_DATA, STOP_LOSS, TAKE_PROFIT, UNRESOLVED, run_chunk
+from .candles import CandleStore, from_timestamp, get_store_root
+from .models import ArchivedSignal, TradingSignal
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'TIMEFRAME': 'M1',
+    'WORKERS': None,
+    'CHUNK_SIGNALS': 50_000,
+    'CACHE_TIMEOUT': 24 * 3600,
+    'INLINE_MAX_SIGNALS': 20_000,
+    'INLINE_WORKERS': 1,
+    'EQUITY_POINTS': 500,
+}
+
+CACHE_PREFIX = 'backtest:'
+
+_executor = None
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'BACKTEST', {}))
+    return config
+
+
+def scope_filter(analyst_id=None, asset_class_id=None):
+    if (analyst_id is None) == (asset_class_id is None):
+        raise ValueError('Backtest one analyst or one asset class.')
+    # One form for ids given as UUIDs (API) or strings (CLI), for the cache key
+    if analyst_id is not None:
+        return {'analyst_id': str(uuid.UUID(str(analyst_id)))}
+    return {'asset_class_id': str(uuid.UUID(str(asset_class_id)))}
+
+
+def signal_querysets(analyst_id=None, asset_class_id=None):
+    """The live and archived signals a backtest replays"""
+    scope = scope_filter(analyst_id, asset_class_id)
+    return [
+        model.objects.filter(deleted_at__isnull=True, **scope).exclude(status=TradingSignal.Status.DRAFT)
+        for model in (TradingSignal, ArchivedSignal)
+    ]
+
+
+def load_signals(analyst_id=None, asset_class_id=None):
+    """
+    The signals as columns: id, instrument_id (object arrays), created
+    (Unix seconds), buy (bool), entry, stop_loss, take_profit (float64)
+    """
+    rows = []
+    for queryset in signal_querysets(analyst_id, asset_class_id):
+        rows.extend(queryset.values_list(
+            'id', 'instrument_id', 'created_at', 'direction', 'entry_price', 'stop_loss', 'take_profit'
+        ).order_by().iterator(chunk_size=10_000))
+    count = len(rows)
+    ids, instruments, created, direction, entry, stop, target = zip(*rows) if rows else ([],) * 7
+    return {
+        'id': np.array(ids, dtype=object),
+        'instrument_id': np.array(instruments, dtype=object),
+        'created': np.fromiter((int(value.timestamp()) for value in created), dtype=np.int64, count=count),
+        'buy': np.array(direction, dtype=object) == TradingSignal.Direction.BUY,
+        'entry': np.array(entry, dtype=np.float64),
+        'stop_loss': np.array(stop, dtype=np.float64),
+        'take_profit': np.array(target, dtype=np.float64),
+    }
+
+
+def simulate(signals, timeframe=None, workers=None, chunk_signals=None, root=None):
+    """
+    Run ``load_signals`` columns against the candles: (outcome, exit time,
+    R) arrays in the same order. Instruments' chunks run in a process pool
+    when there is more than one chunk and more than one worker.
+    """
+    config = get_config()
+    timeframe = timeframe or config['TIMEFRAME']
+    workers = workers or config['WORKERS'] or os.cpu_count() or 1
+    chunk_signals = chunk_signals or config['CHUNK_SIGNALS']
+    root = str(root or get_store_root())
+
+    count = len(signals['created'])
+    outcomes = np.full(count, NO_DATA, dtype=np.int8)
+    exit_times = np.zeros(count, dtype=np.int64)
+    r = np.zeros(count, dtype=np.float64)
+
+    tasks = []
+    order = np.argsort(signals['instrument_id'].astype(str), kind='stable')
+    instruments = signals['instrument_id'][order]
+    bounds = np.flatnonzero(np.r_[True, instruments[1:] != instruments[:-1], True]) if count else []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        for start in range(lo, hi, chunk_signals):
+            part = order[start:min(start + chunk_signals, hi)]
+            tasks.append((part, (
+                root, timeframe, instruments[lo], signals['created'][part], signals['buy'][part],
+                signals['entry'][part], signals['stop_loss'][part], signals['take_profit'][part],
+            )))
+
+    if len(tasks) > 1 and workers > 1:
+        # Spawned workers: forking a process with open database connections and
+        # threads (the backtest worker, the cache client) is unsafe
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as pool:
+            results = list(pool.map(run_chunk, *zip(*(args for _, args in tasks))))
+    else:
+        results = [run_chunk(*args) for _, args in tasks]
+    for (part, _), (part_outcomes, part_exits, part_r) in zip(tasks, results):
+        outcomes[part], exit_times[part], r[part] = part_outcomes, part_exits, part_r
+    return outcomes, exit_times, r
+
+
+def summarize(outcomes, exit_times, r, equity_points=None):
+    """Counts, R statistics, max drawdown and a sampled equity curve"""
+    equity_points = equity_points or get_config()['EQUITY_POINTS']
+    closed = np.flatnonzero((outcomes == TAKE_PROFIT) | (outcomes == STOP_LOSS))
+    closed = closed[np.argsort(exit_times[closed], kind='stable')]
+    trades = r[closed]
+    equity = np.cumsum(trades)
+    peak = np.maximum.accumulate(np.r_[0.0, equity])[1:]
+    drawdown = peak - equity
+    wins = int((outcomes == TAKE_PROFIT).sum())
+    gross_loss = -trades[trades < 0].sum()
+
+    worst = int(drawdown.argmax()) if closed.size else None
+    sample = np.unique(np.linspace(0, closed.size - 1, min(closed.size, equity_points)).astype(np.int64))
+    return {
+        'signals': int(outcomes.size),
+        'take_profit': wins,
+        'stop_loss': int((outcomes == STOP_LOSS).sum()),
+        'unresolved': int((outcomes == UNRESOLVED).sum()),
+        'no_data': int((outcomes == NO_DATA).sum()),
+        'win_rate': round(wins / closed.size, 4) if closed.size else None,
+        'total_r': round(float(trades.sum()), 4),
+        'average_r': round(float(trades.mean()), 4) if closed.size else None,
+        'profit_factor': round(float(trades[trades > 0].sum() / gross_loss), 4) if gross_loss else None,
+        'max_drawdown_r': round(float(drawdown[worst]), 4) if closed.size else 0.0,
+        'max_drawdown_at': from_timestamp(exit_times[closed[worst]]) if closed.size else None,
+        'equity_curve': [
+            [from_timestamp(exit_times[closed[i]]), round(float(equity[i]), 4)] for i in sample
+        ],
+    }
+
+
+def run_backtest(analyst_id=None, asset_class_id=None, workers=None):
+    """(summary, signal ids, outcomes, exit times, R) for one scope"""
+    signals = load_signals(analyst_id, asset_class_id)
+    outcomes, exit_times, r = simulate(signals, workers=workers)
+    summary = summarize(outcomes, exit_times, r)
+    return summary, signals['id'], outcomes, exit_times, r
+
+
+def fingerprint(analyst_id=None, asset_class_id=None):
+    """
+    (cache key, number of signals) for a scope: changes whenever its signals
+    or their candles change
+    """
+    timeframe = get_config()['TIMEFRAME']
+    parts, count, instruments = [timeframe], 0, set()
+    for queryset in signal_querysets(analyst_id, asset_class_id):
+        stats = queryset.order_by().aggregate(count=Count('id'), latest=Max('updated_at'))
+        parts += [stats['count'], stats['latest']]
+        count += stats['count']
+        instruments.update(queryset.order_by().values_list('instrument_id', flat=True).distinct())
+    store = CandleStore()
+    for instrument_id in sorted(instruments, key=str):
+        parts += [instrument_id, store.series(instrument_id, timeframe).last_time()]
+    scope = scope_filter(analyst_id, asset_class_id)
+    digest = hashlib.sha256(repr((sorted(scope.items()), parts)).encode()).hexdigest()
+    return f'{CACHE_PREFIX}{digest}', count
+
+
+def cached_backtest(analyst_id=None, asset_class_id=None, workers=None, key=None):
+    """(summary, hit): the cached summary for the scope, computing it on a miss"""
+    key = key or fingerprint(analyst_id, asset_class_id)[0]
+
+    def compute():
+        summary = run_backtest(analyst_id, asset_class_id, workers=workers)[0]
+        summary['computed_at'] = timezone.now()
+        return summary, True
+
+    return get_or_compute(key, compute, get_config()['CACHE_TIMEOUT'], lock_timeout=3600)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='backtest')
+    return _executor
+
+
+def _run_in_worker(analyst_id, asset_class_id, key, scheduled_key):
+    close_old_connections()
+    try:
+        cached_backtest(analyst_id, asset_class_id, key=key)
+    except Exception:
+        logger.exception('Backtest of %s failed', scope_filter(analyst_id, asset_class_id))
+    finally:
+        get_cache().delete(scheduled_key)
+        close_old_connections()
+
+
+def get_or_schedule(analyst_id=None, asset_class_id=None):
+    """
+    The cached summary, computed inline when the scope has at most
+    INLINE_MAX_SIGNALS signals; otherwise None, with the backtest queued
+    in a background worker (once per scope at a time)
+    """
+    config = get_config()
+    key, count = fingerprint(analyst_id, asset_class_id)
+    summary = get_cache().get(key)
+    if summary is not None:
+        return summary
+    if count <= config['INLINE_MAX_SIGNALS']:
+        return cached_backtest(analyst_id, asset_class_id, workers=config['INLINE_WORKERS'], key=key)[0]
+    scheduled_key = f'{key}:scheduled'
+    if get_cache().add(scheduled_key, 1, config['CACHE_TIMEOUT']):
+        _get_executor().submit(_run_in_worker, analyst_id, asset_class_id, key, scheduled_key)
+    return None
@@ -0,0 +1,89 @@
+"""
+NumPy core of the backtester (see Signals/backtest.py).
+
+Kept free of models and the database so process pool workers can import
+it cheaply, including under the 'spawn' start method, where Django is not
+set up in the worker.
+"""
+import numpy as np
+
+from .candles import CandleStore
+
+# Outcomes
+TAKE_PROFIT = 1
+STOP_LOSS = -1
+UNRESOLVED = 0  # neither level reached in the stored candles
+NO_DATA = 2     # no candles from the signal's creation on, or no risk
+
+# Candles examined at once per signal: first window, largest window, and
+# the most cells (signals x window) held in memory at a time
+FIRST_WINDOW = 64
+MAX_WINDOW = 16_384
+MAX_CELLS = 4_000_000
+
+
+def first_hits(high, low, starts, buy, stop_loss, take_profit):
+    """
+    For each signal, the index of the first candle at or after ``starts``
+    that reaches its stop loss or take profit, and which: (exit index, -1
+    for none; outcome, STOP_LOSS / TAKE_PROFIT / UNRESOLVED)
+    """
+    candles, signals = len(high), len(starts)
+    exits = np.full(signals, -1, dtype=np.int64)
+    outcomes = np.full(signals, UNRESOLVED, dtype=np.int8)
+    position = starts.astype(np.int64)
+    active = np.flatnonzero(position < candles)
+    window = FIRST_WINDOW
+    while active.size:
+        offsets = np.arange(window)
+        still_open = []
+        for part in np.array_split(active, max(1, active.size * window // MAX_CELLS)):
+            index = position[part, None] + offsets
+            in_range = index < candles
+            np.minimum(index, candles - 1, out=index)
+            highs, lows = high[index], low[index]
+            is_buy = buy[part, None]
+            stop, target = stop_loss[part, None], take_profit[part, None]
+            stopped = np.where(is_buy, lows <= stop, highs >= stop) & in_range
+            reached = np.where(is_buy, highs >= target, lows <= target) & in_range
+            hit = stopped | reached
+            resolved = hit.any(axis=1)
+            first = hit.argmax(axis=1)[resolved]
+            rows = part[resolved]
+            exits[rows] = position[rows] + first
+            # Both levels inside one candle: assume the stop came first
+            outcomes[rows] = np.where(stopped[resolved, first], STOP_LOSS, TAKE_PROFIT)
+            still_open.append(part[~resolved])
+        active = np.concatenate(still_open)
+        position[active] += window
+        active = active[position[active] < candles]
+        window = min(window * 2, MAX_WINDOW)
+    return exits, outcomes
+
+
+def run_chunk(root, timeframe, instrument_id, created, buy, entry, stop_loss, take_profit):
+    """
+    Backtest signals of one instrument (runs in a worker process, without
+    the database). Returns (outcome, exit time, R) arrays.
+    """
+    candles = CandleStore(root).series(instrument_id, timeframe).columns()
+    outcomes = np.full(len(created), NO_DATA, dtype=np.int8)
+    exit_times = np.zeros(len(created), dtype=np.int64)
+    r = np.zeros(len(created), dtype=np.float64)
+    risk = np.abs(entry - stop_loss)
+    starts = np.searchsorted(candles.time, created, side='left')
+    valid = np.flatnonzero((risk > 0) & (starts < len(candles)))
+    if not valid.size:
+        return outcomes, exit_times, r
+
+    exits, hits = first_hits(
+        candles.high, candles.low, starts[valid], buy[valid], stop_loss[valid], take_profit[valid]
+    )
+    outcomes[valid] = hits
+    resolved = valid[hits != UNRESOLVED]
+    exit_times[resolved] = candles.time[exits[hits != UNRESOLVED]]
+    r[valid] = np.where(
+        hits == TAKE_PROFIT, np.abs(take_profit[valid] - entry[valid]) / risk[valid],
+        np.where(hits == STOP_LOSS, -1.0, 0.0),
+    )
+    return outcomes, exit_times, r
@@ -0,0 +1,304 @@
+"""
+Historical OHLCV candle store on local disk.
+
+Each instrument and timeframe is one series: a directory of column files,
+one per field, each a flat little-endian array with no header:
+
+    <CANDLE_STORE_ROOT>/<instrument id>/<timeframe code>/
+        time.i8      int64 open time, Unix seconds (UTC), strictly increasing
+        open.f8  high.f8  low.f8  close.f8  volume.f8     float64
+
+Series are append-only. ``append`` writes the value columns first and
+``time`` last, and a series' length is the length of ``time``, so a reader
+never sees a half-written row; a crash mid-append leaves trailing bytes in
+some value columns, which the next append trims. One writer per series at a
+time (the management commands), any number of readers.
+
+Reads memory-map the column files, and ``CandleSeries.read(start, end)``
+finds the range with a binary search on ``time`` and returns slices of the
+maps: no copy, and only the pages touched are read from disk.
+
+    series = CandleStore().series(instrument.id, 'M1')
+    series.import_csv('eurusd_m1.csv')
+    candles = series.read(start=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    candles.close[-1], len(candles)
+
+``downsample`` builds coarser timeframes (M5, H1, D1, W1, ...) from M1.
+"""
+import csv
+import os
+import re
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+
+COLUMNS = (
+    ('time', np.dtype('<i8')),
+    ('open', np.dtype('<f8')),
+    ('high', np.dtype('<f8')),
+    ('low', np.dtype('<f8')),
+    ('close', np.dtype('<f8')),
+    ('volume', np.dtype('<f8')),
+)
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+SUFFIXES = {np.dtype('<i8'): 'i8', np.dtype('<f8'): 'f8'}
+
+# Timeframe codes that can be cut into fixed-length bins, e.g. M15, H4, D1
+TIMEFRAME_CODE = re.compile(r'^(M|H|D|W)(\d+)$')
+UNIT_SECONDS = {'M': 60, 'H': 3600, 'D': 86400, 'W': 7 * 86400}
+# 1970-01-01 was a Thursday: weekly bins start on Mondays
+WEEK_OFFSET = 4 * 86400
+
+DEFAULT_CSV_CHUNK_ROWS = 500_000
+
+
+class CandleStoreError(Exception):
+    pass
+
+
+class Candles(NamedTuple):
+    """A range of candles as column arrays (views of the store when read)"""
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def empty(cls):
+        return cls(*(np.empty(0, dtype=dtype) for _, dtype in COLUMNS))
+
+
+def get_store_root():
+    return Path(getattr(settings, 'CANDLE_STORE_ROOT', Path(settings.BASE_DIR) / 'candles'))
+
+
+def timeframe_seconds(code):
+    """Bin length of a timeframe code in seconds, or CandleStoreError"""
+    match = TIMEFRAME_CODE.match(code)
+    if not match or int(match.group(2)) < 1:
+        raise CandleStoreError(f'Timeframe {code} has no fixed length.')
+    return UNIT_SECONDS[match.group(1)] * int(match.group(2))
+
+
+def to_timestamp(value):
+    """Unix seconds of an aware datetime, or an int passed through"""
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    return int(value.timestamp())
+
+
+def from_timestamp(seconds):
+    return datetime.fromtimestamp(int(seconds), tz=dt_timezone.utc)
+
+
+class CandleSeries:
+    """The candles of one instrument and timeframe (see module docstring)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def column_path(self, name, dtype):
+        return self.path / f'{name}.{SUFFIXES[dtype]}'
+
+    def __len__(self):
+        try:
+            return self.column_path('time', COLUMNS[0][1]).stat().st_size // 8
+        except FileNotFoundError:
+            return 0
+
+    def columns(self):
+        """Memory maps of every column, ``len(self)`` rows long"""
+        rows = len(self)
+        if not rows:
+            return Candles.empty()
+        return Candles(*(
+            np.memmap(self.column_path(name, dtype), dtype=dtype, mode='r', shape=(rows,))
+            for name, dtype in COLUMNS
+        ))
+
+    def last_time(self):
+        """Open time of the newest candle, or None"""
+        rows = len(self)
+        if not rows:
+            return None
+        with open(self.column_path('time', COLUMNS[0][1]), 'rb') as file:
+            file.seek((rows - 1) * 8)
+            return int(np.frombuffer(file.read(8), dtype=COLUMNS[0][1])[0])
+
+    def read(self, start=None, end=None):
+        """
+        Candles with start <= time < end (datetimes or Unix seconds; None is
+        unbounded), as slices of the memory maps
+        """
+        candles = self.columns()
+        if not len(candles):
+            return candles
+        lo = 0 if start is None else int(np.searchsorted(candles.time, to_timestamp(start), side='left'))
+        hi = len(candles) if end is None else int(np.searchsorted(candles.time, to_timestamp(end), side='left'))
+        return Candles(*(column[lo:hi] for column in candles))
+
+    def append(self, candles):
+        """
+        Append candles (any sequence of column arrays in COLUMN_NAMES order,
+        sorted by time). Candles not newer than the last stored one are
+        skipped. Returns the number appended.
+        """
+        time = np.asarray(candles[0], dtype=COLUMNS[0][1])
+        if len(time) > 1 and np.any(np.diff(time) <= 0):
+            raise CandleStoreError('Candle times must be strictly increasing.')
+        last = self.last_time()
+        skip = 0 if last is None else int(np.searchsorted(time, last, side='right'))
+        if skip == len(time):
+            return 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        rows = len(self)
+        # Value columns first, time last: time's length is the series length
+        for (name, dtype), values in reversed(list(zip(COLUMNS, candles))):
+            values = np.asarray(values, dtype=dtype)[skip:]
+            with open(self.column_path(name, dtype), 'ab') as file:
+                # Drop what an interrupted append left past the last row
+                file.truncate(rows * dtype.itemsize)
+                file.write(values.tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+        return len(time) - skip
+
+    def import_csv(self, file, chunk_rows=DEFAULT_CSV_CHUNK_ROWS):
+        """
+        Append the candles of a CSV file (a path or text file object):
+        ``time,open,high,low,close[,volume]`` per line, time as Unix seconds
+        or ISO 8601 UTC, in time order, with an optional header line. Parsed
+        and written ``chunk_rows`` at a time. Returns (rows read, appended).
+        """
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, newline='') as handle:
+                return self.import_csv(handle, chunk_rows)
+
+        first = file.readline()
+        if first and not is_header(first):
+            file = _chain(first, file)
+        read = appended = 0
+        while True:
+            lines = list(islice(file, chunk_rows))
+            if not lines:
+                return read, appended
+            candles = parse_csv_rows(lines)
+            read += len(candles)
+            appended += self.append(candles)
+
+    def downsample(self, source, seconds, offset=0):
+        """
+        Append to this series the bins of ``seconds`` built from ``source``
+        (normally M1) after the last stored bin. A bin is written once the
+        source has a candle in a later bin, so bins never change once
+        written. Returns the number appended.
+        """
+        last = self.last_time()
+        candles = source.read(start=None if last is None else last + seconds)
+        if not len(candles):
+            return 0
+        return self.append(resample(candles, seconds, offset, complete_only=True))
+
+
+class CandleStore:
+    """Series by instrument and timeframe code, under CANDLE_STORE_ROOT"""
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root is not None else get_store_root()
+
+    def series(self, instrument_id, timeframe_code):
+        if not timeframe_code.isalnum():
+            raise CandleStoreError(f'Invalid timeframe code {timeframe_code}.')
+        return CandleSeries(self.root / str(uuid.UUID(str(instrument_id))) / timeframe_code)
+
+    def downsample(self, instrument_id, timeframe_code, source_code='M1'):
+        """Build timeframe_code from source_code for one instrument"""
+        seconds = timeframe_seconds(timeframe_code)
+        if seconds <= timeframe_seconds(source_code) or seconds % timeframe_seconds(source_code):
+            raise CandleStoreError(f'{timeframe_code} is not a multiple of {source_code}.')
+        offset = WEEK_OFFSET if timeframe_code.startswith('W') else 0
+        return self.series(instrument_id, timeframe_code).downsample(
+            self.series(instrument_id, source_code), seconds, offset
+        )
+
+
+def resample(candles, seconds, offset=0, complete_only=False):
+    """
+    OHLCV bins of ``seconds`` (starting at ``offset`` past the epoch) from
+    finer candles. ``complete_only`` drops the last bin, which later candles
+    may still fall into.
+    """
+    if not len(candles):
+        return Candles.empty()
+    bins = (candles.time - offset) // seconds * seconds + offset
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.r_[starts[1:], len(bins)]
+    if complete_only:
+        starts, ends = starts[:-1], ends[:-1]
+    if not len(starts):
+        return Candles.empty()
+    # reduceat runs the last bin to the end of its input: cut it there
+    rows = slice(0, ends[-1])
+    return Candles(
+        time=bins[starts],
+        open=np.asarray(candles.open[starts]),
+        high=np.maximum.reduceat(candles.high[rows], starts),
+        low=np.minimum.reduceat(candles.low[rows], starts),
+        close=np.asarray(candles.close[ends - 1]),
+        volume=np.add.reduceat(candles.volume[rows], starts),
+    )
+
+
+def is_header(line):
+    field = line.split(',', 1)[0].strip()
+    try:
+        parse_time(field)
+    except ValueError:
+        return True
+    return False
+
+
+def parse_time(text):
+    """Unix seconds from Unix seconds or an ISO 8601 UTC timestamp"""
+    text = text.strip()
+    try:
+        return int(float(text))
+    except ValueError:
+        return int(np.datetime64(text.rstrip('Z'), 's').astype(np.int64))
+
+
+def parse_csv_rows(lines):
+    """Candles from CSV lines (see CandleSeries.import_csv)"""
+    rows = list(csv.reader(lines))
+    rows = [row for row in rows if row]
+    if not rows:
+        # A chunk of blank lines, e.g. at the end of the file
+        return Candles.empty()
+    width = len(rows[0])
+    if width not in (5, 6) or any(len(row) != width for row in rows):
+        raise CandleStoreError('Expected time,open,high,low,close[,volume] on every line.')
+    try:
+        time = np.fromiter((parse_time(row[0]) for row in rows), dtype=COLUMNS[0][1], count=len(rows))
+        values = np.array([row[1:] for row in rows], dtype=np.float64)
+    except ValueError as exc:
+        raise CandleStoreError(f'Invalid candle row: {exc}')
+    if width == 5:
+        values = np.column_stack([values, np.zeros(len(rows))])
+    return Candles(time, *values.T)
+
+
+def _chain(first, file):
+    yield first
+    yield from file
+
@@ -0,0 +1,83 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import TradingSignal
+
+
+class DateOrDateTimeField(serializers.DateTimeField):
+    """
+    Accepts an ISO 8601 datetime or a plain date (YYYY-MM-DD). A date means
+    the start of that day, or its last instant with ``end_of_day`` so that
+    an inclusive upper bound covers the whole day.
+    """
+    def __init__(self, *args, end_of_day=False, **kwargs):
+        self.end_of_day = end_of_day
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, value):
+        date = parse_date(value) if isinstance(value, str) else None
+        if date is None:
+            return super().to_internal_value(value)
+        return timezone.make_aware(datetime.combine(date, time.max if self.end_of_day else time.min))
+
+
+class SignalFilterSerializer(serializers.Serializer):
+    """
+    Query parameters accepted by SignalFilterBackend
+    """
+    asset_class = serializers.UUIDField(required=False)
+    instrument = serializers.UUIDField(required=False)
+    timeframe = serializers.UUIDField(required=False)
+    direction = serializers.ChoiceField(choices=TradingSignal.Direction.choices, required=False)
+    confidence_min = serializers.IntegerField(min_value=0, max_value=100, required=False)
+    confidence_max = serializers.IntegerField(min_value=0, max_value=100, required=False)
+    created_from = DateOrDateTimeField(required=False)
+    created_to = DateOrDateTimeField(required=False, end_of_day=True)
+
+    def validate(self, attrs):
+        if attrs.get('confidence_min', 0) > attrs.get('confidence_max', 100):
+            raise serializers.ValidationError({
+                'confidence_min': 'confidence_min cannot be greater than confidence_max.'
+            })
+        if 'created_from' in attrs and 'created_to' in attrs and attrs['created_from'] > attrs['created_to']:
+            raise serializers.ValidationError({
+                'created_from': 'created_from cannot be after created_to.'
+            })
+        return attrs
+
+
+class SignalFilterBackend(BaseFilterBackend):
+    """
+    Filter signal lists by query parameters:
+
+        ?asset_class=<uuid>&instrument=<uuid>&timeframe=<uuid>
+        &direction=BUY|SELL
+        &confidence_min=0..100&confidence_max=0..100   (inclusive)
+        &created_from=<date|datetime>&created_to=<date|datetime>   (inclusive)
+
+    Invalid values are answered with 400 and the field errors.
+    """
+    lookups = {
+        'asset_class': 'asset_class_id',
+        'instrument': 'instrument_id',
+        'timeframe': 'timeframe_id',
+        'direction': 'direction',
+        'confidence_min': 'confidence_level__gte',
+        'confidence_max': 'confidence_level__lte',
+        'created_from': 'created_at__gte',
+        'created_to': 'created_at__lte',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = {name: value for name, value in request.query_params.items() if name in self.lookups}
+        if not params:
+            return queryset
+        serializer = SignalFilterSerializer(data=params)
+        serializer.is_valid(raise_exception=True)
+        return queryset.filter(**{
+            self.lookups[name]: value for name, value in serializer.validated_data.items()
+        })
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Signals.models import ArchivedSignal
+
+
+class Command(BaseCommand):
+    help = (
+        'Move soft-deleted signals, and CLOSED signals not updated for a while, '
+        'into the archive table (run on a schedule, e.g. nightly)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--closed-after-days',
+            type=int,
+            default=getattr(settings, 'SIGNAL_ARCHIVE_CLOSED_AFTER_DAYS', 90),
+            help='Archive CLOSED signals last updated more than this many days ago (0 disables)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of signals moved per transaction',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        days = options['closed_after_days']
+        closed_before = now - timedelta(days=days) if days > 0 else None
+        archived = ArchivedSignal.archive_due_signals(
+            closed_before=closed_before, now=now, batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} signal(s).'))
@@ -0,0 +1,61 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Signals.backtest import NO_DATA, STOP_LOSS, TAKE_PROFIT, cached_backtest, run_backtest, scope_filter
+from Signals.candles import from_timestamp
+
+OUTCOME_NAMES = {TAKE_PROFIT: 'TAKE_PROFIT', STOP_LOSS: 'STOP_LOSS', NO_DATA: 'NO_DATA'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Backtest the signals of an analyst or an asset class against the stored '
+        'candles, printing the (cached) summary'
+    )
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group(required=True)
+        scope.add_argument('--analyst', help='Analyst user id')
+        scope.add_argument('--asset-class', help='Asset class id')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: BACKTEST WORKERS, or every CPU)')
+        parser.add_argument(
+            '--output',
+            help='Also write one CSV row per signal (id, outcome, exit time, R) to this file; always recomputes',
+        )
+
+    def handle(self, *args, **options):
+        scope = {'analyst_id': options['analyst'], 'asset_class_id': options['asset_class']}
+        try:
+            scope_filter(**scope)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['output']:
+            summary, ids, outcomes, exit_times, r = run_backtest(workers=options['workers'], **scope)
+            try:
+                with open(options['output'], 'w', newline='') as file:
+                    writer = csv.writer(file)
+                    writer.writerow(['signal_id', 'outcome', 'exit_time', 'r'])
+                    for signal_id, outcome, exit_time, result in zip(ids, outcomes, exit_times, r):
+                        writer.writerow([
+                            signal_id,
+                            OUTCOME_NAMES.get(int(outcome), 'UNRESOLVED'),
+                            from_timestamp(exit_time).isoformat() if exit_time else '',
+                            round(float(result), 4),
+                        ])
+            except OSError as exc:
+                raise CommandError(str(exc))
+            hit = False
+        else:
+            summary, hit = cached_backtest(workers=options['workers'], **scope)
+
+        self.stdout.write(
+            f"{summary['signals']} signal(s): {summary['take_profit']} take profit, "
+            f"{summary['stop_loss']} stop loss, {summary['unresolved']} unresolved, "
+            f"{summary['no_data']} without candles"
+        )
+        self.stdout.write(
+            f"Win rate {summary['win_rate']}, total {summary['total_r']}R, average {summary['average_r']}R, "
+            f"profit factor {summary['profit_factor']}, max drawdown {summary['max_drawdown_r']}R"
+        )
+        self.stdout.write(self.style.SUCCESS('Backtest loaded from cache.' if hit else 'Backtest computed.'))
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Signals.models import SignalEvent, SignalSnapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Snapshot signals with many events since their last snapshot, and prune '
+        'old events the snapshots cover (run on a schedule, e.g. nightly)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=getattr(settings, 'SIGNAL_EVENT_SNAPSHOT_EVERY', 50),
+            help='Snapshot signals with at least this many events since their last snapshot',
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=getattr(settings, 'SIGNAL_EVENT_RETENTION_DAYS', 0),
+            help='Prune snapshotted events older than this many days (0 keeps all events)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of snapshots written, or events deleted, per query',
+        )
+
+    def handle(self, *args, **options):
+        taken = SignalSnapshot.take_due_snapshots(every=options['every'], batch_size=options['batch_size'])
+        pruned = 0
+        if options['retention_days'] > 0:
+            before = timezone.now() - timedelta(days=options['retention_days'])
+            pruned = SignalEvent.prune(before, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {taken} snapshot(s), pruned {pruned} event(s).'))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Signals.candles import CandleStore, CandleStoreError, timeframe_seconds
+from Signals.management.commands.import_candles import get_instrument
+from Signals.models import Instrument, Timeframe
+
+
+class Command(BaseCommand):
+    help = (
+        'Build coarser timeframes from stored M1 candles, appending only the bins '
+        'completed since the last run (run after each import, or on a schedule)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instrument', help='Instrument id or symbol (default: every active instrument)')
+        parser.add_argument(
+            '--timeframe',
+            action='append',
+            dest='timeframes',
+            help='Timeframe code to build; repeatable (default: every active fixed-length timeframe)',
+        )
+        parser.add_argument('--source', default='M1', help='Timeframe code to build from (default M1)')
+
+    def handle(self, *args, **options):
+        source = options['source']
+        if options['instrument']:
+            instruments = [get_instrument(options['instrument'])]
+        else:
+            instruments = Instrument.objects.filter(is_active=True)
+
+        codes = options['timeframes']
+        if not codes:
+            codes = []
+            for code in Timeframe.objects.filter(is_active=True).values_list('code', flat=True):
+                try:
+                    seconds = timeframe_seconds(code)
+                except CandleStoreError:
+                    continue
+                if seconds > timeframe_seconds(source) and not seconds % timeframe_seconds(source):
+                    codes.append(code)
+
+        store = CandleStore()
+        appended = 0
+        for instrument in instruments:
+            if not len(store.series(instrument.pk, source)):
+                continue
+            for code in codes:
+                try:
+                    appended += store.downsample(instrument.pk, code, source_code=source)
+                except CandleStoreError as exc:
+                    raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'Appended {appended} candle(s).'))
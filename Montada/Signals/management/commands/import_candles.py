@@ -0,0 +1,49 @@
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Signals.candles import DEFAULT_CSV_CHUNK_ROWS, CandleStore, CandleStoreError
+from Signals.models import Instrument
+
+
+def get_instrument(value):
+    """An Instrument by id or symbol, or CommandError"""
+    try:
+        instruments = Instrument.objects.filter(pk=uuid.UUID(value))
+    except ValueError:
+        instruments = Instrument.objects.filter(symbol=value)
+    instruments = list(instruments[:2])
+    if len(instruments) != 1:
+        raise CommandError(f'{"No" if not instruments else "More than one"} instrument matches {value}.')
+    return instruments[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Append candles from CSV files (time,open,high,low,close[,volume], in time '
+        'order) to the candle store'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='CSV files, imported in the order given')
+        parser.add_argument('--instrument', required=True, help='Instrument id or symbol')
+        parser.add_argument('--timeframe', default='M1', help='Timeframe code of the candles (default M1)')
+        parser.add_argument(
+            '--chunk-rows',
+            type=int,
+            default=DEFAULT_CSV_CHUNK_ROWS,
+            help='Number of CSV rows parsed and appended at a time',
+        )
+
+    def handle(self, *args, **options):
+        instrument = get_instrument(options['instrument'])
+        try:
+            series = CandleStore().series(instrument.pk, options['timeframe'])
+            for path in options['files']:
+                read, appended = series.import_csv(path, chunk_rows=options['chunk_rows'])
+                self.stdout.write(f'{path}: {read} row(s) read, {appended} appended')
+        except (CandleStoreError, OSError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f'{instrument.symbol} {options["timeframe"]} now holds {len(series)} candle(s).'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from Signals.models import SignalConsensus
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the per-instrument, per-timeframe consensus totals from all '
+        'OPEN signals (after bulk or admin changes, or on a schedule)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of consensus rows written per INSERT',
+        )
+
+    def handle(self, *args, **options):
+        written = SignalConsensus.recompute(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed consensus for {written} instrument/timeframe pair(s).'))
@@ -1,7 +1,12 @@
-from django.db import models
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
-import uuid
+
+from Montada.ids import uuid7
 
 
 class ActiveSignalManager(models.Manager):
@@ -20,7 +25,7 @@ class AssetClass(models.Model):
     - Indices
     - Crypto
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     name = models.CharField(
         max_length=50,
@@ -53,7 +58,7 @@ class Instrument(models.Model):
     Indices    -> NAS100, US30
     Crypto     -> BTC/USD, ETH/USD
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     asset_class = models.ForeignKey(
         AssetClass,
@@ -97,7 +102,7 @@ class Timeframe(models.Model):
     - H4 (4 hours)
     - D1 (1 day)
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     code = models.CharField(
         max_length=5,
@@ -133,7 +138,7 @@ class TradingSignal(models.Model):
     # -------------------------
     # PRIMARY KEY
     # -------------------------
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     
     # -------------------------
     # ENUM / CHOICES
@@ -231,6 +236,29 @@ class TradingSignal(models.Model):
     objects = models.Manager()  # Default manager (includes all signals)
     active = ActiveSignalManager()  # Manager that excludes soft-deleted signals
 
+    class Meta:
+        indexes = [
+            # my-signals, optionally filtered by status, newest first
+            models.Index(
+                fields=['analyst', 'deleted_at', 'status', 'created_at'],
+                name='signal_analyst_status_idx',
+            ),
+            # Signals of one instrument by status, newest first
+            models.Index(
+                fields=['instrument', 'status', 'created_at'],
+                name='signal_instrument_status_idx',
+            ),
+            # ActiveSignalManager: only live rows, per analyst, newest first
+            models.Index(
+                fields=['analyst', 'created_at'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='signal_active_analyst_idx',
+            ),
+            # Delta sync: one analyst's signals changed since a token
+            # (removals use signal_analyst_status_idx on deleted_at)
+            models.Index(fields=['analyst', 'updated_at'], name='signal_analyst_updated_idx'),
+        ]
+
     # -------------------------
     # VALIDATION
     # -------------------------
@@ -248,12 +276,12 @@ class TradingSignal(models.Model):
     def soft_delete(self):
         """Soft delete the signal by setting deleted_at timestamp"""
         self.deleted_at = timezone.now()
-        self.save(update_fields=['deleted_at'])
+        self.save(update_fields=['deleted_at', 'updated_at'])
     
     def restore(self):
         """Restore a soft-deleted signal"""
         self.deleted_at = None
-        self.save(update_fields=['deleted_at'])
+        self.save(update_fields=['deleted_at', 'updated_at'])
     
     @property
     def is_deleted(self):
@@ -263,4 +291,583 @@ class TradingSignal(models.Model):
     def __str__(self):
         instrument_symbol = self.instrument.symbol if self.instrument else "N/A"
         timeframe_code = self.timeframe.code if self.timeframe else "N/A"
-        return f"{instrument_symbol} | {self.direction} | {timeframe_code}"
\ No newline at end of file
+        return f"{instrument_symbol} | {self.direction} | {timeframe_code}"
+
+
+class ArchivedSignal(models.Model):
+    """
+    Cold storage for signals moved out of TradingSignal by the
+    archive_signals command: soft-deleted signals, and CLOSED signals not
+    updated for SIGNAL_ARCHIVE_CLOSED_AFTER_DAYS. Same columns as
+    TradingSignal (ids and timestamps are kept), plus archived_at.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+
+    analyst = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_signals'
+    )
+    asset_class = models.ForeignKey(AssetClass, on_delete=models.CASCADE, related_name='archived_signals')
+    instrument = models.ForeignKey(Instrument, on_delete=models.CASCADE, related_name='archived_signals')
+    direction = models.CharField(max_length=4, choices=TradingSignal.Direction.choices)
+    entry_price = models.DecimalField(max_digits=12, decimal_places=5)
+    stop_loss = models.DecimalField(max_digits=12, decimal_places=5)
+    take_profit = models.DecimalField(max_digits=12, decimal_places=5)
+    timeframe = models.ForeignKey(Timeframe, on_delete=models.CASCADE, related_name='archived_signals')
+    confidence_level = models.PositiveSmallIntegerField()
+    analyst_note = models.TextField(blank=True, null=True)
+    is_active = models.BooleanField(default=True)
+    status = models.CharField(max_length=10, choices=TradingSignal.Status.choices)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Signal history: one analyst's archived signals, newest first
+            models.Index(fields=['analyst', 'created_at'], name='archived_signal_analyst_idx'),
+            # Delta sync: signals archived since a token
+            models.Index(fields=['analyst', 'archived_at'], name='archived_signal_synced_idx'),
+        ]
+
+    @staticmethod
+    def signal_field_names():
+        """Concrete TradingSignal columns, which ArchivedSignal mirrors"""
+        return [field.attname for field in TradingSignal._meta.concrete_fields]
+
+    @staticmethod
+    def archive_due_signals(closed_before=None, now=None, batch_size=1000):
+        """
+        Move soft-deleted signals, and CLOSED signals last updated before
+        ``closed_before``, into the archive table. Each batch is copied and
+        deleted from TradingSignal in one transaction. Returns the number of
+        signals archived.
+        """
+        now = now or timezone.now()
+        due = models.Q(deleted_at__isnull=False)
+        if closed_before is not None:
+            due |= models.Q(status=TradingSignal.Status.CLOSED, updated_at__lt=closed_before)
+        field_names = ArchivedSignal.signal_field_names()
+        archived = 0
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    TradingSignal.objects.filter(due)
+                    .select_for_update()
+                    .values(*field_names)[:batch_size]
+                )
+                if not rows:
+                    break
+                ArchivedSignal.objects.bulk_create(
+                    [ArchivedSignal(**row, archived_at=now) for row in rows]
+                )
+                TradingSignal.objects.filter(id__in=[row['id'] for row in rows]).delete()
+            archived += len(rows)
+        return archived
+
+    def restore(self):
+        """
+        Move this signal back into TradingSignal and return it, with
+        deleted_at cleared through TradingSignal.restore. created_at is kept;
+        updated_at is set to now, so a restored CLOSED signal is not archived
+        again on the next run.
+        """
+        with transaction.atomic():
+            values = {name: getattr(self, name) for name in self.signal_field_names()}
+            signal = TradingSignal(**values)
+            signal.save(force_insert=True)
+            # created_at is auto_now_add; put the original back
+            TradingSignal.objects.filter(pk=signal.pk).update(created_at=self.created_at)
+            signal.created_at = self.created_at
+            if signal.is_deleted:
+                signal.restore()
+            self.delete()
+        return signal
+
+
+class SignalEvent(models.Model):
+    """
+    Append-only log of changes to trading signals, written by the signal
+    views in the same transaction as the change itself.
+
+    ``changes`` holds only the tracked fields that changed, as JSON values
+    (ids and decimals as strings), except for CREATED events and a draft's
+    first non-draft status, which carry the full state. Replaying a signal's
+    events in order, on top of its latest SignalSnapshot, rebuilds its state
+    at any point in time (see ``replay``).
+
+    Events outlive the signal row (there is no foreign key to it), so
+    archived signals keep their history. Ids are time-ordered (uuid7) and
+    serve as the cursor for consumers reading the log.
+    """
+    class EventType(models.TextChoices):
+        CREATED = 'CREATED', 'Created'
+        UPDATED = 'UPDATED', 'Updated'
+        STATUS_CHANGED = 'STATUS_CHANGED', 'Status changed'
+        DELETED = 'DELETED', 'Deleted'
+        RESTORED = 'RESTORED', 'Restored'
+
+    TRACKED_FIELDS = (
+        'asset_class', 'instrument', 'timeframe', 'direction',
+        'entry_price', 'stop_loss', 'take_profit', 'confidence_level',
+        'analyst_note', 'is_active', 'status', 'deleted_at',
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    signal_id = models.UUIDField()
+    analyst = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='signal_events'
+    )
+    event_type = models.CharField(max_length=16, choices=EventType.choices)
+    # The signal's status after this event, so consumers can skip drafts
+    status = models.CharField(max_length=10, choices=TradingSignal.Status.choices)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            # Replay: one signal's events in order
+            models.Index(fields=['signal_id', 'created_at'], name='signal_event_signal_idx'),
+            # Consumers: events of some analysts after a cursor
+            models.Index(fields=['analyst', 'id'], name='signal_event_analyst_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.signal_id} | {self.event_type} | {self.created_at}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Signal events are append-only.')
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def state_of(cls, signal):
+        """Tracked fields of a TradingSignal (or ArchivedSignal) as JSON values"""
+        encoder = DjangoJSONEncoder()
+        state = {}
+        for name in cls.TRACKED_FIELDS:
+            field = signal._meta.get_field(name)
+            value = field.value_from_object(signal)
+            if isinstance(field, models.DecimalField) and value is not None:
+                # Same text whether the value came from the database or a request
+                value = format(Decimal(value).quantize(Decimal(1).scaleb(-field.decimal_places)), 'f')
+            elif value is not None and not isinstance(value, (str, int, bool)):
+                value = encoder.default(value)
+            state[name] = value
+        return state
+
+    @classmethod
+    def record(cls, signal, event_type, before=None):
+        """
+        Append an event for ``signal`` after a change. ``before`` is
+        ``state_of(signal)`` from before the change (None for CREATED).
+        An UPDATED event that only changed the status is recorded as
+        STATUS_CHANGED, and one that changed nothing is not recorded.
+        """
+        after = cls.state_of(signal)
+        if before is None or (before['status'] == TradingSignal.Status.DRAFT != after['status']):
+            changes = after
+        else:
+            changes = {name: value for name, value in after.items() if before[name] != value}
+            if event_type == cls.EventType.UPDATED:
+                if not changes:
+                    return None
+                if set(changes) == {'status'}:
+                    event_type = cls.EventType.STATUS_CHANGED
+        return cls.objects.create(
+            signal_id=signal.pk,
+            analyst_id=signal.analyst_id,
+            event_type=event_type,
+            status=after['status'],
+            changes=changes,
+        )
+
+    @classmethod
+    def replay(cls, signal_id, at=None):
+        """
+        The state of a signal as of ``at`` (default now), rebuilt from its
+        latest snapshot at or before then and the events after it:
+        {'state': {...}, 'event_id': last event applied, 'event_at': its time}.
+        None when the signal has no history by then.
+        """
+        at = at or timezone.now()
+        snapshot = SignalSnapshot.objects.filter(
+            signal_id=signal_id, event_at__lte=at
+        ).order_by('-event_at', '-last_event_id').first()
+        events = cls.objects.filter(signal_id=signal_id, created_at__lte=at)
+        if snapshot is None:
+            state, event_id, event_at = {}, None, None
+        else:
+            state, event_id, event_at = dict(snapshot.state), snapshot.last_event_id, snapshot.event_at
+            events = events.filter(
+                models.Q(created_at__gt=event_at) | models.Q(created_at=event_at, id__gt=event_id)
+            )
+        for event in events.order_by('created_at', 'id'):
+            state.update(event.changes)
+            event_id, event_at = event.id, event.created_at
+        if event_id is None:
+            return None
+        return {'state': state, 'event_id': event_id, 'event_at': event_at}
+
+    @staticmethod
+    def prune(before, batch_size=1000):
+        """
+        Delete events older than ``before`` that a snapshot already covers.
+        Replay before the oldest remaining event is then only as fine-grained
+        as the snapshots. Returns the number of events deleted.
+        """
+        covered = SignalSnapshot.objects.filter(signal_id=models.OuterRef('signal_id')).filter(
+            models.Q(event_at__gt=models.OuterRef('created_at'))
+            | models.Q(event_at=models.OuterRef('created_at'), last_event_id__gte=models.OuterRef('id'))
+        )
+        due = SignalEvent.objects.filter(created_at__lt=before).filter(models.Exists(covered))
+        pruned = 0
+        while True:
+            ids = list(due.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return pruned
+            pruned += SignalEvent.objects.filter(id__in=ids).delete()[0]
+
+
+class SignalSnapshot(models.Model):
+    """
+    A signal's replayed state as of one of its events, so replay does not
+    have to start from the first event. Written by the compact_signal_events
+    command.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    signal_id = models.UUIDField()
+    state = models.JSONField(encoder=DjangoJSONEncoder)
+    # The last event folded into state
+    last_event_id = models.UUIDField()
+    event_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['signal_id', 'event_at'], name='signal_snapshot_signal_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.signal_id} | {self.event_at}"
+
+    @staticmethod
+    def take_due_snapshots(every=50, batch_size=1000):
+        """
+        Snapshot every signal with at least ``every`` events since its last
+        snapshot. Returns the number of snapshots written.
+        """
+        last_snapshot = SignalSnapshot.objects.filter(
+            signal_id=models.OuterRef('signal_id')
+        ).order_by('-event_at').values('event_at')[:1]
+        due = (
+            SignalEvent.objects.annotate(snapshot_at=models.Subquery(last_snapshot))
+            .filter(models.Q(snapshot_at__isnull=True) | models.Q(created_at__gt=models.F('snapshot_at')))
+            .order_by()
+            .values('signal_id')
+            .annotate(pending=models.Count('id'))
+            .filter(pending__gte=every)
+            .values_list('signal_id', flat=True)
+        )
+        signal_ids = list(due)
+        taken = 0
+        for start in range(0, len(signal_ids), batch_size):
+            snapshots = []
+            for signal_id in signal_ids[start:start + batch_size]:
+                replayed = SignalEvent.replay(signal_id)
+                snapshots.append(SignalSnapshot(
+                    signal_id=signal_id,
+                    state=replayed['state'],
+                    last_event_id=replayed['event_id'],
+                    event_at=replayed['event_at'],
+                ))
+            SignalSnapshot.objects.bulk_create(snapshots)
+            taken += len(snapshots)
+        return taken
+
+
+class InstrumentActivityBucket(models.Model):
+    """
+    Sliding-window activity counters for trending instruments: the number of
+    signals published on an instrument, and the followers they reached, per
+    time bucket. ``record_signal`` bumps the current bucket of each
+    resolution when a signal is published and deletes the instrument's
+    buckets that have left every window, so the table stays at a few hundred
+    rows per instrument and a window's totals are a SUM over at most 168 of
+    them.
+
+    A window covers whole buckets, so it reaches back up to one bucket
+    further than its nominal length (5 minutes for 1h, an hour for 24h/7d).
+    """
+    # window -> (length, bucket resolution in seconds)
+    WINDOWS = {
+        '1h': (timedelta(hours=1), 300),
+        '24h': (timedelta(hours=24), 3600),
+        '7d': (timedelta(days=7), 3600),
+    }
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    instrument = models.ForeignKey(
+        Instrument,
+        on_delete=models.CASCADE,
+        related_name='activity_buckets'
+    )
+    resolution = models.PositiveIntegerField(help_text="Bucket length in seconds")
+    bucket_start = models.DateTimeField()
+    signals = models.PositiveIntegerField(default=0)
+    followers_reached = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['instrument', 'resolution', 'bucket_start'],
+                name='activity_bucket_unique',
+            ),
+        ]
+        indexes = [
+            # Trending: every instrument's buckets in a window
+            models.Index(fields=['resolution', 'bucket_start'], name='activity_bucket_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.instrument_id} | {self.resolution}s | {self.bucket_start}"
+
+    @staticmethod
+    def bucket_for(moment, resolution):
+        """Start of the bucket of ``resolution`` seconds that holds ``moment``"""
+        seconds = int(moment.timestamp())
+        return datetime.fromtimestamp(seconds - seconds % resolution, tz=dt_timezone.utc)
+
+    @classmethod
+    def resolutions(cls):
+        """{resolution: longest window kept at it}"""
+        kept = {}
+        for length, resolution in cls.WINDOWS.values():
+            kept[resolution] = max(length, kept.get(resolution, length))
+        return kept
+
+    @classmethod
+    def window_start(cls, window, now=None):
+        """(resolution, first bucket_start) of a window ending at ``now``"""
+        length, resolution = cls.WINDOWS[window]
+        return resolution, cls.bucket_for((now or timezone.now()) - length, resolution)
+
+    @classmethod
+    def record_signal(cls, signal, now=None):
+        """
+        Count a newly published signal, and its analyst's followers, in the
+        current buckets of its instrument. Call it in the transaction that
+        publishes the signal.
+        """
+        from Followers.models import Follow, Mute
+
+        now = now or timezone.now()
+        reached = Follow.objects.filter(
+            followed_id=signal.analyst_id,
+            status=Follow.Status.ACCEPTED,
+            is_active=True,
+        ).exclude(
+            follower_id__in=Mute.objects.filter(muted_id=signal.analyst_id).values('muter_id')
+        ).count()
+
+        kept = cls.resolutions()
+        starts = {resolution: cls.bucket_for(now, resolution) for resolution in kept}
+        # Make sure the buckets exist, then bump them in one UPDATE
+        cls.objects.bulk_create(
+            [
+                cls(instrument_id=signal.instrument_id, resolution=resolution, bucket_start=start)
+                for resolution, start in starts.items()
+            ],
+            ignore_conflicts=True,
+        )
+        current = models.Q()
+        expired = models.Q()
+        for resolution, start in starts.items():
+            current |= models.Q(resolution=resolution, bucket_start=start)
+            oldest = cls.bucket_for(now - kept[resolution], resolution)
+            expired |= models.Q(resolution=resolution, bucket_start__lt=oldest)
+        cls.objects.filter(current, instrument_id=signal.instrument_id).update(
+            signals=models.F('signals') + 1,
+            followers_reached=models.F('followers_reached') + reached,
+        )
+        # Lazy expiry: only this instrument's stale buckets, which are few
+        cls.objects.filter(expired, instrument_id=signal.instrument_id).delete()
+
+    @classmethod
+    def trending(cls, window, by='signals', limit=10, now=None):
+        """
+        The ``limit`` instruments with the highest ``by`` ('signals' or
+        'followers_reached') over the window, as
+        [{'instrument': id, 'signals': n, 'followers_reached': n}, ...]
+        """
+        resolution, start = cls.window_start(window, now)
+        # Annotation names cannot shadow the fields they sum
+        totals = {'signals': 'signals_total', 'followers_reached': 'followers_total'}
+        tiebreak = 'followers_reached' if by == 'signals' else 'signals'
+        rows = (
+            cls.objects.filter(resolution=resolution, bucket_start__gte=start)
+            .order_by()
+            .values('instrument')
+            .annotate(signals_total=models.Sum('signals'), followers_total=models.Sum('followers_reached'))
+            .order_by(f'-{totals[by]}', f'-{totals[tiebreak]}', 'instrument')[:limit]
+        )
+        return [
+            {
+                'instrument': row['instrument'],
+                'signals': row['signals_total'],
+                'followers_reached': row['followers_total'],
+            }
+            for row in rows
+        ]
+
+
+class SignalConsensus(models.Model):
+    """
+    Running totals over the OPEN, non-deleted signals of one instrument and
+    timeframe, from which the consensus (BUY/SELL split and averages) is
+    read in one row. The signal views keep it current with ``apply`` in the
+    same transaction as each change; ``recompute`` rebuilds every row from
+    TradingSignal, for drift from changes made outside the views (admin,
+    shell).
+
+    Distances are absolute: |entry - stop loss| and |take profit - entry|.
+    """
+    SUM_FIELDS = (
+        'open_count', 'buy_count', 'sell_count',
+        'entry_sum', 'stop_distance_sum', 'target_distance_sum', 'confidence_sum',
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    instrument = models.ForeignKey(
+        Instrument,
+        on_delete=models.CASCADE,
+        related_name='consensus'
+    )
+    timeframe = models.ForeignKey(
+        Timeframe,
+        on_delete=models.CASCADE,
+        related_name='consensus'
+    )
+    open_count = models.IntegerField(default=0)
+    buy_count = models.IntegerField(default=0)
+    sell_count = models.IntegerField(default=0)
+    entry_sum = models.DecimalField(max_digits=24, decimal_places=5, default=0)
+    stop_distance_sum = models.DecimalField(max_digits=24, decimal_places=5, default=0)
+    target_distance_sum = models.DecimalField(max_digits=24, decimal_places=5, default=0)
+    confidence_sum = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['instrument', 'timeframe'], name='signal_consensus_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.instrument_id} | {self.timeframe_id} | {self.open_count} open"
+
+    @staticmethod
+    def contribution(state):
+        """
+        ((instrument id, timeframe id), {sum field: value}) for a signal's
+        ``SignalEvent.state_of`` state, or (None, None) if it does not count
+        """
+        if not state or state['status'] != TradingSignal.Status.OPEN or state['deleted_at'] is not None:
+            return None, None
+        entry = Decimal(state['entry_price'])
+        buy = state['direction'] == TradingSignal.Direction.BUY
+        return (state['instrument'], state['timeframe']), {
+            'open_count': 1,
+            'buy_count': int(buy),
+            'sell_count': int(not buy),
+            'entry_sum': entry,
+            'stop_distance_sum': abs(entry - Decimal(state['stop_loss'])),
+            'target_distance_sum': abs(Decimal(state['take_profit']) - entry),
+            'confidence_sum': state['confidence_level'],
+        }
+
+    @classmethod
+    def apply(cls, before, after):
+        """
+        Fold a signal change into the totals. ``before`` and ``after`` are
+        its ``SignalEvent.state_of`` states around the change (None when it
+        did not exist). One UPDATE per affected row; nothing when the change
+        does not touch the consensus.
+        """
+        deltas = {}
+        for state, sign in ((before, -1), (after, 1)):
+            key, values = cls.contribution(state)
+            if key is None:
+                continue
+            total = deltas.setdefault(key, dict.fromkeys(cls.SUM_FIELDS, 0))
+            for name, value in values.items():
+                total[name] += sign * value
+        for (instrument_id, timeframe_id), values in deltas.items():
+            if not any(values.values()):
+                continue
+            cls.objects.bulk_create(
+                [cls(instrument_id=instrument_id, timeframe_id=timeframe_id)], ignore_conflicts=True
+            )
+            cls.objects.filter(instrument_id=instrument_id, timeframe_id=timeframe_id).update(
+                updated_at=timezone.now(),
+                **{name: models.F(name) + value for name, value in values.items() if value},
+            )
+
+    @staticmethod
+    def recompute(batch_size=1000):
+        """
+        Rebuild every row with one GROUP BY over the OPEN signals. Changes
+        committed while it runs may be missed until the next run. Returns
+        the number of rows written.
+        """
+        from django.db.models.functions import Abs
+
+        distance = models.DecimalField(max_digits=13, decimal_places=5)
+        rows = (
+            TradingSignal.active.filter(status=TradingSignal.Status.OPEN)
+            .order_by()
+            .values('instrument_id', 'timeframe_id')
+            .annotate(
+                open_count=models.Count('id'),
+                buy_count=models.Count('id', filter=models.Q(direction=TradingSignal.Direction.BUY)),
+                sell_count=models.Count('id', filter=models.Q(direction=TradingSignal.Direction.SELL)),
+                entry_sum=models.Sum('entry_price'),
+                stop_distance_sum=models.Sum(
+                    Abs(models.F('entry_price') - models.F('stop_loss'), output_field=distance)
+                ),
+                target_distance_sum=models.Sum(
+                    Abs(models.F('take_profit') - models.F('entry_price'), output_field=distance)
+                ),
+                confidence_sum=models.Sum('confidence_level'),
+            )
+        )
+        with transaction.atomic():
+            consensus = [SignalConsensus(**row) for row in rows]
+            SignalConsensus.objects.all().delete()
+            SignalConsensus.objects.bulk_create(consensus, batch_size=batch_size)
+        return len(consensus)
+
+    def summary(self):
+        """The consensus as averages, None where there are no open signals"""
+        count = self.open_count
+
+        def average(total, places):
+            if not count:
+                return None
+            return format((Decimal(total) / count).quantize(Decimal(1).scaleb(-places)), 'f')
+
+        return {
+            'open_signals': count,
+            'buy': self.buy_count,
+            'sell': self.sell_count,
+            'buy_percentage': average(self.buy_count * 100, 2),
+            'avg_entry_price': average(self.entry_sum, 5),
+            'avg_stop_distance': average(self.stop_distance_sum, 5),
+            'avg_target_distance': average(self.target_distance_sum, 5),
+            'avg_confidence': average(self.confidence_sum, 2),
+        }
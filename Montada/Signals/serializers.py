@@ -1,8 +1,10 @@
 from rest_framework import serializers
-from .models import TradingSignal, AssetClass, Instrument, Timeframe
 
+from Montada.fieldsets import SparseFieldsetMixin
+from .models import TradingSignal, AssetClass, Instrument, Timeframe, SignalEvent
 
-class AssetClassSerializer(serializers.ModelSerializer):
+
+class AssetClassSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for AssetClass model
     """
@@ -12,7 +14,7 @@ class AssetClassSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at')
 
 
-class InstrumentSerializer(serializers.ModelSerializer):
+class InstrumentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Instrument model
     """
@@ -24,7 +26,7 @@ class InstrumentSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at')
 
 
-class TimeframeSerializer(serializers.ModelSerializer):
+class TimeframeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Timeframe model
     """
@@ -34,7 +36,7 @@ class TimeframeSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at')
 
 
-class TimeframeSimpleSerializer(serializers.ModelSerializer):
+class TimeframeSimpleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Simplified serializer for Timeframe model
     Returns only id, code, and name
@@ -45,7 +47,7 @@ class TimeframeSimpleSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class InstrumentNestedSerializer(serializers.ModelSerializer):
+class InstrumentNestedSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Simplified serializer for instruments when nested within asset classes
     Returns only id and name for active instruments
@@ -65,7 +67,7 @@ class InstrumentNestedSerializer(serializers.ModelSerializer):
         return obj.name if obj.name else obj.symbol
 
 
-class AssetClassWithInstrumentsSerializer(serializers.ModelSerializer):
+class AssetClassWithInstrumentsSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for AssetClass with nested instruments
     Returns only id and name for active asset classes and their active instruments
@@ -85,7 +87,7 @@ class AssetClassWithInstrumentsSerializer(serializers.ModelSerializer):
         return InstrumentNestedSerializer(active_instruments, many=True).data
 
 
-class TradingSignalSerializer(serializers.ModelSerializer):
+class TradingSignalSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for TradingSignal model
     """
@@ -162,3 +164,104 @@ class TradingSignalSerializer(serializers.ModelSerializer):
         
         return attrs
 
+
+
+class TradingSignalValuesSerializer:
+    """
+    Read-only fast path for signal list responses.
+
+    Renders rows fetched with ``queryset.values()`` (one query, joins for the
+    analyst/asset class/instrument/timeframe columns) into exactly the output
+    of TradingSignalSerializer, without building model instances or walking
+    DRF's per-field attribute lookups. The column plan is derived once from
+    TradingSignalSerializer's fields, so both stay in step.
+
+        rows = TradingSignalValuesSerializer.values(queryset)
+        data = TradingSignalValuesSerializer(rows).data
+
+    ``fields`` limits both to a subset of the output fields (a sparse
+    fieldset); values() then only selects, and joins for, those columns.
+    """
+    serializer_class = TradingSignalSerializer
+    # values() already yields what these fields would render
+    passthrough_fields = (
+        serializers.CharField,
+        serializers.ChoiceField,
+        serializers.IntegerField,
+        serializers.BooleanField,
+        serializers.PrimaryKeyRelatedField,
+    )
+    _plan = None
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.fields = fields
+
+    @classmethod
+    def build_plan(cls):
+        """[(output name, values() lookup, formatter or None)] in output order"""
+        plan = []
+        for name, field in cls.serializer_class().fields.items():
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                lookup = f'{field.source}_id'
+            else:
+                lookup = field.source.replace('.', '__')
+            if isinstance(field, (serializers.DecimalField, serializers.DateTimeField)):
+                formatter = field.to_representation
+            elif isinstance(field, serializers.UUIDField):
+                formatter = str
+            elif isinstance(field, cls.passthrough_fields):
+                formatter = None
+            else:
+                raise TypeError(f'{cls.__name__} cannot render {name} ({type(field).__name__}) from values()')
+            plan.append((name, lookup, formatter))
+        return plan
+
+    @classmethod
+    def get_plan(cls, fields=None):
+        # Cached per class, so subclasses extending build_plan get their own
+        if cls.__dict__.get('_plan') is None:
+            cls._plan = cls.build_plan()
+        if fields is None:
+            return cls._plan
+        return [step for step in cls._plan if step[0] in fields]
+
+    @classmethod
+    def values(cls, queryset, fields=None):
+        return queryset.values(*[lookup for _, lookup, _ in cls.get_plan(fields)] or ['pk'])
+
+    @property
+    def data(self):
+        plan = self.get_plan(self.fields)
+        return [
+            {
+                name: row[lookup] if formatter is None or row[lookup] is None else formatter(row[lookup])
+                for name, lookup, formatter in plan
+            }
+            for row in self.rows
+        ]
+
+
+class SignalHistoryValuesSerializer(TradingSignalValuesSerializer):
+    """
+    TradingSignalValuesSerializer for signal history rows, which come from
+    both TradingSignal and ArchivedSignal: adds when each signal was deleted
+    and archived (null while it is live / still in the hot table)
+    """
+    @classmethod
+    def build_plan(cls):
+        to_datetime = serializers.DateTimeField().to_representation
+        return super().build_plan() + [
+            ('deleted_at', 'deleted_at', to_datetime),
+            ('archived_at', 'archived_at', to_datetime),
+        ]
+
+
+class SignalEventSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializer for signal event log entries
+    """
+    class Meta:
+        model = SignalEvent
+        fields = ['id', 'signal_id', 'analyst', 'event_type', 'status', 'changes', 'created_at']
+        read_only_fields = fields
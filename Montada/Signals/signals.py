@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Montada.cache import invalidate_tags_on_commit
+from .models import TradingSignal
+
+
+@receiver(post_save, sender=TradingSignal)
+def invalidate_signal_responses(sender, instance, created, using, **kwargs):
+    """The analyst list reports signals_count per analyst"""
+    if created:
+        invalidate_tags_on_commit('analysts', using=using)
+
+
+@receiver(post_delete, sender=TradingSignal)
+def invalidate_deleted_signal_responses(sender, instance, using, **kwargs):
+    invalidate_tags_on_commit('analysts', using=using)
@@ -1,3 +1,493 @@
+from datetime import timedelta
+from decimal import Decimal
+import tempfile
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+import numpy as np
+from rest_framework.test import APIClient
+
+from Mainapp.models import User
+from Followers.models import Follow, Mute
+from .backtest import ProcessPoolExecutor, load_signals, simulate
+from .candles import CandleStore, from_timestamp, parse_csv_rows
+from .models import (
+    ArchivedSignal, AssetClass, Instrument, InstrumentActivityBucket, SignalConsensus, SignalEvent, SignalSnapshot,
+    Timeframe, TradingSignal,
+)
+from .serializers import TradingSignalSerializer, TradingSignalValuesSerializer
+
+
+class SignalTestCase(TestCase):
+    """An analyst with three signals: a closed EURUSD, an open XAUUSD and an open EURUSD"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.analyst = User.objects.create_user(
+            username='analyst', email='analyst@example.com', password='pass-1234', user_type='analyst'
+        )
+        forex = AssetClass.objects.create(name='Forex')
+        eurusd = Instrument.objects.create(asset_class=forex, symbol='EURUSD', name='EUR/USD')
+        gold = Instrument.objects.create(asset_class=forex, symbol='XAUUSD', name=None)
+        h1 = Timeframe.objects.create(code='H1', name='1 Hour')
+        for i, (instrument, note, price) in enumerate([
+            (eurusd, 'Breakout', Decimal('1.1')),
+            (gold, None, Decimal('2411.12345')),
+            (eurusd, '', Decimal('0.00001')),
+        ]):
+            TradingSignal.objects.create(
+                analyst=cls.analyst, asset_class=forex, instrument=instrument, timeframe=h1,
+                direction='BUY' if i % 2 else 'SELL', entry_price=price, stop_loss=price, take_profit=price,
+                confidence_level=10 * i, analyst_note=note,
+                status=TradingSignal.Status.OPEN if i else TradingSignal.Status.CLOSED,
+            )
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+
+class TradingSignalValuesSerializerTests(SignalTestCase):
+    def test_matches_model_serializer_byte_for_byte(self):
+        queryset = TradingSignal.active.select_related(
+            'analyst', 'asset_class', 'instrument', 'timeframe'
+        ).order_by('-created_at')
+        expected = self.render(TradingSignalSerializer(queryset, many=True).data)
+        rows = TradingSignalValuesSerializer.values(queryset)
+        self.assertEqual(self.render(TradingSignalValuesSerializer(rows).data), expected)
+
+    def test_list_endpoint_uses_one_query_per_page(self):
+        client = APIClient()
+        client.force_authenticate(self.analyst)
+        queryset = TradingSignal.active.filter(analyst=self.analyst).order_by('-created_at')
+        # Pagination COUNT(*) + the page
+        with self.assertNumQueries(2):
+            response = client.get(reverse('Signals:analyst_signals_list'))
+        self.assertEqual(
+            self.render(response.data['results']),
+            self.render(TradingSignalSerializer(queryset, many=True).data),
+        )
+
+class SparseFieldsetTests(SignalTestCase):
+    def test_sparse_fieldset_trims_payload_and_query(self):
+        client = APIClient()
+        client.force_authenticate(self.analyst)
+        url = reverse('Signals:analyst_signals_list')
+        full = client.get(url).data['results']
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, {'fields': 'id,instrument_symbol,entry_price', 'omit': 'entry_price'})
+        self.assertEqual(
+            response.data['results'],
+            [{'id': row['id'], 'instrument_symbol': row['instrument_symbol']} for row in full],
+        )
+        page_sql = queries.captured_queries[-1]['sql']
+        self.assertIn('"symbol"', page_sql)
+        self.assertNotIn('"entry_price"', page_sql)
+        self.assertNotIn('Signals_timeframe', page_sql)
+
+
+class SignalFilterTests(SignalTestCase):
+    def test_list_filters(self):
+        client = APIClient()
+        client.force_authenticate(self.analyst)
+        url = reverse('Signals:analyst_signals_list')
+        gold = Instrument.objects.get(symbol='XAUUSD')
+
+        def ids(params):
+            response = client.get(url, params)
+            self.assertEqual(response.status_code, 200, response.data)
+            return {row['id'] for row in response.data['results']}
+
+        signals = TradingSignal.objects.all()
+        self.assertEqual(ids({'instrument': gold.id}), {str(s.id) for s in signals if s.instrument_id == gold.id})
+        self.assertEqual(ids({'direction': 'SELL'}), {str(s.id) for s in signals if s.direction == 'SELL'})
+        self.assertEqual(
+            ids({'confidence_min': 5, 'confidence_max': 10}),
+            {str(s.id) for s in signals if 5 <= s.confidence_level <= 10},
+        )
+        today = signals[0].created_at.date().isoformat()
+        self.assertEqual(ids({'created_from': today, 'created_to': today}), {str(s.id) for s in signals})
+        self.assertEqual(ids({'created_to': '2000-01-01'}), set())
+
+        response = client.get(url, {'confidence_min': 50, 'confidence_max': 10, 'direction': 'UP'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('direction', response.data)
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+    def test_list_queries_use_composite_indexes(self):
+        def plan(queryset):
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                return ' | '.join(row[-1] for row in cursor.fetchall())
+
+        mine = TradingSignal.active.filter(analyst=self.analyst).order_by('-created_at')
+        by_instrument = TradingSignal.active.filter(
+            instrument=Instrument.objects.get(symbol='EURUSD'), status=TradingSignal.Status.OPEN
+        ).order_by('-created_at')
+        cases = [
+            (mine, 'signal_active_analyst_idx'),
+            (mine.filter(status=TradingSignal.Status.OPEN), 'signal_analyst_status_idx'),
+            (by_instrument, 'signal_instrument_status_idx'),
+        ]
+        for queryset, index in cases:
+            with self.subTest(index=index):
+                query_plan = plan(queryset)
+                self.assertIn(f'USING INDEX {index}', query_plan)
+                # The index also provides the ordering
+                self.assertNotIn('TEMP B-TREE', query_plan)
+
+
+class ArchiveTests(SignalTestCase):
+    def test_archive_history_and_restore(self):
+        closed = TradingSignal.objects.get(status=TradingSignal.Status.CLOSED)
+        TradingSignal.objects.filter(pk=closed.pk).update(updated_at=timezone.now() - timedelta(days=91))
+        deleted = TradingSignal.objects.filter(status=TradingSignal.Status.OPEN).first()
+        deleted.soft_delete()
+        live = TradingSignal.objects.exclude(pk__in=[closed.pk, deleted.pk]).get()
+
+        call_command('archive_signals', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(TradingSignal.objects.values_list('pk', flat=True)), [live.pk])
+        self.assertEqual(ArchivedSignal.objects.get(pk=closed.pk).created_at, closed.created_at)
+
+        client = APIClient()
+        client.force_authenticate(self.analyst)
+        url = reverse('Signals:analyst_signal_history')
+        history = client.get(url).data['results']
+        self.assertEqual(
+            [row['id'] for row in history],
+            [str(s.id) for s in sorted([closed, deleted, live], key=lambda s: s.created_at, reverse=True)],
+        )
+        archived_ids = {row['id'] for row in history if row['archived_at']}
+        self.assertEqual(archived_ids, {str(closed.id), str(deleted.id)})
+        self.assertEqual({row['id'] for row in client.get(url, {'tier': 'archived'}).data['results']}, archived_ids)
+        self.assertEqual(client.get(url, {'tier': 'nope'}).status_code, 400)
+
+        response = client.post(reverse('Signals:analyst_signal_restore', args=[deleted.pk]))
+        self.assertEqual(response.status_code, 200, response.data)
+        restored = TradingSignal.active.get(pk=deleted.pk)
+        self.assertEqual(restored.created_at, deleted.created_at)
+        self.assertFalse(ArchivedSignal.objects.filter(pk=deleted.pk).exists())
+        response = client.post(reverse('Signals:analyst_signal_restore', args=[live.pk]))
+        self.assertEqual(response.status_code, 400)
+
+
+class SignalEventLogTests(SignalTestCase):
+    def test_event_log_replay_and_compaction(self):
+        client = APIClient()
+        client.force_authenticate(self.analyst)
+        signal = TradingSignal.objects.filter(status=TradingSignal.Status.OPEN).first()
+        payload = {
+            'asset_class': signal.asset_class_id, 'instrument': signal.instrument_id,
+            'timeframe': signal.timeframe_id, 'direction': signal.direction,
+            'entry_price': '1.2', 'stop_loss': signal.stop_loss, 'take_profit': signal.take_profit,
+            'confidence_level': signal.confidence_level,
+        }
+        response = client.post(reverse('Signals:create_signal'), payload)
+        self.assertEqual(response.status_code, 201, response.data)
+        pk = response.data['signal']['id']
+        client.put(reverse('Signals:analyst_signal_update', args=[pk]), {**payload, 'entry_price': '1.25'})
+        # An edit that changes nothing is not logged
+        client.put(reverse('Signals:analyst_signal_update', args=[pk]), {**payload, 'entry_price': '1.25000'})
+        client.patch(reverse('Signals:analyst_signal_update', args=[pk]), {'status': 'CLOSED'})
+        client.delete(reverse('Signals:analyst_signal_delete', args=[pk]))
+
+        events = list(SignalEvent.objects.filter(signal_id=pk))
+        self.assertEqual(
+            [event.event_type for event in events],
+            ['CREATED', 'UPDATED', 'STATUS_CHANGED', 'DELETED'],
+        )
+        self.assertEqual(events[1].changes, {'entry_price': '1.25000'})
+        self.assertEqual(events[2].changes, {'status': 'CLOSED'})
+
+        url = reverse('Signals:analyst_signal_replay', args=[pk])
+        state = client.get(url, {'at': events[1].created_at.isoformat()}).data['state']
+        self.assertEqual((state['entry_price'], state['status'], state['deleted_at']), ('1.25000', 'OPEN', None))
+        current = client.get(url).data
+        self.assertIsNotNone(current['state']['deleted_at'])
+        self.assertEqual(current['event_id'], str(events[-1].id))
+
+        # Snapshot, prune everything the snapshot covers: replay is unchanged
+        self.assertEqual(SignalSnapshot.take_due_snapshots(every=4), 1)
+        self.assertEqual(SignalEvent.prune(timezone.now() + timedelta(seconds=1)), 4)
+        replayed = client.get(url).data
+        self.assertEqual(
+            (replayed['state'], replayed['event_id']), (current['state'], current['event_id'])
+        )
+
+
+class DeltaSyncTests(SignalTestCase):
+    @override_settings(DELTA_SYNC={'OVERLAP_SECONDS': 0})
+    def test_delta_sync(self):
+        client = APIClient()
+        client.force_authenticate(self.analyst)
+        url = reverse('Signals:analyst_signals_sync')
+        full = client.get(url).data
+        self.assertTrue(full['full'])
+        self.assertEqual(len(full['changed']), TradingSignal.active.count())
+
+        empty = client.get(url, {'token': full['token']}).data
+        self.assertEqual((empty['full'], empty['changed'], empty['removed']), (False, [], []))
+
+        edited, deleted, archived = TradingSignal.objects.order_by('created_at')
+        client.patch(reverse('Signals:analyst_signal_update', args=[edited.pk]), {'status': 'DRAFT'})
+        archived.soft_delete()
+        ArchivedSignal.archive_due_signals()
+        deleted.soft_delete()
+        delta = client.get(url, {'token': empty['token'], 'fields': 'id,status'}).data
+        self.assertEqual(delta['changed'], [{'id': str(edited.pk), 'status': 'DRAFT'}])
+        self.assertEqual(set(delta['removed']), {str(deleted.pk), str(archived.pk)})
+
+        # Tokens of another list, or forged ones, get a full response
+        other = client.get(reverse('Followers:following_sync')).data['token']
+        self.assertTrue(client.get(url, {'token': other}).data['full'])
+        self.assertTrue(client.get(url, {'token': 'nope'}).data['full'])
+
+
+class TrendingInstrumentsTests(SignalTestCase):
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_trending_instruments(self):
+        eurusd, gold = Instrument.objects.order_by('symbol')
+        for n in range(3):
+            trader = User.objects.create_user(
+                username=f'trader{n}', email=f'trader{n}@example.com', password='pass-1234', user_type='trader'
+            )
+            Follow.objects.create(
+                follower=trader, followed=self.analyst, status=Follow.Status.ACCEPTED, is_active=True
+            )
+        Mute.objects.create(muter=trader, muted=self.analyst)
+
+        now = timezone.now()
+        signal = TradingSignal.objects.filter(instrument=eurusd).first()
+        # Two EURUSD signals two days ago (outside 24h), one gold signal now
+        InstrumentActivityBucket.record_signal(signal, now=now - timedelta(days=2))
+        InstrumentActivityBucket.record_signal(signal, now=now - timedelta(days=2))
+        client = APIClient()
+        client.force_authenticate(self.analyst)
+        payload = {
+            'asset_class': gold.asset_class_id, 'instrument': gold.id, 'timeframe': signal.timeframe_id,
+            'direction': 'BUY', 'entry_price': '1', 'stop_loss': '1', 'take_profit': '1', 'confidence_level': 5,
+        }
+        self.assertEqual(client.post(reverse('Signals:create_signal'), payload).status_code, 201)
+        # Drafts are not counted
+        client.post(reverse('Signals:create_signal'), {**payload, 'status': 'DRAFT'})
+
+        url = reverse('Signals:trending_instruments')
+        day = client.get(url).data['results']
+        self.assertEqual(
+            [(row['instrument']['symbol'], row['signals'], row['followers_reached']) for row in day],
+            [('XAUUSD', 1, 2)],
+        )
+        week = client.get(url, {'window': '7d', 'by': 'followers'}).data['results']
+        self.assertEqual([row['instrument']['symbol'] for row in week], ['EURUSD', 'XAUUSD'])
+        self.assertEqual(client.get(url, {'window': '1y'}).status_code, 400)
+        self.assertEqual(client.get(url, {'limit': 0}).status_code, 400)
+
+        # Recording a week later drops the instrument's buckets that left every window
+        InstrumentActivityBucket.record_signal(signal, now=now + timedelta(days=6))
+        self.assertEqual(
+            InstrumentActivityBucket.objects.filter(instrument=eurusd).count(), 2
+        )
+
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_publishing_a_draft_counts_once(self):
+        gold = Instrument.objects.get(symbol='XAUUSD')
+        client = APIClient()
+        client.force_authenticate(self.analyst)
+        payload = {
+            'asset_class': gold.asset_class_id, 'instrument': gold.id, 'timeframe': Timeframe.objects.get().id,
+            'direction': 'BUY', 'entry_price': '1', 'stop_loss': '1', 'take_profit': '1', 'confidence_level': 5,
+            'status': 'DRAFT',
+        }
+        draft = client.post(reverse('Signals:create_signal'), payload).data['signal']
+        url = reverse('Signals:trending_instruments')
+        self.assertEqual(client.get(url).data['results'], [])
+
+        update_url = reverse('Signals:analyst_signal_update', args=[draft['id']])
+        self.assertEqual(client.patch(update_url, {'status': 'OPEN'}).status_code, 200)
+        # Closing it later does not count it again
+        self.assertEqual(client.patch(update_url, {'status': 'CLOSED'}).status_code, 200)
+        self.assertEqual(
+            [(row['instrument']['symbol'], row['signals']) for row in client.get(url).data['results']],
+            [('XAUUSD', 1)],
+        )
+
+
+class SignalConsensusTests(SignalTestCase):
+    def test_consensus_is_maintained_and_matches_recompute(self):
+        # The fixtures were created without the views: start from a recompute
+        self.assertEqual(SignalConsensus.recompute(), 2)
+        eurusd = Instrument.objects.get(symbol='EURUSD')
+        client = APIClient()
+        client.force_authenticate(self.analyst)
+        url = reverse('Signals:instrument_consensus', args=[eurusd.pk])
+        payload = {
+            'asset_class': eurusd.asset_class_id, 'instrument': eurusd.pk,
+            'timeframe': Timeframe.objects.get().pk, 'direction': 'BUY',
+            'entry_price': '1.20001', 'stop_loss': '1.10001', 'take_profit': '1.40001', 'confidence_level': 50,
+        }
+        pk = client.post(reverse('Signals:create_signal'), payload).data['signal']['id']
+        client.post(reverse('Signals:create_signal'), {**payload, 'direction': 'SELL', 'status': 'DRAFT'})
+
+        # The OPEN fixture at 0.00001 (SELL, confidence 20) and the new BUY
+        self.assertEqual(
+            client.get(url).data['overall'],
+            {
+                'open_signals': 2, 'buy': 1, 'sell': 1, 'buy_percentage': '50.00',
+                'avg_entry_price': '0.60001', 'avg_stop_distance': '0.05000',
+                'avg_target_distance': '0.10000', 'avg_confidence': '35.00',
+            },
+        )
+
+        def totals():
+            row = SignalConsensus.objects.get(instrument=eurusd)
+            return [Decimal(getattr(row, name)) for name in SignalConsensus.SUM_FIELDS]
+
+        client.put(reverse('Signals:analyst_signal_update', args=[pk]), {**payload, 'entry_price': '1.25'})
+        maintained = totals()
+        SignalConsensus.recompute()
+        self.assertEqual(totals(), maintained)
+
+        client.patch(reverse('Signals:analyst_signal_update', args=[pk]), {'status': 'CLOSED'})
+        self.assertEqual(client.get(url).data['overall']['open_signals'], 1)
+        client.patch(reverse('Signals:analyst_signal_update', args=[pk]), {'status': 'OPEN'})
+        client.delete(reverse('Signals:analyst_signal_delete', args=[pk]))
+        self.assertEqual(client.get(url, {'timeframe': 'H1'}).data['timeframes'][0]['open_signals'], 1)
+        client.post(reverse('Signals:analyst_signal_restore', args=[pk]))
+        self.assertEqual(client.get(url).data['overall']['buy'], 1)
+
+
+class CandleStoreTests(SignalTestCase):
+    def test_candle_store_import_downsample_and_range(self):
+        eurusd = Instrument.objects.get(symbol='EURUSD')
+        start = 1704067200  # 2024-01-01 00:00 UTC
+        rows = ['time,open,high,low,close,volume']
+        # Two hours of M1 candles
+        for minute in range(120):
+            price = 1 + minute / 1000
+            rows.append(f'{start + minute * 60},{price},{price + 0.0005},{price - 0.0005},{price + 0.0001},1')
+
+        with tempfile.TemporaryDirectory() as root, override_settings(CANDLE_STORE_ROOT=root):
+            csv_path = f'{root}/eurusd.csv'
+            with open(csv_path, 'w') as file:
+                file.write('\n'.join(rows) + '\n')
+            out = StringIO()
+            call_command('import_candles', csv_path, instrument='EURUSD', chunk_rows=50, stdout=out)
+            self.assertIn('120 appended', out.getvalue())
+            # Importing again appends nothing: the series is append-only
+            call_command('import_candles', csv_path, instrument=str(eurusd.pk), stdout=out)
+            self.assertIn('0 appended', out.getvalue())
+
+            store = CandleStore()
+            m1 = store.series(eurusd.pk, 'M1')
+            window = m1.read(start=start + 600, end=start + 1200)
+            self.assertEqual(len(window), 10)
+            # A slice of the memory map, not a copy
+            self.assertIsInstance(window.close, np.memmap)
+
+            call_command('downsample_candles', instrument='EURUSD', timeframe=['M5', 'H1'], stdout=out)
+            m5 = store.series(eurusd.pk, 'M5').read()
+            # The last bin of each timeframe is held back until a later candle arrives
+            self.assertEqual((len(m5), len(store.series(eurusd.pk, 'H1'))), (23, 1))
+            self.assertEqual(m5.time[1], start + 300)
+            self.assertAlmostEqual(m5.open[1], 1.005)
+            self.assertAlmostEqual(m5.close[1], 1.0091)
+            self.assertAlmostEqual(m5.high[1], 1.0095)
+            self.assertAlmostEqual(m5.low[1], 1.0045)
+            self.assertEqual(m5.volume[1], 5)
+
+            client = APIClient()
+            client.force_authenticate(self.analyst)
+            url = reverse('Signals:candles', args=[eurusd.pk, 'M1'])
+            page = client.get(url, {'start': '2024-01-01T00:10:00Z', 'limit': 5}).data
+            self.assertEqual(page['candles']['time'], [start + 600 + 60 * n for n in range(5)])
+            self.assertEqual(page['next'].timestamp(), start + 900)
+            self.assertEqual(client.get(url, {'limit': 0}).status_code, 400)
+
+    def test_import_skips_chunks_of_blank_lines(self):
+        eurusd = Instrument.objects.get(symbol='EURUSD')
+        lines = [f'{1704067200 + minute * 60},1.1,1.2,1.0,1.1' for minute in range(4)]
+        with tempfile.TemporaryDirectory() as root, override_settings(CANDLE_STORE_ROOT=root):
+            series = CandleStore().series(eurusd.pk, 'M1')
+            # The last chunk holds only the trailing blank lines
+            self.assertEqual(series.import_csv(StringIO('\n'.join(lines) + '\n\n\n\n'), chunk_rows=4), (4, 4))
+            self.assertEqual(len(series), 4)
+        self.assertEqual(len(parse_csv_rows(['\n', '\n'])), 0)
+
+
+class BacktestTests(SignalTestCase):
+    def test_backtest(self):
+        eurusd = Instrument.objects.get(symbol='EURUSD')
+        start = 1704067200
+        # M1 candles rising 0.001 a minute to 1.03 at minute 30, then falling
+        prices = [1 + 0.001 * (m if m <= 30 else 60 - m) for m in range(60)]
+        candles = (
+            [start + 60 * m for m in range(60)], prices,
+            [p + 0.0002 for p in prices], [p - 0.0002 for p in prices], prices, [1] * 60,
+        )
+        timeframe = Timeframe.objects.get()
+        cases = [
+            (0, 'BUY', '1.00000', '0.99500', '1.01000'),   # take profit at minute 10, +2R
+            (20, 'SELL', '1.02000', '1.02500', '1.00000'),  # stop loss at minute 25, -1R
+            (40, 'BUY', '1.02000', '0.90000', '1.20000'),   # neither
+        ]
+        for minute, direction, entry, stop, target in cases:
+            signal = TradingSignal.objects.create(
+                analyst=self.analyst, asset_class=eurusd.asset_class, instrument=eurusd, timeframe=timeframe,
+                direction=direction, entry_price=entry, stop_loss=stop, take_profit=target, confidence_level=50,
+            )
+            TradingSignal.objects.filter(pk=signal.pk).update(
+                created_at=from_timestamp(start + 60 * minute)
+            )
+
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            CANDLE_STORE_ROOT=root, BACKTEST={'WORKERS': 2}
+        ):
+            CandleStore().series(eurusd.pk, 'M1').append(candles)
+            client = APIClient()
+            client.force_authenticate(self.analyst)
+            url = reverse('Signals:signal_backtest')
+            # Two instruments, but a scope this small runs in the request's process
+            with mock.patch('Signals.backtest.ProcessPoolExecutor') as pool:
+                backtest = client.get(url, {'analyst': self.analyst.pk}).data['backtest']
+            pool.assert_not_called()
+            # The fixture signals were created after the last candle
+            self.assertEqual(
+                [backtest[name] for name in ('signals', 'take_profit', 'stop_loss', 'unresolved', 'no_data')],
+                [6, 1, 1, 1, 3],
+            )
+            self.assertEqual((backtest['total_r'], backtest['max_drawdown_r'], backtest['win_rate']), (1.0, 1.0, 0.5))
+            self.assertEqual(
+                [(point[0].timestamp(), point[1]) for point in backtest['equity_curve']],
+                [(start + 600, 2.0), (start + 1500, 1.0)],
+            )
+            # Cached until the signals change
+            self.assertEqual(client.get(url, {'analyst': self.analyst.pk}).data['backtest'], backtest)
+            out = StringIO()
+            call_command('backtest_signals', analyst=str(self.analyst.pk), stdout=out)
+            self.assertIn('loaded from cache', out.getvalue())
+            TradingSignal.objects.filter(direction='SELL', stop_loss=Decimal('1.025')).first().soft_delete()
+            self.assertEqual(client.get(url, {'analyst': self.analyst.pk}).data['backtest']['signals'], 5)
+
+            self.assertEqual(client.get(url).status_code, 400)
 
-# Create your tests here.
+    def test_process_pool_spawns_workers(self):
+        # One chunk per instrument: EURUSD and XAUUSD
+        signals = load_signals(self.analyst.pk)
+        with tempfile.TemporaryDirectory() as root, mock.patch(
+            'Signals.backtest.ProcessPoolExecutor', wraps=ProcessPoolExecutor
+        ) as pool:
+            pooled = simulate(signals, workers=2, root=root)
+            inline = simulate(signals, workers=1, root=root)
+        self.assertEqual(pool.call_count, 1)
+        # Forked workers would inherit the parent's connections and threads
+        self.assertEqual(pool.call_args.kwargs['mp_context'].get_start_method(), 'spawn')
+        for pooled_column, inline_column in zip(pooled, inline):
+            np.testing.assert_array_equal(pooled_column, inline_column)
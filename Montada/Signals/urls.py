@@ -5,8 +5,18 @@ from .views import (
     InstrumentListView,
     AssetClassWithInstrumentsView,
     AnalystSignalListView,
+    FollowedSignalFeedView,
     AnalystSignalUpdateView,
     AnalystSignalSoftDeleteView,
+    AnalystSignalHistoryView,
+    AnalystSignalRestoreView,
+    AnalystSignalReplayView,
+    FollowedSignalEventsView,
+    AnalystSignalSyncView,
+    TrendingInstrumentsView,
+    InstrumentConsensusView,
+    CandleRangeView,
+    SignalBacktestView,
     TimeframeListView
 )
 
@@ -15,11 +25,21 @@ app_name = 'Signals'
 urlpatterns = [
     path('create/', CreateTradingSignalView.as_view(), name='create_signal'),
     path('my-signals/', AnalystSignalListView.as_view(), name='analyst_signals_list'),
+    path('my-signals/sync/', AnalystSignalSyncView.as_view(), name='analyst_signals_sync'),
+    path('feed/', FollowedSignalFeedView.as_view(), name='signal_feed'),
+    path('feed/events/', FollowedSignalEventsView.as_view(), name='signal_events'),
     path('edit-my-signals/<str:pk>/', AnalystSignalUpdateView.as_view(), name='analyst_signal_update'),
     path('delete-my-signals/<str:pk>/', AnalystSignalSoftDeleteView.as_view(), name='analyst_signal_delete'),
+    path('history/', AnalystSignalHistoryView.as_view(), name='analyst_signal_history'),
+    path('history/<uuid:pk>/replay/', AnalystSignalReplayView.as_view(), name='analyst_signal_replay'),
+    path('restore-my-signals/<uuid:pk>/', AnalystSignalRestoreView.as_view(), name='analyst_signal_restore'),
     path('asset-classes/', AssetClassListView.as_view(), name='asset_classes'),
     path('instruments/', InstrumentListView.as_view(), name='instruments'),
     path('timeframes/', TimeframeListView.as_view(), name='timeframes'),
+    path('trending/', TrendingInstrumentsView.as_view(), name='trending_instruments'),
+    path('consensus/<uuid:instrument_id>/', InstrumentConsensusView.as_view(), name='instrument_consensus'),
+    path('candles/<uuid:instrument_id>/<str:timeframe>/', CandleRangeView.as_view(), name='candles'),
+    path('backtest/', SignalBacktestView.as_view(), name='signal_backtest'),
     path('assets-instruments/', AssetClassWithInstrumentsView.as_view(), name='assets_instruments'),
 ]
 
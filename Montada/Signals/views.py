@@ -1,18 +1,67 @@
-from rest_framework import status, generics, permissions
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DateTimeField, Value
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import serializers, status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from .models import TradingSignal, AssetClass, Instrument, Timeframe
+from Followers.models import Follow, Mute
+from Montada.cache import SCOPE_PUBLIC, cache_response
+from Montada.fieldsets import SparseQuerysetMixin, requested_fieldset
+from Montada.sync import DeltaSyncView
+from Notifications.fanout import notify_new_signal
+from Subscriptions.permissions import HasActiveSubscription
+from .backtest import get_or_schedule
+from .candles import CandleStore, CandleStoreError, from_timestamp
+from .filters import DateOrDateTimeField, SignalFilterBackend
+from .models import (
+    TradingSignal,
+    ArchivedSignal,
+    AssetClass,
+    Instrument,
+    Timeframe,
+    SignalEvent,
+    InstrumentActivityBucket,
+    SignalConsensus
+)
 from .serializers import (
     TradingSignalSerializer,
     AssetClassSerializer,
     InstrumentSerializer,
     AssetClassWithInstrumentsSerializer,
     TimeframeSerializer,
-    TimeframeSimpleSerializer
+    TimeframeSimpleSerializer,
+    TradingSignalValuesSerializer,
+    SignalHistoryValuesSerializer,
+    SignalEventSerializer
 )
 
 
+def is_publish(before, signal):
+    """Whether a change publishes the signal: created, or moved out of DRAFT"""
+    if signal.status == TradingSignal.Status.DRAFT:
+        return False
+    return before is None or before['status'] == TradingSignal.Status.DRAFT
+
+
+def record_change(signal, event_type, before=None):
+    """
+    Log a change to a signal, fold it into the consensus totals and, when
+    the change publishes it, count it in the trending buckets and notify the
+    analyst's followers. Call it inside the change's transaction, with the
+    signal's SignalEvent.state_of from before the change (None on create)
+    """
+    SignalEvent.record(signal, event_type, before)
+    SignalConsensus.apply(before, SignalEvent.state_of(signal))
+    if is_publish(before, signal):
+        InstrumentActivityBucket.record_signal(signal)
+        notify_new_signal(signal)
+
+
 class IsAnalystPermission(permissions.BasePermission):
     """
     Custom permission to only allow analyst users to post signals
@@ -36,6 +85,21 @@ class AnalystSignalPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class SignalValuesListMixin:
+    """
+    Read path for signal list views: the page is fetched with values() and
+    rendered by TradingSignalValuesSerializer, with the same output as
+    TradingSignalSerializer (including its ?fields= / ?omit= fieldset)
+    """
+    def list(self, request, *args, **kwargs):
+        fields = list(self.get_serializer().fields)
+        queryset = TradingSignalValuesSerializer.values(self.filter_queryset(self.get_queryset()), fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(TradingSignalValuesSerializer(page, fields).data)
+        return Response(TradingSignalValuesSerializer(queryset, fields).data)
+
+
 class CreateTradingSignalView(generics.CreateAPIView):
     """
     API endpoint for analysts to create trading signals
@@ -47,7 +111,9 @@ class CreateTradingSignalView(generics.CreateAPIView):
     
     def perform_create(self, serializer):
         # Automatically set the analyst to the current authenticated user
-        serializer.save(analyst=self.request.user)
+        with transaction.atomic():
+            signal = serializer.save(analyst=self.request.user)
+            record_change(signal, SignalEvent.EventType.CREATED)
     
     def create(self, request, *args, **kwargs):
         # Check if user is an analyst
@@ -66,7 +132,7 @@ class CreateTradingSignalView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class AssetClassListView(generics.ListAPIView):
+class AssetClassListView(SparseQuerysetMixin, generics.ListAPIView):
     """
     API endpoint to list all active asset classes
     """
@@ -75,7 +141,7 @@ class AssetClassListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class InstrumentListView(generics.ListAPIView):
+class InstrumentListView(SparseQuerysetMixin, generics.ListAPIView):
     """
     API endpoint to list all active instruments
     Can be filtered by asset_class
@@ -93,7 +159,7 @@ class InstrumentListView(generics.ListAPIView):
         return queryset
 
 
-class TimeframeListView(generics.ListAPIView):
+class TimeframeListView(SparseQuerysetMixin, generics.ListAPIView):
     """
     API endpoint to list all active timeframes
     Returns only id, code, and name without pagination
@@ -104,6 +170,167 @@ class TimeframeListView(generics.ListAPIView):
     pagination_class = None  # Disable pagination
 
 
+class TrendingInstrumentsView(generics.GenericAPIView):
+    """
+    API endpoint for the instruments with the most new signals, or the most
+    followers reached by them, over the last hour, day or week
+    ?window=1h / 24h (default) / 7d, ?by=signals (default) / followers,
+    ?limit= (default 10, max 50)
+    Read from the per-instrument activity buckets, never from TradingSignal
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    orderings = {'signals': 'signals', 'followers': 'followers_reached'}
+    default_limit = 10
+    max_limit = 50
+
+    @cache_response(timeout=60, scope=SCOPE_PUBLIC)
+    def get(self, request, *args, **kwargs):
+        window = request.query_params.get('window', '24h')
+        if window not in InstrumentActivityBucket.WINDOWS:
+            return Response({
+                'error': f'Invalid window. Must be one of: {", ".join(InstrumentActivityBucket.WINDOWS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        by = request.query_params.get('by', 'signals')
+        if by not in self.orderings:
+            return Response({
+                'error': f'Invalid by. Must be one of: {", ".join(self.orderings)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = serializers.IntegerField(min_value=1, max_value=self.max_limit).run_validation(
+                request.query_params.get('limit', self.default_limit)
+            )
+        except serializers.ValidationError as exc:
+            return Response({'error': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = InstrumentActivityBucket.trending(window, by=self.orderings[by], limit=limit)
+        instruments = Instrument.objects.select_related('asset_class').in_bulk(
+            [row['instrument'] for row in rows]
+        )
+        results = []
+        for row in rows:
+            instrument = instruments.get(row['instrument'])
+            if instrument is None:
+                continue
+            results.append({
+                'instrument': {
+                    'id': str(instrument.id),
+                    'symbol': instrument.symbol,
+                    'name': instrument.name,
+                    'asset_class': instrument.asset_class.name,
+                },
+                'signals': row['signals'],
+                'followers_reached': row['followers_reached'],
+            })
+        return Response({'window': window, 'by': by, 'results': results}, status=status.HTTP_200_OK)
+
+
+class InstrumentConsensusView(generics.GenericAPIView):
+    """
+    API endpoint for the analyst consensus on an instrument: BUY/SELL split,
+    average entry, stop loss and take profit distances and confidence of its
+    open signals, per timeframe and overall
+    Optional ?timeframe=<code> for a single timeframe
+    Read from the maintained SignalConsensus rows, never from TradingSignal
+    Requires an active subscription (analysts and staff are exempt)
+    """
+    permission_classes = [permissions.IsAuthenticated, HasActiveSubscription]
+
+    def get(self, request, instrument_id, *args, **kwargs):
+        instrument = get_object_or_404(Instrument.objects.select_related('asset_class'), pk=instrument_id)
+        rows = SignalConsensus.objects.filter(instrument=instrument).select_related('timeframe')
+        code = request.query_params.get('timeframe')
+        if code:
+            rows = rows.filter(timeframe__code=code)
+        rows = list(rows.order_by('timeframe__code'))
+
+        overall = SignalConsensus(instrument=instrument)
+        for row in rows:
+            for name in SignalConsensus.SUM_FIELDS:
+                setattr(overall, name, getattr(overall, name) + getattr(row, name))
+
+        return Response({
+            'instrument': InstrumentSerializer(instrument).data,
+            'overall': overall.summary(),
+            'timeframes': [
+                {'timeframe': TimeframeSimpleSerializer(row.timeframe).data, **row.summary()}
+                for row in rows
+            ],
+        }, status=status.HTTP_200_OK)
+
+
+class CandleRangeView(generics.GenericAPIView):
+    """
+    API endpoint for historical candles of an instrument and timeframe, from
+    the local candle store, oldest first, as columns (time in Unix seconds)
+    ?start= / ?end= (date or datetime; start inclusive, end exclusive),
+    ?limit= (default 1000, max 5000)
+    Pass the returned "next" as ?start= to read on
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 1000
+    max_limit = 5000
+
+    def get(self, request, instrument_id, timeframe, *args, **kwargs):
+        instrument = get_object_or_404(Instrument, pk=instrument_id)
+        try:
+            start = request.query_params.get('start')
+            start = DateOrDateTimeField().run_validation(start) if start else None
+            end = request.query_params.get('end')
+            end = DateOrDateTimeField().run_validation(end) if end else None
+            limit = serializers.IntegerField(min_value=1, max_value=self.max_limit).run_validation(
+                request.query_params.get('limit', self.default_limit)
+            )
+        except serializers.ValidationError as exc:
+            return Response({'error': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            series = CandleStore().series(instrument.pk, timeframe)
+        except CandleStoreError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Slices of the memory-mapped columns; only the page is copied out
+        candles = series.read(start, end)
+        page = type(candles)(*(column[:limit] for column in candles))
+        return Response({
+            'instrument': str(instrument.pk),
+            'timeframe': timeframe,
+            'candles': {name: column.tolist() for name, column in page._asdict().items()},
+            'next': from_timestamp(candles.time[limit]) if len(candles) > limit else None,
+        }, status=status.HTTP_200_OK)
+
+
+class SignalBacktestView(generics.GenericAPIView):
+    """
+    API endpoint for the backtest of an analyst's or an asset class's
+    published signals against the stored candles: take profit / stop loss
+    counts, win rate, R statistics, max drawdown and the equity curve
+    ?analyst=<user id> or ?asset_class=<asset class id>
+    Results are cached until the signals or candles change; a large scope
+    not yet computed answers 202 while it runs in the background
+    Requires an active subscription (analysts and staff are exempt)
+    """
+    permission_classes = [permissions.IsAuthenticated, HasActiveSubscription]
+
+    def get(self, request, *args, **kwargs):
+        params = {}
+        try:
+            for name in ('analyst', 'asset_class'):
+                if request.query_params.get(name):
+                    params[f'{name}_id'] = serializers.UUIDField().run_validation(request.query_params[name])
+        except serializers.ValidationError as exc:
+            return Response({'error': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+        if len(params) != 1:
+            return Response({
+                'error': 'Pass exactly one of analyst or asset_class.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        summary = get_or_schedule(**params)
+        if summary is None:
+            return Response({
+                'message': 'Backtest started; try again shortly.'
+            }, status=status.HTTP_202_ACCEPTED)
+        return Response({'backtest': summary}, status=status.HTTP_200_OK)
+
+
 class AssetClassWithInstrumentsView(generics.ListAPIView):
     """
     API endpoint to get all asset classes with their related instruments in a single response
@@ -123,16 +350,18 @@ class AssetClassWithInstrumentsView(generics.ListAPIView):
         ).prefetch_related('instruments').order_by('name')
 
 
-class AnalystSignalListView(generics.ListAPIView):
+class AnalystSignalListView(SignalValuesListMixin, generics.ListAPIView):
     """
     API endpoint for analysts to view all signals created by them
     Only analyst users can access this endpoint
     Returns all signals created by the authenticated analyst user
+    Filterable by status and the SignalFilterBackend parameters
     Paginated to 10 signals per page
     """
     serializer_class = TradingSignalSerializer
     permission_classes = [permissions.IsAuthenticated, IsAnalystPermission]
     pagination_class = AnalystSignalPagination
+    filter_backends = [SignalFilterBackend]
     
     def get_queryset(self):
         """
@@ -156,6 +385,41 @@ class AnalystSignalListView(generics.ListAPIView):
         return queryset.order_by('-created_at')
 
 
+class FollowedSignalFeedView(SignalValuesListMixin, generics.ListAPIView):
+    """
+    API endpoint for traders to read signals from the analysts they follow
+    Muted analysts and drafts are excluded
+    Requires an active subscription (analysts and staff are exempt)
+    Filterable by the SignalFilterBackend parameters
+    Paginated to 10 signals per page
+    """
+    serializer_class = TradingSignalSerializer
+    permission_classes = [permissions.IsAuthenticated, HasActiveSubscription]
+    pagination_class = AnalystSignalPagination
+    filter_backends = [SignalFilterBackend]
+
+    def get_queryset(self):
+        """
+        Signals of followed (accepted, active) and unmuted analysts, newest first
+        """
+        followed_ids = Follow.objects.filter(
+            follower=self.request.user,
+            status=Follow.Status.ACCEPTED,
+            is_active=True,
+        ).values('followed_id')
+        muted_ids = Mute.objects.filter(muter=self.request.user).values('muted_id')
+
+        return TradingSignal.active.filter(
+            analyst_id__in=followed_ids
+        ).exclude(
+            analyst_id__in=muted_ids
+        ).exclude(
+            status=TradingSignal.Status.DRAFT
+        ).select_related(
+            'analyst', 'asset_class', 'instrument', 'timeframe'
+        ).order_by('-created_at')
+
+
 class AnalystSignalUpdateView(generics.RetrieveUpdateAPIView):
     """
     API endpoint for analysts to retrieve and update a specific signal
@@ -186,7 +450,10 @@ class AnalystSignalUpdateView(generics.RetrieveUpdateAPIView):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        before = SignalEvent.state_of(instance)
+        with transaction.atomic():
+            self.perform_update(serializer)
+            record_change(instance, SignalEvent.EventType.UPDATED, before)
         
         return Response({
             'message': 'Trading signal updated successfully.',
@@ -215,8 +482,11 @@ class AnalystSignalUpdateView(generics.RetrieveUpdateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Update only the status field
-        instance.status = new_status
-        instance.save(update_fields=['status'])
+        before = SignalEvent.state_of(instance)
+        with transaction.atomic():
+            instance.status = new_status
+            instance.save(update_fields=['status', 'updated_at'])
+            record_change(instance, SignalEvent.EventType.UPDATED, before)
         
         # Return updated signal data
         serializer = self.get_serializer(instance)
@@ -253,8 +523,200 @@ class AnalystSignalSoftDeleteView(generics.RetrieveAPIView):
         Soft delete the signal by setting deleted_at timestamp
         """
         instance = self.get_object()
-        instance.soft_delete()
+        before = SignalEvent.state_of(instance)
+        with transaction.atomic():
+            instance.soft_delete()
+            record_change(instance, SignalEvent.EventType.DELETED, before)
         
         return Response({
             'message': 'Trading signal deleted successfully.'
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+
+class AnalystSignalHistoryView(generics.GenericAPIView):
+    """
+    API endpoint for analysts to browse their whole signal history: live and
+    soft-deleted signals from TradingSignal, and archived ones from
+    ArchivedSignal, newest first
+    Optional ?tier=all (default) / live / archived
+    Filterable by the SignalFilterBackend parameters
+    Paginated to 10 signals per page
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAnalystPermission]
+    pagination_class = AnalystSignalPagination
+    filter_backends = [SignalFilterBackend]
+    tiers = ('all', 'live', 'archived')
+
+    def get(self, request, *args, **kwargs):
+        tier = request.query_params.get('tier', 'all')
+        if tier not in self.tiers:
+            return Response({
+                'error': f'Invalid tier. Must be one of: {", ".join(self.tiers)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Both tables have the same columns and relation names, so the two
+        # values() querysets line up for a UNION ALL
+        live = self.filter_queryset(
+            TradingSignal.objects.filter(analyst=request.user)
+        ).annotate(archived_at=Value(None, output_field=DateTimeField()))
+        archived = self.filter_queryset(ArchivedSignal.objects.filter(analyst=request.user))
+        live = SignalHistoryValuesSerializer.values(live)
+        archived = SignalHistoryValuesSerializer.values(archived)
+
+        if tier == 'live':
+            queryset = live
+        elif tier == 'archived':
+            queryset = archived
+        else:
+            queryset = live.union(archived, all=True)
+        queryset = queryset.order_by('-created_at')
+
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(SignalHistoryValuesSerializer(page).data)
+
+
+class AnalystSignalRestoreView(generics.GenericAPIView):
+    """
+    API endpoint for analysts to restore one of their soft-deleted or
+    archived signals
+    Archived signals are moved back into TradingSignal
+    """
+    serializer_class = TradingSignalSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAnalystPermission]
+
+    def post(self, request, pk, *args, **kwargs):
+        signal = TradingSignal.objects.filter(pk=pk, analyst=request.user).first()
+        if signal is not None:
+            if not signal.is_deleted:
+                return Response({
+                    'error': 'Trading signal is not deleted.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            before = SignalEvent.state_of(signal)
+            with transaction.atomic():
+                signal.restore()
+                record_change(signal, SignalEvent.EventType.RESTORED, before)
+        else:
+            archived = get_object_or_404(ArchivedSignal, pk=pk, analyst=request.user)
+            before = SignalEvent.state_of(archived)
+            with transaction.atomic():
+                signal = archived.restore()
+                record_change(signal, SignalEvent.EventType.RESTORED, before)
+
+        return Response({
+            'message': 'Trading signal restored successfully.',
+            'signal': self.get_serializer(signal).data
+        }, status=status.HTTP_200_OK)
+
+
+class AnalystSignalReplayView(generics.GenericAPIView):
+    """
+    API endpoint for analysts to see one of their signals (live or archived)
+    as it was at a point in time, rebuilt from the signal event log
+    Optional ?at=<date|datetime> (default now)
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAnalystPermission]
+
+    def get(self, request, pk, *args, **kwargs):
+        owned = (
+            TradingSignal.objects.filter(pk=pk, analyst=request.user).exists()
+            or ArchivedSignal.objects.filter(pk=pk, analyst=request.user).exists()
+        )
+        if not owned:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        at = None
+        if 'at' in request.query_params:
+            field = DateOrDateTimeField(end_of_day=True)
+            try:
+                at = field.run_validation(request.query_params['at'])
+            except serializers.ValidationError as exc:
+                return Response({'at': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        replayed = SignalEvent.replay(pk, at=at)
+        if replayed is None:
+            return Response({
+                'error': 'No history for this signal at that time.'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'signal_id': str(pk),
+            'at': at or timezone.now(),
+            'state': replayed['state'],
+            'event_id': str(replayed['event_id']),
+            'event_at': replayed['event_at'],
+        }, status=status.HTTP_200_OK)
+
+
+class FollowedSignalEventsView(generics.GenericAPIView):
+    """
+    API endpoint for consumers of the signal event log: events of the
+    analysts the user follows (muted analysts and drafts excluded), oldest
+    first, after an event id cursor
+    ?after=<event id> (omit to start from the beginning), ?limit= (max 500)
+    Pass the returned "after" back to read on
+    Requires an active subscription (analysts and staff are exempt)
+    """
+    serializer_class = SignalEventSerializer
+    permission_classes = [permissions.IsAuthenticated, HasActiveSubscription]
+    default_limit = 100
+    max_limit = 500
+
+    def get(self, request, *args, **kwargs):
+        after = request.query_params.get('after')
+        try:
+            after = serializers.UUIDField().run_validation(after) if after else None
+            limit = serializers.IntegerField(min_value=1, max_value=self.max_limit).run_validation(
+                request.query_params.get('limit', self.default_limit)
+            )
+        except serializers.ValidationError as exc:
+            return Response({'error': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        followed_ids = Follow.objects.filter(
+            follower=request.user,
+            status=Follow.Status.ACCEPTED,
+            is_active=True,
+        ).values('followed_id')
+        muted_ids = Mute.objects.filter(muter=request.user).values('muted_id')
+        settle = timedelta(seconds=getattr(settings, 'SIGNAL_EVENT_FEED_SETTLE_SECONDS', 2))
+
+        events = SignalEvent.objects.filter(
+            analyst_id__in=followed_ids,
+            created_at__lte=timezone.now() - settle,
+        ).exclude(
+            analyst_id__in=muted_ids
+        ).exclude(
+            status=TradingSignal.Status.DRAFT
+        )
+        if after is not None:
+            events = events.filter(id__gt=after)
+        events = list(events.order_by('id')[:limit])
+
+        return Response({
+            'results': self.get_serializer(events, many=True).data,
+            'after': str(events[-1].id) if events else (str(after) if after else None),
+        }, status=status.HTTP_200_OK)
+
+
+class AnalystSignalSyncView(DeltaSyncView):
+    """
+    Delta sync for my-signals (see Montada/sync.py): the analyst's live
+    signals changed since the token, and the ids of those soft-deleted or
+    archived since
+    Supports ?fields= / ?omit= like my-signals
+    """
+    scope = 'my-signals'
+    permission_classes = [permissions.IsAuthenticated, IsAnalystPermission]
+
+    def get_delta(self, request, since):
+        fields = list(TradingSignalSerializer(**requested_fieldset(request)).fields)
+        queryset = TradingSignal.active.filter(analyst=request.user)
+        removed = []
+        if since is not None:
+            queryset = queryset.filter(updated_at__gt=since)
+            removed = list(TradingSignal.objects.filter(
+                analyst=request.user, deleted_at__gt=since
+            ).values_list('id', flat=True))
+            removed += ArchivedSignal.objects.filter(
+                analyst=request.user, archived_at__gt=since
+            ).values_list('id', flat=True)
+        rows = TradingSignalValuesSerializer.values(queryset.order_by('-created_at'), fields)
+        return TradingSignalValuesSerializer(rows, fields).data, removed
@@ -0,0 +1,36 @@
+"""
+Async versions of the subscription status endpoints, routed by
+Montada/asgi_urls.py when the app is served through Montada/asgi.py. They
+run the querysets and payloads of their DRF counterparts in views.py.
+"""
+from asgiref.sync import sync_to_async
+
+from Montada.async_views import AsyncAPIView
+from Montada.fieldsets import requested_fieldset
+from .serializers import SubscriptionSerializer
+from .views import SubscriptionStatusView as SyncSubscriptionStatusView
+from .views import check_subscription_payload, check_subscription_queryset, create_missing_free_trial
+
+
+class SubscriptionStatusView(AsyncAPIView):
+    """
+    API endpoint to get current subscription status
+    """
+    async def get(self, request):
+        fieldset = requested_fieldset(request)
+        queryset = SyncSubscriptionStatusView.get_status_queryset(SubscriptionSerializer(**fieldset))
+        queryset = queryset.filter(user=request.user)
+        subscription = await queryset.afirst()
+        if subscription is None:
+            await sync_to_async(create_missing_free_trial)(request.user)
+            subscription = await queryset.aget()
+        return SubscriptionSerializer(subscription, **fieldset).data
+
+
+class CheckSubscriptionStatusView(AsyncAPIView):
+    """
+    API endpoint to check if user has active subscription
+    """
+    async def get(self, request):
+        subscription = await check_subscription_queryset(request.user).afirst()
+        return check_subscription_payload(subscription)
@@ -0,0 +1,97 @@
+"""
+Cached subscription entitlement lookups.
+
+Views that only need to know whether a user currently has access should call
+``has_active_subscription`` instead of loading the Subscription row. The
+snapshot cached here holds the status and end_date, so expiry is evaluated
+against the clock on every call and never needs a write; only real status
+changes (upgrade, cancel, sweeper expiry) invalidate it.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+ENTITLEMENT_CACHE_PREFIX = 'subscriptions:entitlement:'
+
+
+def _cache_key(user_id):
+    return f'{ENTITLEMENT_CACHE_PREFIX}{user_id}'
+
+
+def _cache_timeout():
+    return getattr(settings, 'SUBSCRIPTION_ENTITLEMENT_CACHE_TIMEOUT', 300)
+
+
+def get_entitlement_snapshot(user_id):
+    """
+    Return {'status', 'end_date', 'plan_type', 'is_trial'} for a user.
+    Users without a subscription get a snapshot with status None.
+    """
+    key = _cache_key(user_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        from .models import Subscription
+
+        snapshot = Subscription.objects.filter(user_id=user_id).values(
+            'status', 'end_date', 'plan_type', 'is_trial'
+        ).first() or {'status': None, 'end_date': None, 'plan_type': None, 'is_trial': False}
+        cache.set(key, snapshot, _cache_timeout())
+    return snapshot
+
+
+def is_snapshot_active(snapshot, now=None):
+    if snapshot['status'] != 'active':
+        return False
+    return (now or timezone.now()) <= snapshot['end_date']
+
+
+def has_active_subscription(user, now=None):
+    """Read-only entitlement check for a user or user id"""
+    user_id = getattr(user, 'pk', user)
+    return is_snapshot_active(get_entitlement_snapshot(user_id), now)
+
+
+class Entitlement:
+    """A user's subscription snapshot, evaluated at one instant"""
+    __slots__ = ('status', 'end_date', 'plan_type', 'is_trial', 'is_active')
+
+    def __init__(self, snapshot, now=None):
+        self.status = snapshot['status']
+        self.end_date = snapshot['end_date']
+        self.plan_type = snapshot['plan_type']
+        self.is_trial = snapshot['is_trial']
+        self.is_active = is_snapshot_active(snapshot, now)
+
+    def __bool__(self):
+        return self.is_active
+
+
+NO_ENTITLEMENT = Entitlement({'status': None, 'end_date': None, 'plan_type': None, 'is_trial': False})
+
+
+def resolve_request_entitlement(request):
+    """
+    Entitlement of the request's user, resolved at most once per request.
+    Accepts a DRF Request or a Django HttpRequest; the result is memoized on
+    the underlying HttpRequest so every permission check shares it.
+    Only an authenticated user's entitlement is memoized: read before DRF
+    authenticates a JWT, the user is still anonymous, and caching
+    NO_ENTITLEMENT then would deny the real user for the rest of the request.
+    """
+    http_request = getattr(request, '_request', request)
+    entitlement = getattr(http_request, '_subscription_entitlement', None)
+    if entitlement is None:
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return NO_ENTITLEMENT
+        entitlement = Entitlement(get_entitlement_snapshot(user.pk))
+        http_request._subscription_entitlement = entitlement
+    return entitlement
+
+
+def invalidate_entitlement(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def invalidate_entitlements(user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
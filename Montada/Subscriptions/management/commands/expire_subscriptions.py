@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from Subscriptions.models import Subscription
+
+
+class Command(BaseCommand):
+    help = 'Expire active subscriptions whose end date has passed (run on a schedule, e.g. every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of subscriptions expired per UPDATE',
+        )
+
+    def handle(self, *args, **options):
+        expired = Subscription.expire_due_subscriptions(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} subscription(s).'))
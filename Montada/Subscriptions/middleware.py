@@ -0,0 +1,50 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .entitlements import resolve_request_entitlement
+
+
+class RequestEntitlement:
+    """
+    Stand-in for the request user's Entitlement that resolves it on each
+    access. ``resolve_request_entitlement`` memoizes the result once the user
+    is authenticated, so only reads made before that (when the user is still
+    anonymous) see NO_ENTITLEMENT.
+    """
+    __slots__ = ('_request',)
+
+    def __init__(self, request):
+        self._request = request
+
+    def __getattr__(self, name):
+        return getattr(resolve_request_entitlement(self._request), name)
+
+    def __bool__(self):
+        return bool(resolve_request_entitlement(self._request))
+
+
+class SubscriptionEntitlementMiddleware:
+    """
+    Attach ``request.entitlement``, the user's subscription entitlement,
+    resolved lazily on first access and then reused for the whole request.
+
+    With JWT auth the user is only known once DRF authenticates inside the
+    view; DRF copies it onto the HttpRequest, so resolving on access here
+    picks up the authenticated user instead of AnonymousUser.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.entitlement = RequestEntitlement(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.entitlement = RequestEntitlement(request)
+        return await self.get_response(request)
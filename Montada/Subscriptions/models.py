@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
-import uuid
+
+from Montada.ids import uuid7
 
 User = get_user_model()
 
@@ -11,7 +12,7 @@ class Subscription(models.Model):
     """
     Model to manage user subscriptions
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     
     PLAN_CHOICES = [
         ('free_trial', 'Free Trial'),
@@ -61,10 +62,26 @@ class Subscription(models.Model):
         verbose_name = 'Subscription'
         verbose_name_plural = 'Subscriptions'
         ordering = ['-created_at']
+        indexes = [
+            # Serves the expiry sweeper: active subscriptions ordered by end_date
+            models.Index(fields=['status', 'end_date'], name='subscription_status_end_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.plan_type} ({self.status})"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .entitlements import invalidate_entitlement
+        user_id = self.user_id
+        transaction.on_commit(lambda: invalidate_entitlement(user_id))
+    
+    def effective_status(self, now=None):
+        """Status as of now, treating an active subscription past end_date as expired"""
+        if self.status == 'active' and (now or timezone.now()) > self.end_date:
+            return 'expired'
+        return self.status
+    
     def is_active(self):
         """Check if subscription is currently active"""
         if self.status != 'active':
@@ -118,6 +135,42 @@ class Subscription(models.Model):
         
         return self
     
+    @staticmethod
+    def expire_due_subscriptions(now=None, batch_size=1000):
+        """
+        Expire every active subscription whose end_date has passed.
+        Works in set-based batches walking the (status, end_date) index and
+        clears User.is_subscribed for the affected users, and notifies them,
+        in the same batch.
+        Returns the number of subscriptions expired.
+        """
+        from Montada.cache import invalidate_tags
+        from Notifications.models import Notification
+        from .entitlements import invalidate_entitlements
+
+        now = now or timezone.now()
+        expired = 0
+        while True:
+            batch = list(
+                Subscription.objects.filter(status='active', end_date__lt=now)
+                .order_by('end_date')
+                .values_list('id', 'user_id')[:batch_size]
+            )
+            if not batch:
+                break
+            subscription_ids = [subscription_id for subscription_id, _ in batch]
+            user_ids = [user_id for _, user_id in batch]
+            with transaction.atomic():
+                expired += Subscription.objects.filter(
+                    id__in=subscription_ids, status='active'
+                ).update(status='expired', updated_at=now)
+                User.objects.filter(id__in=user_ids).update(is_subscribed=False)
+                Notification.create_for(user_ids, Notification.Kind.SUBSCRIPTION_EXPIRED, now=now)
+            invalidate_entitlements(user_ids)
+            # Cached profile responses carry is_subscribed
+            invalidate_tags(*(f'user:{user_id}' for user_id in user_ids))
+        return expired
+    
     def cancel(self):
         """Cancel the subscription"""
         self.status = 'cancelled'
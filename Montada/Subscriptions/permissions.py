@@ -0,0 +1,20 @@
+from rest_framework import permissions
+
+from .entitlements import resolve_request_entitlement
+
+
+class HasActiveSubscription(permissions.BasePermission):
+    """
+    Allow traders with an active subscription; analysts and staff always pass.
+    Checked once per request from the cached entitlement snapshot, there is
+    deliberately no per-object check.
+    """
+    message = 'An active subscription is required to access signals.'
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        if user.is_staff or user.user_type == 'analyst':
+            return True
+        return resolve_request_entitlement(request).is_active
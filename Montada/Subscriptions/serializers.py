@@ -1,16 +1,19 @@
 from rest_framework import serializers
+
+from Montada.fieldsets import SparseFieldsetMixin
 from .models import Subscription
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for subscription details
     """
     days_remaining = serializers.SerializerMethodField()
     is_active = serializers.SerializerMethodField()
+    status = serializers.SerializerMethodField()
     user_email = serializers.EmailField(source='user.email', read_only=True)
     
     class Meta:
@@ -21,6 +24,12 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             'days_remaining', 'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'user', 'start_date', 'created_at', 'updated_at')
+        # Columns read by the method fields, for ?fields= query trimming
+        sparse_field_sources = {
+            'days_remaining': ('status', 'end_date'),
+            'is_active': ('status', 'end_date'),
+            'status': ('status', 'end_date'),
+        }
     
     def get_days_remaining(self, obj):
         """Get days remaining in subscription"""
@@ -29,6 +38,10 @@ class SubscriptionSerializer(serializers.ModelSerializer):
     def get_is_active(self, obj):
         """Check if subscription is active"""
         return obj.is_active()
+    
+    def get_status(self, obj):
+        """Report subscriptions past end_date as expired before the sweeper runs"""
+        return obj.effective_status()
 
 
 class SubscribeSerializer(serializers.Serializer):
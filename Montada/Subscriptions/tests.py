@@ -1,3 +1,221 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Followers.models import Follow
+from Mainapp.models import User
+from Notifications.models import Notification
+from Signals.models import AssetClass, Instrument, Timeframe, TradingSignal
+from .entitlements import NO_ENTITLEMENT, has_active_subscription, resolve_request_entitlement
+from .middleware import SubscriptionEntitlementMiddleware
+from .models import Subscription
+from .permissions import HasActiveSubscription
+
+
+class SubscriptionExpiryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def subscribe(self, name, end_date, status='active'):
+        user = User.objects.create_user(
+            username=name, email=f'{name}@example.com', password='pass-1234',
+            user_type='trader', is_subscribed=status == 'active',
+        )
+        subscription = Subscription.objects.create(user=user, status=status, end_date=end_date)
+        return user, subscription
+
+    def test_expire_due_subscriptions_at_end_date_boundary(self):
+        _, past = self.subscribe('past', self.now - timedelta(seconds=1))
+        _, boundary = self.subscribe('boundary', self.now)
+        _, future = self.subscribe('future', self.now + timedelta(seconds=1))
+        _, cancelled = self.subscribe('cancelled', self.now - timedelta(days=1), status='cancelled')
+
+        self.assertEqual(Subscription.expire_due_subscriptions(now=self.now, batch_size=1), 1)
+
+        statuses = dict(Subscription.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[past.id], 'expired')
+        # end_date is the last instant of access, it only expires after it
+        self.assertEqual(statuses[boundary.id], 'active')
+        self.assertEqual(statuses[future.id], 'active')
+        self.assertEqual(statuses[cancelled.id], 'cancelled')
+        self.assertFalse(User.objects.get(id=past.user_id).is_subscribed)
+        self.assertTrue(User.objects.get(id=boundary.user_id).is_subscribed)
+        self.assertEqual(
+            list(Notification.objects.values_list('recipient_id', 'kind')),
+            [(past.user_id, Notification.Kind.SUBSCRIPTION_EXPIRED)],
+        )
+
+        # A second sweep has nothing left to do
+        self.assertEqual(Subscription.expire_due_subscriptions(now=self.now), 0)
+        self.assertEqual(Subscription.expire_due_subscriptions(now=self.now + timedelta(seconds=1)), 1)
+        self.assertEqual(Subscription.objects.get(id=boundary.id).status, 'expired')
+
+    def test_expire_subscriptions_command(self):
+        for i in range(3):
+            self.subscribe(f'due{i}', self.now - timedelta(minutes=i + 1))
+        _, active = self.subscribe('active', self.now + timedelta(days=1))
+        out = StringIO()
+
+        call_command('expire_subscriptions', '--batch-size', '2', stdout=out)
+
+        self.assertIn('Expired 3 subscription(s).', out.getvalue())
+        self.assertEqual(Subscription.objects.filter(status='expired').count(), 3)
+        self.assertEqual(Subscription.objects.get(id=active.id).status, 'active')
+
+    def test_effective_status_before_sweep(self):
+        user, subscription = self.subscribe('unswept', self.now + timedelta(minutes=5))
+        self.assertTrue(has_active_subscription(user, now=self.now))
+
+        later = self.now + timedelta(minutes=10)
+        # Past end_date but not swept yet: the row still says active
+        self.assertEqual(subscription.status, 'active')
+        self.assertEqual(subscription.effective_status(now=self.now), 'active')
+        self.assertEqual(subscription.effective_status(now=later), 'expired')
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(subscription.effective_status(), 'expired')
+            self.assertFalse(subscription.is_active())
+        # The cached snapshot is evaluated against the clock, not the row
+        self.assertFalse(has_active_subscription(user, now=later))
+
+        subscription.status = 'cancelled'
+        self.assertEqual(subscription.effective_status(now=later), 'cancelled')
+
+
+class EntitlementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.factory = RequestFactory()
+        cls.trader = User.objects.create_user(
+            username='trader', email='trader@example.com', password='pass-1234', user_type='trader'
+        )
+        cls.lapsed = User.objects.create_user(
+            username='lapsed', email='lapsed@example.com', password='pass-1234', user_type='trader'
+        )
+        cls.analyst = User.objects.create_user(
+            username='analyst', email='analyst@example.com', password='pass-1234', user_type='analyst'
+        )
+        Subscription.objects.create(user=cls.trader, end_date=timezone.now() + timedelta(days=7))
+        Subscription.objects.create(user=cls.lapsed, end_date=timezone.now() - timedelta(minutes=1))
+        forex = AssetClass.objects.create(name='Forex')
+        cls.signal = TradingSignal.objects.create(
+            analyst=cls.analyst, asset_class=forex,
+            instrument=Instrument.objects.create(asset_class=forex, symbol='EURUSD'),
+            timeframe=Timeframe.objects.create(code='H1', name='1 Hour'),
+            direction='BUY', entry_price=Decimal('1.1'), stop_loss=Decimal('1.0'), take_profit=Decimal('1.3'),
+            confidence_level=50, status=TradingSignal.Status.OPEN,
+        )
+        for follower in (cls.trader, cls.lapsed):
+            Follow.objects.create(
+                follower=follower, followed=cls.analyst, status=Follow.Status.ACCEPTED, is_active=True
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, user):
+        request = self.factory.get('/')
+        request.user = user
+        return request
+
+    def test_permission(self):
+        permission = HasActiveSubscription()
+        self.assertTrue(permission.has_permission(self.request(self.trader), None))
+        self.assertFalse(permission.has_permission(self.request(self.lapsed), None))
+        self.assertFalse(permission.has_permission(self.request(AnonymousUser()), None))
+        with self.assertNumQueries(0):
+            self.assertTrue(permission.has_permission(self.request(self.analyst), None))
+
+        # One snapshot lookup per request however many checks run
+        cache.clear()
+        request = self.request(self.trader)
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                self.assertTrue(permission.has_permission(request, None))
+
+    def test_anonymous_entitlement_is_not_memoized(self):
+        request = self.request(AnonymousUser())
+        self.assertIs(resolve_request_entitlement(request), NO_ENTITLEMENT)
+        # JWT authentication sets the user later in the same request
+        request.user = self.trader
+        entitlement = resolve_request_entitlement(request)
+        self.assertTrue(entitlement.is_active)
+        self.assertIs(resolve_request_entitlement(request), entitlement)
+
+    def test_middleware_resolves_after_authentication(self):
+        seen = []
+
+        def view(request):
+            seen.append(bool(request.entitlement))
+            request.user = self.trader
+            seen.append((bool(request.entitlement), request.entitlement.plan_type))
+            return HttpResponse()
+
+        SubscriptionEntitlementMiddleware(view)(self.request(AnonymousUser()))
+        self.assertEqual(seen, [False, (True, 'free_trial')])
+
+    def test_feed_requires_active_subscription(self):
+        url = reverse('Signals:signal_feed')
+        for user, status_code in ((self.trader, 200), (self.lapsed, 403), (self.analyst, 200)):
+            client = APIClient()
+            # A real token, so the user is only known once DRF authenticates
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+            response = client.get(url)
+            self.assertEqual(response.status_code, status_code, user.username)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.trader)}')
+        self.assertEqual([row['id'] for row in client.get(url).data['results']], [str(self.signal.id)])
+        self.assertEqual(APIClient().get(url).status_code, 401)
+
+    def test_cached_check_is_well_under_a_millisecond(self):
+        # A fresh request against a warm snapshot cache: the per-request cost
+        has_active_subscription(self.trader)
+        requests = [self.request(self.trader) for _ in range(2000)]
+        start = time.perf_counter()
+        for request in requests:
+            resolve_request_entitlement(request)
+        per_check = (time.perf_counter() - start) / len(requests)
+        self.assertLess(per_check, 0.0005, f'{per_check * 1e6:.1f}us per entitlement check')
+
+    def test_first_status_request_starts_trial_and_sets_is_subscribed(self):
+        for served_async in (False, True):
+            user = User.objects.create_user(
+                username=f'new{served_async}', email=f'new{served_async}@example.com', password='pass-1234',
+                user_type='trader',
+            )
+            headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+            # Warm the cached profile and entitlement
+            self.assertFalse(APIClient().get(reverse('Mainapp:profile'), headers=headers).data['is_subscribed'])
+            self.assertFalse(has_active_subscription(user))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                if served_async:
+                    with override_settings(ROOT_URLCONF='Montada.asgi_urls'):
+                        response = async_to_sync(AsyncClient().get)(
+                            reverse('Subscriptions:subscription_status'), headers=headers
+                        )
+                else:
+                    response = APIClient().get(reverse('Subscriptions:subscription_status'), headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['plan_type'], 'free_trial')
+
+            self.assertTrue(User.objects.get(pk=user.pk).is_subscribed)
+            self.assertTrue(has_active_subscription(user))
+            self.assertTrue(APIClient().get(reverse('Mainapp:profile'), headers=headers).data['is_subscribed'])
+            # Later requests read the trial
+            response = APIClient().get(reverse('Subscriptions:subscription_status'), headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(Subscription.objects.filter(user=user).count(), 1)
@@ -2,14 +2,45 @@ from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from django.utils import timezone
-from datetime import timedelta
+from django.db import IntegrityError, transaction
 from .models import Subscription
 from .serializers import SubscriptionSerializer, SubscribeSerializer
 
 User = get_user_model()
 
 
+def create_missing_free_trial(user):
+    """
+    Start the free trial of a user without a subscription, on their first
+    status request. create_free_trial also sets User.is_subscribed; the
+    save hooks of both rows drop the cached entitlement and profile once
+    the transaction commits.
+    """
+    try:
+        with transaction.atomic():
+            Subscription.create_free_trial(user)
+    except IntegrityError:
+        # A concurrent request created it first
+        pass
+
+
+def check_subscription_queryset(user):
+    return Subscription.objects.select_related('user').filter(user=user)
+
+
+def check_subscription_payload(subscription):
+    """Body of check_subscription_status_view for a Subscription or None"""
+    if subscription is None:
+        return {
+            'has_active_subscription': False,
+            'message': 'No subscription found. Free trial will be created on first access.'
+        }
+    return {
+        'has_active_subscription': subscription.is_active(),
+        'subscription': SubscriptionSerializer(subscription).data
+    }
+
+
 class SubscriptionStatusView(generics.RetrieveAPIView):
     """
     API endpoint to get current subscription status
@@ -17,25 +48,19 @@ class SubscriptionStatusView(generics.RetrieveAPIView):
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    @staticmethod
+    def get_status_queryset(serializer):
+        return serializer.optimize_queryset(Subscription.objects.select_related('user'))
+    
     def get_object(self):
-        user = self.request.user
-        subscription, created = Subscription.objects.get_or_create(
-            user=user,
-            defaults={
-                'plan_type': 'free_trial',
-                'status': 'active',
-                'end_date': timezone.now() + timedelta(days=7),
-                'is_trial': True
-            }
-        )
-        
-        # Check if subscription has expired and update status
-        if subscription.is_active() == False and subscription.status == 'active':
-            subscription.status = 'expired'
-            subscription.save()
-            user.is_subscribed = False
-            user.save()
+        queryset = self.get_status_queryset(self.get_serializer()).filter(user=self.request.user)
+        subscription = queryset.first()
+        if subscription is None:
+            create_missing_free_trial(self.request.user)
+            subscription = queryset.get()
         
+        # Expiry is reported through the serializer and persisted by the
+        # expire_subscriptions sweeper, so reading status never writes
         return subscription
 
 
@@ -106,24 +131,5 @@ def check_subscription_status_view(request):
     """
     API endpoint to check if user has active subscription
     """
-    user = request.user
-    
-    try:
-        subscription = Subscription.objects.get(user=user)
-        is_active = subscription.is_active()
-        
-        # Update user's is_subscribed status based on subscription
-        if user.is_subscribed != is_active:
-            user.is_subscribed = is_active
-            user.save()
-        
-        return Response({
-            'has_active_subscription': is_active,
-            'subscription': SubscriptionSerializer(subscription).data
-        }, status=status.HTTP_200_OK)
-    
-    except Subscription.DoesNotExist:
-        return Response({
-            'has_active_subscription': False,
-            'message': 'No subscription found. Free trial will be created on first access.'
-        }, status=status.HTTP_200_OK)
+    subscription = check_subscription_queryset(request.user).first()
+    return Response(check_subscription_payload(subscription), status=status.HTTP_200_OK)
@@ -0,0 +1,168 @@
+"""
+Concurrency benchmark: sync (WSGI) views vs the async views of Montada/asgi.py.
+
+Fires the same burst of concurrent requests at each endpoint twice, with
+every database query and SMTP send slowed down to a remote server's
+latency (benchmarks.latency_sqlite, benchmarks.slow_email):
+
+  * wsgi   the DRF views on a fixed pool of --workers threads, like a
+           threaded WSGI server; requests beyond the pool wait in the queue
+  * asgi   the async views on ONE event loop, with up to --concurrency
+           requests in flight
+
+Latency is measured from when the request is issued, so time spent queued
+for a WSGI worker counts, as it does for a client. The async path only wins
+where requests mostly wait on I/O; serializer-heavy lists such as
+following_list stay CPU bound either way.
+
+    python manage.py migrate --run-syncdb --settings=benchmarks.settings
+    python manage.py generate_benchmark_data --settings=benchmarks.settings --signals 1000
+    python -m benchmarks.asgi_concurrency --workers 4 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from benchmarks.common import print_table, setup_django, summarize
+
+ENDPOINTS = {
+    'counts': ('get', '/api/followers/counts/', None),
+    'following_list': ('get', '/api/followers/following/', None),
+    'follow_status': ('get', '/api/followers/status/', lambda ctx: {'user_id': ctx['analyst_id']}),
+    'check_subscription': ('get', '/api/subscriptions/check/', None),
+    'forgot_password': ('post', '/api/auth/forgot-password/', lambda ctx: {'email': ctx['email']}),
+}
+
+
+def run_wsgi(method, path, data, headers, requests, workers):
+    from django.test import Client
+
+    local = threading.local()
+
+    def call(issued):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client()
+        if method == 'get':
+            response = client.get(path, data, headers=headers)
+        else:
+            response = client.post(path, data, content_type='application/json', headers=headers)
+        return response.status_code, perf_counter() - issued
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(call, perf_counter()) for _ in range(requests)]
+        results = [future.result() for future in futures]
+    return results, perf_counter() - start
+
+
+async def run_asgi(method, path, data, headers, requests, concurrency):
+    import json
+    from urllib.parse import urlencode
+
+    from django.core.handlers.asgi import ASGIHandler
+
+    # The handler an ASGI server runs (not AsyncClient, which skips the
+    # per-request ThreadSensitiveContext and so serializes all ORM calls)
+    application = ASGIHandler()
+    limit = asyncio.Semaphore(concurrency)
+    raw_headers = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    if method == 'get':
+        query_string, body = urlencode(data).encode(), b''
+    else:
+        query_string, body = b'', json.dumps(data).encode()
+        raw_headers.append((b'content-type', b'application/json'))
+
+    async def call():
+        issued = perf_counter()
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method.upper(), 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': query_string, 'root_path': '', 'headers': raw_headers,
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        status = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        async with limit:
+            await application(scope, receive, send)
+        return status[0], perf_counter() - issued
+
+    start = perf_counter()
+    results = await asyncio.gather(*(call() for _ in range(requests)))
+    return results, perf_counter() - start
+
+
+def report(results, wall):
+    statuses = sorted({status for status, _ in results})
+    row = summarize([elapsed for _, elapsed in results])
+    row['req/s'] = round(len(results) / wall, 1)
+    row['status'] = ','.join(str(status) for status in statuses)
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='WSGI worker threads')
+    parser.add_argument('--concurrency', type=int, default=64, help='Requests in flight on the event loop')
+    parser.add_argument('--requests', type=int, default=128, help='Requests per endpoint and mode')
+    parser.add_argument('--query-latency-ms', type=float, default=30)
+    parser.add_argument('--smtp-latency-ms', type=float, default=500)
+    parser.add_argument('--only', nargs='*', choices=sorted(ENDPOINTS))
+    args = parser.parse_args(argv)
+
+    os.environ['MONTADA_BENCH_DB_ENGINE'] = 'benchmarks.latency_sqlite'
+    os.environ['MONTADA_BENCH_CONNECT_LATENCY_MS'] = '0'
+    os.environ['MONTADA_BENCH_QUERY_LATENCY_MS'] = str(args.query_latency_ms)
+    os.environ['MONTADA_BENCH_SMTP_LATENCY_MS'] = str(args.smtp_latency_ms)
+    setup_django()
+
+    from django.test.utils import override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from Followers.models import Follow
+
+    follow = Follow.objects.filter(status=Follow.Status.ACCEPTED, is_active=True).select_related('follower').first()
+    if follow is None:
+        raise SystemExit('No benchmark data found. Run generate_benchmark_data first.')
+    ctx = {'analyst_id': str(follow.followed_id), 'email': follow.follower.email}
+    headers = {'Authorization': f'Bearer {AccessToken.for_user(follow.follower)}'}
+
+    results = {}
+    for name, (method, path, data) in ENDPOINTS.items():
+        if args.only and name not in args.only:
+            continue
+        payload = data(ctx) if data else {}
+        with override_settings(ROOT_URLCONF='Montada.urls'):
+            results[f'{name} wsgi'] = report(*run_wsgi(
+                method, path, payload, headers, args.requests, args.workers
+            ))
+        with override_settings(ROOT_URLCONF='Montada.asgi_urls'):
+            results[f'{name} asgi'] = report(*asyncio.run(
+                run_asgi(method, path, payload, headers, args.requests, args.concurrency)
+            ))
+
+    print(
+        f'{args.requests} requests per row; {args.workers} WSGI threads vs 1 event loop '
+        f'({args.concurrency} in flight); query latency {args.query_latency_ms}ms, '
+        f'SMTP latency {args.smtp_latency_ms}ms\n'
+    )
+    print_table(results, columns=('p50', 'p95', 'req/s', 'status'), label='endpoint')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Helpers shared by the benchmark scripts: Django setup, latency summaries and
+baseline comparison.
+"""
+import json
+import os
+import statistics
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+
+
+def setup_django(settings_module='benchmarks.settings'):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def summarize(samples):
+    """p50/p95/p99/mean in milliseconds for a list of durations in seconds"""
+    ms = sorted(sample * 1000 for sample in samples)
+    if len(ms) == 1:
+        return {'p50': ms[0], 'p95': ms[0], 'p99': ms[0], 'mean': ms[0]}
+    cuts = statistics.quantiles(ms, n=100, method='inclusive')
+    return {
+        'p50': round(cuts[49], 3),
+        'p95': round(cuts[94], 3),
+        'p99': round(cuts[98], 3),
+        'mean': round(statistics.fmean(ms), 3),
+    }
+
+
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    with path.open() as f:
+        return json.load(f)
+
+
+def save_results(path, results):
+    with Path(path).open('w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2, metric='p95'):
+    """
+    Return a list of human readable regressions: any endpoint whose ``metric``
+    grew by more than ``tolerance`` (fraction) or that runs more queries than
+    in the baseline.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current[metric] > previous[metric] * (1 + tolerance):
+            regressions.append(
+                f'{name}: {metric} {previous[metric]:.2f}ms -> {current[metric]:.2f}ms'
+            )
+        if current.get('queries', 0) > previous.get('queries', 0):
+            regressions.append(
+                f'{name}: queries {previous.get("queries", 0)} -> {current["queries"]}'
+            )
+    return regressions
+
+
+def print_table(results, columns=('p50', 'p95', 'p99', 'queries'), label='endpoint', stream=None):
+    width = max((len(name) for name in results), default=10)
+    width = max(width, len(label))
+    header = f'{label:<{width}}  ' + '  '.join(f'{column:>9}' for column in columns)
+    lines = [header, '-' * len(header)]
+    for name in sorted(results):
+        row = results[name]
+        cells = []
+        for column in columns:
+            value = row.get(column, '')
+            cells.append(f'{value:>9.2f}' if isinstance(value, float) else f'{value!s:>9}')
+        lines.append(f'{name:<{width}}  ' + '  '.join(cells))
+    print('\n'.join(lines), file=stream)
@@ -0,0 +1,87 @@
+"""
+Per-request database connection overhead benchmark.
+
+Runs the same short API request under different connection settings against
+benchmarks.latency_sqlite, a SQLite stand-in that sleeps on connect like a
+remote SQL Server login would:
+
+  * connect-per-request     CONN_MAX_AGE=0 (the previous production setting)
+  * persistent              CONN_MAX_AGE=600
+  * persistent + health     CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True
+
+Each request is wrapped in close_old_connections() like the WSGI handler's
+request_started/request_finished signals, which the test client skips.
+
+    python manage.py migrate --run-syncdb --settings=benchmarks.settings
+    python manage.py generate_benchmark_data --settings=benchmarks.settings --signals 1000
+    python -m benchmarks.connections --connect-latency-ms 30
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from benchmarks.common import print_table, setup_django, summarize
+
+SCENARIOS = (
+    ('connect-per-request', 0, False),
+    ('persistent', 600, False),
+    ('persistent+health-checks', 600, True),
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--url-name', default='Signals:timeframes')
+    parser.add_argument('--connect-latency-ms', type=float, default=30)
+    parser.add_argument('--roundtrip-ms', type=float, default=1)
+    args = parser.parse_args(argv)
+
+    os.environ['MONTADA_BENCH_DB_ENGINE'] = 'benchmarks.latency_sqlite'
+    os.environ['MONTADA_BENCH_CONNECT_LATENCY_MS'] = str(args.connect_latency_ms)
+    os.environ['MONTADA_BENCH_ROUNDTRIP_MS'] = str(args.roundtrip_ms)
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from django.db import close_old_connections, connection
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from benchmarks.latency_sqlite.base import DatabaseWrapper
+
+    user = get_user_model().objects.filter(user_type='trader').first()
+    if user is None:
+        raise SystemExit('No benchmark data found. Run generate_benchmark_data first.')
+    token = str(RefreshToken.for_user(user).access_token)
+    client = APIClient()
+    path = reverse(args.url_name)
+
+    results = {}
+    for name, max_age, health_checks in SCENARIOS:
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+        DatabaseWrapper.connects = 0
+
+        samples = []
+        for _ in range(args.requests):
+            start = perf_counter()
+            close_old_connections()
+            response = client.get(path, HTTP_AUTHORIZATION=f'Bearer {token}')
+            close_old_connections()
+            samples.append(perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+
+        result = summarize(samples)
+        result['connects'] = DatabaseWrapper.connects
+        results[name] = result
+
+    print(f'{args.requests} x GET {path}, connect latency {args.connect_latency_ms}ms\n')
+    print_table(results, columns=('p50', 'p95', 'mean', 'connects'), label='scenario')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""
+Endpoint benchmark runner.
+
+Drives every API route in Montada/urls.py through the Django test client
+against the local SQLite benchmark database, authenticating with real JWT
+access tokens, and reports p50/p95/p99 latency and the query count per
+endpoint. Requests that write run inside a transaction that is rolled back,
+so every iteration sees the same data.
+
+    python manage.py migrate --run-syncdb --settings=benchmarks.settings
+    python manage.py generate_benchmark_data --settings=benchmarks.settings \
+        --traders 2000 --analysts 100 --signals 200000
+    python -m benchmarks.endpoints --save-baseline
+    # ...change code...
+    python -m benchmarks.endpoints          # exits 1 on regressions
+
+Routes without a case below are listed as uncovered so new endpoints do not
+silently escape the benchmark.
+"""
+import argparse
+import sys
+import uuid
+from time import perf_counter
+
+from benchmarks.common import (
+    BENCHMARKS_DIR,
+    compare_to_baseline,
+    load_baseline,
+    print_table,
+    save_results,
+    setup_django,
+    summarize,
+)
+
+DEFAULT_BASELINE = BENCHMARKS_DIR / 'baseline_endpoints.json'
+API_NAMESPACES = ('Mainapp', 'Subscriptions', 'Signals', 'Followers', 'Notifications')
+# API routes outside the app namespaces
+API_ROOT_NAMES = ('batch',)
+
+
+class Case:
+    """
+    One benchmarked request. ``as_user`` is 'trader', 'analyst' or None
+    (anonymous); kwargs/query/data are callables receiving the fixture
+    context.
+    """
+    def __init__(self, method='get', as_user='trader', kwargs=None, query=None, data=None, fmt='json'):
+        self.method = method
+        self.as_user = as_user
+        self.kwargs = kwargs or (lambda ctx: {})
+        self.query = query or (lambda ctx: {})
+        self.data = data or (lambda ctx: {})
+        self.fmt = fmt
+
+    @property
+    def writes(self):
+        return self.method != 'get'
+
+
+CASES = {
+    # Mainapp
+    'Mainapp:register': Case('post', None, data=lambda ctx: {
+        'email': 'bench.register@bench.montada.local', 'password': 'Bench-Passw0rd!', 'user_type': 'trader',
+    }),
+    'Mainapp:verify_email': Case('post', None, data=lambda ctx: {'email': ctx['trader'].email, 'otp': '000000'}),
+    'Mainapp:resend_verification_otp': Case('post', None, data=lambda ctx: {'email': ctx['trader'].email}),
+    'Mainapp:login': Case('post', None, data=lambda ctx: {'email': ctx['trader'].email, 'password': ctx['password']}),
+    'Mainapp:token_refresh': Case('post', None, data=lambda ctx: {'refresh': ctx['refresh']}),
+    'Mainapp:profile': Case(),
+    'Mainapp:change_password': Case('put', data=lambda ctx: {
+        'old_password': 'wrong-password', 'new_password': 'Bench-Passw0rd!', 'new_password2': 'Bench-Passw0rd!',
+    }),
+    'Mainapp:logout': Case('post', data=lambda ctx: {'refresh_token': ctx['refresh']}),
+    'Mainapp:forgot_password': Case('post', None, data=lambda ctx: {'email': ctx['trader'].email}),
+    'Mainapp:verify_otp': Case('post', None, data=lambda ctx: {'email': ctx['trader'].email, 'otp': '000000'}),
+    'Mainapp:reset_password': Case('post', None, data=lambda ctx: {
+        'email': ctx['trader'].email, 'otp': '000000', 'new_password': 'Bench-Passw0rd!',
+    }),
+    'Mainapp:resend_password_reset_otp': Case('post', None, data=lambda ctx: {'email': ctx['trader'].email}),
+    # Subscriptions
+    'Subscriptions:subscription_status': Case(),
+    'Subscriptions:subscribe': Case('post', data=lambda ctx: {'plan_type': 'monthly', 'months': 1}),
+    'Subscriptions:cancel_subscription': Case('post'),
+    'Subscriptions:check_subscription': Case(),
+    # Signals
+    'Signals:create_signal': Case('post', 'analyst', data=lambda ctx: {
+        'asset_class': str(ctx['signal'].asset_class_id), 'instrument': str(ctx['signal'].instrument_id),
+        'timeframe': str(ctx['signal'].timeframe_id), 'direction': 'BUY', 'entry_price': '1.10000',
+        'stop_loss': '1.09000', 'take_profit': '1.12000', 'confidence_level': 70,
+    }),
+    'Signals:analyst_signals_list': Case(as_user='analyst'),
+    'Signals:signal_feed': Case(),
+    'Signals:analyst_signal_update': Case('patch', 'analyst', kwargs=lambda ctx: {'pk': str(ctx['signal'].pk)},
+                                          data=lambda ctx: {'status': 'CLOSED'}),
+    'Signals:analyst_signal_delete': Case('delete', 'analyst', kwargs=lambda ctx: {'pk': str(ctx['signal'].pk)}),
+    'Signals:analyst_signals_sync': Case(as_user='analyst',
+                                         query=lambda ctx: {'token': ctx['sync_tokens']['my-signals']}),
+    'Signals:analyst_signal_history': Case(as_user='analyst'),
+    'Signals:analyst_signal_replay': Case(as_user='analyst', kwargs=lambda ctx: {'pk': str(ctx['signal'].pk)}),
+    'Signals:signal_events': Case(),
+    'Signals:analyst_signal_restore': Case('post', 'analyst',
+                                           kwargs=lambda ctx: {'pk': str(ctx['deleted_signal'].pk)}),
+    'Signals:trending_instruments': Case(query=lambda ctx: {'window': '7d', 'by': 'followers'}),
+    'Signals:instrument_consensus': Case(kwargs=lambda ctx: {'instrument_id': str(ctx['signal'].instrument_id)}),
+    'Signals:candles': Case(kwargs=lambda ctx: {'instrument_id': str(ctx['signal'].instrument_id), 'timeframe': 'M1'}),
+    'Signals:signal_backtest': Case(query=lambda ctx: {'analyst': str(ctx['analyst'].pk)}),
+    'Signals:asset_classes': Case(),
+    'Signals:instruments': Case(),
+    'Signals:timeframes': Case(),
+    'Signals:assets_instruments': Case(),
+    # Followers
+    'Followers:follow_request': Case('post', data=lambda ctx: {'user_id': str(ctx['unfollowed_analyst'].pk)}),
+    'Followers:follow_accept': Case('post', 'analyst', data=lambda ctx: {'follow_id': str(ctx['pending'].pk)}),
+    'Followers:follow_reject': Case('post', 'analyst', data=lambda ctx: {'follow_id': str(ctx['pending'].pk)}),
+    'Followers:unfollow': Case('post', data=lambda ctx: {'user_id': str(ctx['analyst'].pk)}),
+    'Followers:block': Case('post', 'analyst', data=lambda ctx: {'user_id': str(ctx['trader'].pk)}),
+    'Followers:unblock': Case('post', 'analyst', data=lambda ctx: {'user_id': str(ctx['trader'].pk)}),
+    'Followers:mute': Case('post', data=lambda ctx: {'user_id': str(ctx['analyst'].pk)}),
+    'Followers:unmute': Case('post', data=lambda ctx: {'user_id': str(ctx['analyst'].pk)}),
+    'Followers:analysts_list': Case(query=lambda ctx: {'include_status': '1'}),
+    'Followers:followers_list': Case(as_user='analyst'),
+    'Followers:following_list': Case(),
+    'Followers:pending_received': Case(as_user='analyst'),
+    'Followers:pending_sent': Case(),
+    'Followers:muted_list': Case(),
+    'Followers:followers_sync': Case(as_user='analyst', query=lambda ctx: {'token': ctx['sync_tokens']['followers']}),
+    'Followers:following_sync': Case(query=lambda ctx: {'token': ctx['sync_tokens']['following']}),
+    'Followers:counts': Case(),
+    'Followers:follow_status': Case(query=lambda ctx: {'user_id': str(ctx['analyst'].pk)}),
+    # Notifications
+    'Notifications:notification_list': Case(),
+    'Notifications:unread_count': Case(),
+    'Notifications:mark_all_read': Case('post'),
+    'Notifications:mark_read': Case('post', kwargs=lambda ctx: {'pk': str(ctx['notification_id'])}),
+    # Batch
+    'batch': Case('post', data=lambda ctx: {'requests': ctx['batch_paths']}),
+}
+
+
+def api_route_names():
+    from django.urls import URLResolver, get_resolver
+
+    names = []
+
+    def walk(patterns, namespace=None):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, pattern.namespace or namespace)
+            elif namespace in API_NAMESPACES and pattern.name:
+                names.append(f'{namespace}:{pattern.name}')
+            elif namespace is None and pattern.name in API_ROOT_NAMES:
+                names.append(pattern.name)
+
+    walk(get_resolver().url_patterns)
+    return names
+
+
+def build_context():
+    """Pick representative users and rows from the generated data"""
+    from datetime import timedelta
+
+    from django.db.models import Count, Q
+    from django.urls import reverse
+    from django.utils import timezone
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from Followers.models import Follow
+    from Mainapp.management.commands.generate_benchmark_data import BENCHMARK_PASSWORD
+    from Mainapp.models import User
+    from Notifications.models import Notification
+    from Montada.sync import make_token
+    from Signals.models import TradingSignal
+
+    analyst = (
+        User.objects.filter(user_type='analyst')
+        .annotate(pending=Count('received_follow_requests', filter=Q(received_follow_requests__status='PENDING')))
+        .filter(pending__gt=0)
+        .order_by('-pending')
+        .first()
+    )
+    if analyst is None:
+        raise SystemExit(
+            'No benchmark data found. Run `manage.py generate_benchmark_data --settings=benchmarks.settings` first.'
+        )
+    pending = Follow.objects.filter(followed=analyst, status=Follow.Status.PENDING).first()
+    follow = Follow.objects.filter(
+        followed=analyst, status=Follow.Status.ACCEPTED, is_active=True, follower__user_type='trader'
+    ).first()
+    trader = follow.follower
+    unfollowed_analyst = User.objects.filter(user_type='analyst').exclude(
+        received_follow_requests__follower=trader
+    ).first()
+    signal = TradingSignal.active.filter(analyst=analyst).first()
+    notification_id = Notification.objects.filter(recipient=trader, is_read=False).values_list('id', flat=True).first()
+    deleted_signal = TradingSignal.objects.filter(analyst=analyst, deleted_at__isnull=False).first()
+
+    tokens = {}
+    for role, user in (('trader', trader), ('analyst', analyst)):
+        tokens[role] = str(RefreshToken.for_user(user).access_token)
+    # Deltas over the last day, what a client syncing daily asks for
+    since = timezone.now() - timedelta(days=1)
+    sync_tokens = {
+        'my-signals': make_token(analyst, 'my-signals', since),
+        'followers': make_token(analyst, 'followers', since),
+        'following': make_token(trader, 'following', since),
+    }
+
+    return {
+        'trader': trader,
+        'analyst': analyst,
+        'unfollowed_analyst': unfollowed_analyst or analyst,
+        'pending': pending,
+        'signal': signal,
+        'deleted_signal': deleted_signal or signal,
+        # Data generated with --notifications-per-trader 0 has none (the case then measures a 404)
+        'notification_id': notification_id or uuid.uuid4(),
+        'password': BENCHMARK_PASSWORD,
+        'refresh': str(RefreshToken.for_user(trader)),
+        'tokens': tokens,
+        'sync_tokens': sync_tokens,
+        # What a client loads on startup
+        'batch_paths': [
+            reverse('Mainapp:profile'),
+            reverse('Subscriptions:subscription_status'),
+            reverse('Followers:counts'),
+            reverse('Signals:signal_feed'),
+        ],
+    }
+
+
+class Rollback(Exception):
+    pass
+
+
+def run_case(client, name, case, ctx, iterations, warmup):
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+
+    path = reverse(name, kwargs=case.kwargs(ctx))
+    query = case.query(ctx)
+    headers = {}
+    if case.as_user:
+        headers['HTTP_AUTHORIZATION'] = f'Bearer {ctx["tokens"][case.as_user]}'
+
+    samples = []
+    queries = 0
+    status_code = None
+    for i in range(warmup + iterations):
+        data = case.data(ctx)
+        if case.method == 'get':
+            data = query
+        with CaptureQueriesContext(connection) as captured:
+            try:
+                with transaction.atomic():
+                    start = perf_counter()
+                    response = getattr(client, case.method)(path, data, format=case.fmt, **headers)
+                    elapsed = perf_counter() - start
+                    if case.writes:
+                        raise Rollback
+            except Rollback:
+                pass
+        if i >= warmup:
+            samples.append(elapsed)
+            # SAVEPOINT/RELEASE/ROLLBACK bookkeeping of the wrapper is not the endpoint's
+            queries = max(queries, sum(
+                1 for q in captured.captured_queries if 'SAVEPOINT' not in q['sql'].upper()
+            ))
+        status_code = response.status_code
+
+    result = summarize(samples)
+    result['queries'] = queries
+    result['status'] = status_code
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', nargs='*', help='Benchmark only these URL names')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--output', help='Also write results to this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 growth before flagging (fraction)')
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from rest_framework.test import APIClient
+
+    ctx = build_context()
+    client = APIClient()
+    names = api_route_names()
+    uncovered = [name for name in names if name not in CASES]
+    selected = [name for name in names if name in CASES and (not args.only or name in args.only)]
+
+    results = {}
+    for name in selected:
+        results[name] = run_case(client, name, CASES[name], ctx, args.iterations, args.warmup)
+
+    print_table(results, columns=('p50', 'p95', 'p99', 'queries', 'status'))
+    if uncovered:
+        print('\nRoutes without a benchmark case: ' + ', '.join(uncovered))
+    if args.output:
+        save_results(args.output, results)
+    if args.save_baseline:
+        save_results(args.baseline, results)
+        print(f'\nBaseline saved to {args.baseline}')
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f'\nNo baseline at {args.baseline}; run with --save-baseline to create one.')
+        return 0
+    regressions = compare_to_baseline(results, baseline, tolerance=args.tolerance)
+    if regressions:
+        print('\nRegressions against baseline:')
+        for line in regressions:
+            print(f'  {line}')
+        return 1
+    print('\nNo regressions against baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
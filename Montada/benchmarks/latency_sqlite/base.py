@@ -0,0 +1,36 @@
+"""
+SQLite backend that behaves like a remote SQL Server for connection costs.
+
+Opening a connection sleeps BENCH_CONNECT_LATENCY_MS (TCP + TLS + login
+handshake) and the health-check ping sleeps BENCH_ROUNDTRIP_MS, so the
+connection benchmark can compare CONN_MAX_AGE/CONN_HEALTH_CHECKS settings on
+a laptop without a SQL Server. BENCH_QUERY_LATENCY_MS (default 0) adds a
+network round trip to every query, for the ASGI concurrency benchmark.
+"""
+import time
+
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    connects = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if getattr(settings, 'BENCH_QUERY_LATENCY_MS', 0):
+            self.execute_wrappers.append(self.query_latency)
+
+    @staticmethod
+    def query_latency(execute, sql, params, many, context):
+        time.sleep(settings.BENCH_QUERY_LATENCY_MS / 1000)
+        return execute(sql, params, many, context)
+
+    def get_new_connection(self, conn_params):
+        time.sleep(getattr(settings, 'BENCH_CONNECT_LATENCY_MS', 30) / 1000)
+        DatabaseWrapper.connects += 1
+        return super().get_new_connection(conn_params)
+
+    def is_usable(self):
+        time.sleep(getattr(settings, 'BENCH_ROUNDTRIP_MS', 1) / 1000)
+        return super().is_usable()
@@ -0,0 +1,107 @@
+"""
+JSON renderer/parser microbenchmark: DRF's JSONRenderer/JSONParser (stdlib
+json) against Montada.renderers.FastJSONRenderer/FastJSONParser (orjson) on
+two real payloads:
+
+  * signals    one page of TradingSignalSerializer output (Decimal prices as
+               strings, UUIDs, datetimes)
+  * analysts   the AnalystsListView response (up to 200 analysts with
+               follower and signal counts)
+
+Both renderers must produce byte-identical output or the benchmark exits
+with an error.
+
+    python manage.py generate_benchmark_data --settings=benchmarks.settings
+    python -m benchmarks.renderers --page-size 100
+"""
+import argparse
+import io
+import sys
+from time import perf_counter
+
+from benchmarks.common import print_table, setup_django
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def signal_payload(page_size):
+    from Signals.models import TradingSignal
+    from Signals.serializers import TradingSignalSerializer
+
+    queryset = TradingSignal.active.select_related(
+        'analyst', 'asset_class', 'instrument', 'timeframe'
+    ).order_by('-created_at')[:page_size]
+    return TradingSignalSerializer(list(queryset), many=True).data
+
+
+def analyst_payload(user):
+    from django.test.utils import override_settings
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from Followers.views import AnalystsListView
+
+    request = APIRequestFactory().get('/api/followers/analysts/', {'include_status': '1'})
+    force_authenticate(request, user)
+    with override_settings(RESPONSE_CACHE_ENABLED=False):
+        return AnalystsListView.as_view()(request).data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from Mainapp.models import User
+    from Montada import renderers
+
+    if renderers.orjson is None:
+        raise SystemExit('orjson is not installed; FastJSONRenderer would just be JSONRenderer.')
+    trader = User.objects.filter(user_type='trader').first()
+    if trader is None:
+        raise SystemExit('No benchmark data found. Run generate_benchmark_data first.')
+
+    analysts = analyst_payload(trader)
+    payloads = {
+        'signals': (signal_payload(args.page_size), None),
+        'analysts': (analysts, analysts['count']),
+    }
+    backends = {
+        'stdlib': (JSONRenderer(), JSONParser()),
+        'orjson': (renderers.FastJSONRenderer(), renderers.FastJSONParser()),
+    }
+
+    results = {}
+    for name, (data, rows) in payloads.items():
+        expected = JSONRenderer().render(data)
+        for backend, (renderer, json_parser) in backends.items():
+            if renderer.render(data) != expected:
+                raise SystemExit(f'{backend} output differs from JSONRenderer on {name}')
+            render = best_of(lambda: renderer.render(data), args.repeat)
+            parse = best_of(lambda: json_parser.parse(io.BytesIO(expected)), args.repeat)
+            results[f'{name} {backend}'] = {
+                'rows': len(data) if rows is None else rows,
+                'KiB': round(len(expected) / 1024, 1),
+                'render ms': round(render * 1000, 3),
+                'parse ms': round(parse * 1000, 3),
+                'render MB/s': round(len(expected) / render / 1e6, 1),
+            }
+
+    print(f'best of {args.repeat}\n')
+    print_table(results, columns=('rows', 'KiB', 'render ms', 'parse ms', 'render MB/s'), label='payload')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
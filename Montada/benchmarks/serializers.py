@@ -0,0 +1,75 @@
+"""
+Signal list serialization microbenchmark: rows per second for one page of
+signals through TradingSignalSerializer (select_related + model instances)
+and through TradingSignalValuesSerializer (values() + one-pass dicts).
+
+'fetch+render' times the query and the rendering, as a list view does;
+'render' times the rendering alone on rows already loaded. Both paths must
+produce byte-identical JSON or the benchmark exits with an error.
+
+    python manage.py generate_benchmark_data --settings=benchmarks.settings
+    python -m benchmarks.serializers --page-size 100
+"""
+import argparse
+import sys
+from time import perf_counter
+
+from benchmarks.common import print_table, setup_django
+
+
+def rows_per_second(func, rows, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+    return round(rows / best, 1), round(best * 1000, 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+
+    from Signals.models import TradingSignal
+    from Signals.serializers import TradingSignalSerializer, TradingSignalValuesSerializer
+
+    queryset = TradingSignal.active.select_related(
+        'analyst', 'asset_class', 'instrument', 'timeframe'
+    ).order_by('-created_at')[:args.page_size]
+    instances = list(queryset)
+    rows = list(TradingSignalValuesSerializer.values(queryset))
+    if not instances:
+        raise SystemExit('No benchmark data found. Run generate_benchmark_data first.')
+
+    renderer = JSONRenderer()
+    expected = renderer.render(TradingSignalSerializer(instances, many=True).data)
+    if renderer.render(TradingSignalValuesSerializer(rows).data) != expected:
+        raise SystemExit('TradingSignalValuesSerializer output differs from TradingSignalSerializer')
+
+    count = len(instances)
+    cases = {
+        'model render': lambda: TradingSignalSerializer(instances, many=True).data,
+        'values render': lambda: TradingSignalValuesSerializer(rows).data,
+        'model fetch+render': lambda: TradingSignalSerializer(list(queryset.all()), many=True).data,
+        'values fetch+render': lambda: TradingSignalValuesSerializer(
+            list(TradingSignalValuesSerializer.values(queryset.all()))
+        ).data,
+    }
+    results = {}
+    for name, func in cases.items():
+        func()  # warm up
+        rate, ms = rows_per_second(func, count, args.repeat)
+        results[name] = {'rows/s': rate, 'ms/page': ms}
+
+    print(f'{count} signals per page, best of {args.repeat}\n')
+    print_table(results, columns=('rows/s', 'ms/page'), label='path')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+Settings for running benchmarks against a local SQLite database.
+
+    python manage.py migrate --run-syncdb --settings=benchmarks.settings
+    python manage.py generate_benchmark_data --settings=benchmarks.settings
+    python -m benchmarks.endpoints
+"""
+import os
+
+from Montada.settings import *  # noqa: F401,F403
+from Montada.settings import BASE_DIR
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        # benchmarks.latency_sqlite adds remote-server-like connect latency
+        'ENGINE': os.environ.get('MONTADA_BENCH_DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ.get('MONTADA_BENCH_DB', str(BASE_DIR / 'benchmarks' / 'bench.sqlite3')),
+    },
+}
+
+# Candles written by generate_benchmark_data, next to the database
+CANDLE_STORE_ROOT = os.environ.get('MONTADA_BENCH_CANDLES', str(BASE_DIR / 'benchmarks' / 'candles'))
+
+# Local apps other than Mainapp ship without migrations; build every local
+# app's tables straight from the models
+MIGRATION_MODULES = {app: None for app in ('Mainapp', 'Subscriptions', 'Signals', 'Followers', 'Notifications')}
+
+BENCH_CONNECT_LATENCY_MS = float(os.environ.get('MONTADA_BENCH_CONNECT_LATENCY_MS', 30))
+BENCH_ROUNDTRIP_MS = float(os.environ.get('MONTADA_BENCH_ROUNDTRIP_MS', 1))
+BENCH_QUERY_LATENCY_MS = float(os.environ.get('MONTADA_BENCH_QUERY_LATENCY_MS', 0))
+BENCH_SMTP_LATENCY_MS = float(os.environ.get('MONTADA_BENCH_SMTP_LATENCY_MS', 0))
+
+# locmem outbox, optionally as slow as a remote SMTP server
+EMAIL_BACKEND = 'benchmarks.slow_email.EmailBackend'
+PROFILE_PICTURE_PROCESS_ASYNC = False
+
+PERFORMANCE_INSTRUMENTATION = {
+    'ENABLED': False,
+}
@@ -0,0 +1,16 @@
+"""
+In-memory email backend that waits BENCH_SMTP_LATENCY_MS per message, like
+the SMTP conversation with a remote mail server.
+"""
+import time
+
+from django.conf import settings
+from django.core.mail.backends import locmem
+
+
+class EmailBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        delay = getattr(settings, 'BENCH_SMTP_LATENCY_MS', 0) / 1000
+        if delay:
+            time.sleep(delay * len(messages))
+        return super().send_messages(messages)
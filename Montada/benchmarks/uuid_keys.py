@@ -0,0 +1,89 @@
+"""
+Primary key insert benchmark: random uuid4 keys against time-ordered uuid7
+keys (Montada.ids.uuid7) in a clustered primary key index.
+
+Each run inserts --rows rows in --batch sized transactions into a fresh
+SQLite WITHOUT ROWID table, whose rows live in the primary key B-tree like
+a SQL Server table clustered on its key. The key is a char(32) hex string,
+as mssql-django stores UUIDField. A page cache smaller than the table
+(--cache-pages) stands in for a buffer pool that no longer holds the whole
+index, where random keys have to read and split a cold page per insert.
+
+'tail rows/s' covers the last tenth of the inserts, when the table is at its
+largest; 'pages' is the final size of the table in database pages. Page
+splits leave random-key pages partly empty, so the same rows take more.
+
+    python -m benchmarks.uuid_keys --rows 200000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import uuid
+from time import perf_counter
+
+from benchmarks.common import print_table
+
+PAYLOAD = 'x' * 200
+
+
+def run(key_factory, rows, batch, cache_pages):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = sqlite3.connect(os.path.join(tmp, 'keys.sqlite3'), isolation_level=None)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute(f'PRAGMA cache_size={cache_pages}')
+        db.execute('CREATE TABLE signal (id char(32) PRIMARY KEY, payload text) WITHOUT ROWID')
+
+        tail_from = rows - rows // 10
+        start = tail_start = perf_counter()
+        for offset in range(0, rows, batch):
+            if offset >= tail_from and tail_start <= start:
+                tail_start = perf_counter()
+            size = min(batch, rows - offset)
+            values = [(key_factory().hex, PAYLOAD) for _ in range(size)]
+            db.execute('BEGIN')
+            db.executemany('INSERT INTO signal (id, payload) VALUES (?, ?)', values)
+            db.execute('COMMIT')
+        end = perf_counter()
+
+        db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        pages = db.execute('PRAGMA page_count').fetchone()[0]
+        db.close()
+    return {
+        'rows/s': round(rows / (end - start)),
+        'tail rows/s': round((rows - tail_from) / (end - tail_start)),
+        'pages': pages,
+    }
+
+
+def keys_per_second(key_factory, count=200_000):
+    start = perf_counter()
+    for _ in range(count):
+        key_factory()
+    return round(count / (perf_counter() - start))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--batch', type=int, default=500)
+    parser.add_argument('--cache-pages', type=int, default=500, help='SQLite page cache size, in pages')
+    args = parser.parse_args(argv)
+
+    # Only the key generator is needed, not Django
+    from Montada.ids import uuid7
+
+    results = {}
+    for name, factory in (('uuid4', uuid.uuid4), ('uuid7', uuid7)):
+        results[name] = run(factory, args.rows, args.batch, args.cache_pages)
+        results[name]['keys/s'] = keys_per_second(factory)
+
+    print(f'{args.rows} rows in batches of {args.batch}, {args.cache_pages}-page cache\n')
+    print_table(results, columns=('rows/s', 'tail rows/s', 'pages', 'keys/s'), label='key')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())